@@ -14,6 +14,15 @@ def clear_line() -> None:
     sys.stdout.write("\r" + " " * 80 + "\r")
     sys.stdout.flush()
 
+def in_notebook() -> bool:
+    """Running under an IPython kernel (Jupyter), where display handles redraw in place?"""
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+    shell = get_ipython()
+    return shell is not None and hasattr(shell, "kernel")
+
 class CardInfo:
   SUITS =  {'S':
                       {'name': 'spades',
@@ -39,6 +48,10 @@ class CardInfo:
       card_code = str(rank_letter) + str(char_suit) # eg. AS
       INFO.append([card_code, rank_name, *values.values()])
 
+  IDS = {} # card code -> card id, its position in INFO
+  for card_id, info in enumerate(INFO):
+    IDS[info[0]] = card_id
+
   @staticmethod
   def get_info():
     return CardInfo.INFO
@@ -0,0 +1,173 @@
+import math
+import numpy as np
+
+from typing import Dict, Optional
+
+
+def log_results(reader, seat:int = 0):
+  """(nets, bets) of one seat over every round in a `replay.RoundReader`, skipping rounds it sat out."""
+  bets = np.array([rnd.bets[seat] for rnd in reader], dtype=float)
+  nets = np.array([rnd.net[seat] for rnd in reader], dtype=float)
+  played = bets > 0
+  return nets[played], bets[played]
+
+
+def summarize(nets, bets = None) -> Dict[str, float]:
+  """
+  Headline numbers for a sequence of per-round net results:
+
+  - ev / sd: mean and standard deviation per round
+  - ev_per_unit: ev divided by the average opening bet (if `bets` is given)
+  - n0: rounds needed before the expected win equals one standard deviation
+  - score: SCORE, the expected win per 100 rounds of a Kelly bettor with a
+    10,000 bankroll (1e6 / n0)
+  """
+  nets = np.asarray(nets, dtype=float)
+  ev, sd = float(nets.mean()), float(nets.std(ddof=1)) if len(nets) > 1 else 0.0
+  n0 = sd * sd / (ev * ev) if ev else math.inf
+  out = {"rounds": len(nets), "ev": ev, "sd": sd, "n0": n0, "score": 1e6 / n0 if ev > 0 else 0.0}
+  if bets is not None:
+      out["ev_per_unit"] = ev / float(np.mean(bets))
+  return out
+
+
+def risk_of_ruin(ev:float, sd:float, bankroll:float) -> float:
+  """Diffusion approximation of the chance of ever losing `bankroll` when playing forever."""
+  if ev <= 0:
+      return 1.0
+  return math.exp(-2 * ev * bankroll / (sd * sd))
+
+
+class RunningStats:
+  """Welford running mean and variance, one observation at a time."""
+  __slots__ = ("n", "mean", "_m2")
+
+  def __init__(self):
+      self.n, self.mean, self._m2 = 0, 0.0, 0.0
+
+  def push(self, x:float) -> None:
+      self.n += 1
+      delta = x - self.mean
+      self.mean += delta / self.n
+      self._m2 += delta * (x - self.mean)
+
+  @property
+  def sd(self) -> float: return math.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else math.inf
+
+  def half_width(self, z:float = 1.96) -> float:
+      """Half the width of the normal confidence interval of the mean."""
+      return z * self.sd / math.sqrt(self.n) if self.n > 1 else math.inf
+
+  def interval(self, z:float = 1.96):
+      h = self.half_width(z)
+      return self.mean - h, self.mean + h
+
+
+class BankrollSimulator:
+  """
+  Bootstrap bankroll paths from observed round results.
+
+  Each of `paths` independent paths starts at `bankroll` and draws its
+  rounds at random from `nets`. Paths are advanced `chunk` rounds at a time
+  with cumulative sums, so millions of rounds over thousands of paths only
+  ever hold one (paths x chunk) block in memory.
+
+  A path is ruined the first time it reaches zero; it is frozen there.
+  """
+  def __init__(self, nets, bankroll:float, paths:int = 1000, seed:Optional[int] = None, chunk:int = 4096):
+      self._nets = np.asarray(nets, dtype=float)
+      self._start = bankroll
+      self._chunk = chunk
+      self._rng = np.random.default_rng(seed)
+      self.rounds = 0
+      self.bankroll = np.full(paths, float(bankroll))
+      self.peak = self.bankroll.copy()
+      self.low = self.bankroll.copy()
+      self.max_drawdown = np.zeros(paths)
+      self.ruined_at = np.full(paths, -1)
+
+  def run(self, rounds:int) -> "BankrollSimulator":
+      """Advance every path by `rounds` more rounds; may be called repeatedly."""
+      paths = len(self.bankroll)
+      while rounds > 0:
+          n = min(rounds, self._chunk)
+          steps = self._nets[self._rng.integers(len(self._nets), size=(paths, n))]
+          steps[self.ruined_at >= 0] = 0
+          cum = self.bankroll[:, None] + np.cumsum(steps, axis=1)
+
+          broke = cum <= 0
+          newly = (self.ruined_at < 0) & broke.any(axis=1)
+          first = broke[newly].argmax(axis=1)
+          self.ruined_at[newly] = self.rounds + first
+          cols = np.arange(n)
+          cum[newly] = np.where(cols[None, :] >= first[:, None], 0.0, cum[newly])
+
+          peaks = np.maximum(self.peak[:, None], np.maximum.accumulate(cum, axis=1))
+          self.max_drawdown = np.maximum(self.max_drawdown, (peaks - cum).max(axis=1))
+          self.peak = peaks[:, -1]
+          self.low = np.minimum(self.low, cum.min(axis=1))
+          self.bankroll = cum[:, -1]
+          self.rounds += n
+          rounds -= n
+      return self
+
+  def risk_of_ruin(self) -> float:
+      return float((self.ruined_at >= 0).mean())
+
+  def drawdown_quantiles(self, q = (0.5, 0.9, 0.99)) -> Dict[float, float]:
+      return dict(zip(q, np.quantile(self.max_drawdown, q).tolist()))
+
+  def summary(self) -> Dict[str, float]:
+      return {
+          "rounds": self.rounds,
+          "risk_of_ruin": self.risk_of_ruin(),
+          "mean_final": float(self.bankroll.mean()),
+          "median_final": float(np.median(self.bankroll)),
+          "mean_max_drawdown": float(self.max_drawdown.mean()),
+          **{f"drawdown_q{int(q * 100)}": v for q, v in self.drawdown_quantiles().items()},
+      }
+
+
+class BankrollTracker:
+  """
+  Running statistics of one live bankroll, updated a batch of rounds at a
+  time so a dashboard can refresh cheaply during a long run.
+  """
+  def __init__(self, bankroll:float):
+      self.bankroll = self.peak = float(bankroll)
+      self.max_drawdown = 0.0
+      self.n, self.mean, self._m2 = 0, 0.0, 0.0
+      self.wagered = 0.0
+
+  def update(self, nets, bets = None) -> "BankrollTracker":
+      nets = np.asarray(nets, dtype=float)
+      if not len(nets):
+          return self
+      # Chan et al. merge of the batch's mean/variance into the running ones.
+      n, mean = len(nets), float(nets.mean())
+      m2 = float(((nets - mean) ** 2).sum())
+      delta, total = mean - self.mean, self.n + n
+      self.mean += delta * n / total
+      self._m2 += m2 + delta * delta * self.n * n / total
+      self.n = total
+
+      path = self.bankroll + np.cumsum(nets)
+      peaks = np.maximum(self.peak, np.maximum.accumulate(path))
+      self.max_drawdown = max(self.max_drawdown, float((peaks - path).max()))
+      self.peak, self.bankroll = float(peaks[-1]), float(path[-1])
+      if bets is not None:
+          self.wagered += float(np.sum(bets))
+      return self
+
+  @property
+  def sd(self) -> float: return math.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+  def summary(self) -> Dict[str, float]:
+      ev, sd = self.mean, self.sd
+      n0 = sd * sd / (ev * ev) if ev else math.inf
+      out = {"rounds": self.n, "bankroll": self.bankroll, "ev": ev, "sd": sd, "n0": n0,
+             "score": 1e6 / n0 if ev > 0 else 0.0, "max_drawdown": self.max_drawdown,
+             "risk_of_ruin": risk_of_ruin(ev, sd, self.bankroll) if sd else float(ev <= 0)}
+      if self.wagered:
+          out["ev_per_unit"] = ev * self.n / self.wagered
+      return out
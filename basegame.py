@@ -1,224 +1,269 @@
-from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+"""
+Phase-driven engine shared by the card games.
+
+A game declares its round once, as `PHASES`: (label, method name) pairs.
+`Base` compiles them into a flat list of bound calls when the table is set
+up; console messages and phase timings are wrapped around the calls only
+if asked for, so a headless round is a plain loop over that list. A phase
+ends the round early by returning True.
+
+`ArrayGame` keeps per-seat state (chips, bets, who is still playing) in
+NumPy arrays and settles every seat at once; `HighCard` and `War` are built
+on it and play any `Deck`, e.g. one with `DefaultCardComparer` cards.
+"""
+import numpy as np
 import pandas as pd
-from IPython.display import HTML, DisplayHandle, display
 
-from ._utils import flash_line, clear_line
-from .playingcards import DefaultCardComparer, BlackjackCardComparer
-from .participants import Participant, BlackjackPlayer, Dealer
-from .cards import Shoe
+from abc import ABC
+from collections import defaultdict
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ._utils import CardInfo, flash_line, clear_line
+from .cards import Deck
+from .participants import Participant
+from .playingcards import DefaultCardComparer
+
+# Card id -> rank from 2 (0) up to ace (12); card ids list the aces first.
+HIGH_RANK = (np.arange(len(CardInfo.INFO)) // len(CardInfo.SUITS) - 1) % len(CardInfo.NAMES)
+
 
 class Base(ABC):
-	def __init__(self, players:List[Participant], deck: Deck):
-		self._game:int = 0
-	    self._players: List[Participant] = players
-	    self._all_active_players = self._active_players = players
-		self._inactive_players = []
-
-		self._deck = deck
-		self._round_results: List[Dict] = []
-	    self._handle = display(DisplayHandle(), display_id=True)
-	
-	def play_round(self) -> None:
-		if not self._active_players: exit()
-		self.before_round()
-		for phase, fn in self.phases():
-			flash_line(f"{phase}…")
-			done_early = fn()
-			clear_line()
-			if done_early:
-				break
-		self.after_round()
-		
-	def compare(self, player_hand:Hand, other_hand:Hand) -> str:
-    	return {1: "win", 0: "push", -1:"lose"}[player_hand > other_hand) - (player_hand < other_hand)]
-		
-	def check_eligibility(self, player:Participant) -> bool:
-	    if not player.is_eligible():
-		  	self._inactive_players.append(player)
-			self._all_active_players.remove(player)
-			self._active_players.remove(player)
-			return False
-	    return True
-		
-	def add_history(self, player:Participant, outcome:str) -> None:
-		self._round_results.append({
-            "game": self._game,
-            "player": player.name,
-            "outcome": outcome
-        })
-		
-	@abstractmethod
-	def phases(self): pass
-	@abstractmethod
-	def before_round(self): pass
-	@abstractmethod
-	def after_round(self): pass
-	@abstractmethod
-	def take_bets(self): pass
-	@abstractmethod
-	def next(self, player): pass
-	
-	def get_scores(self) -> pd.Series: return pd.Series([player.score for player in self._all_active_players], name = "Scores")
-	def get_chips(self) -> pd.Series: return pd.Series([player.chips for player in self._all_active_players], name = "Chips")
-	def get_names(self) -> pd.Series: return pd.Series([player.name for player in self._all_active_players], name = "Names")
-	def get_hands(self) -> pd.Series: return pd.Series([p.get_hand() for p in self._all_active_players], name = "Hands")
-	def get_status(self) -> pd.Series: return pd.Series([not p.is_done() for p in self._all_active_players], name = "Status")
-	def get_pending(self): return [p for p in self._active_players if p.is_waiting()]
-		
-class Game(Base):
-  	def __init__(self, players:List[Participant], dealer:Optional[Dealer] = None, comparer = DefaultCardComparer):
-	    self._pot = 0
-		super().__init__(players, Shoe(comparer = comparer))
-		self._dealer = dealer
-		if self._dealer:
-	    	self._all_active_players.append(self._dealer)
-		
-	def before_round(self):
-	    self._game += 1
-	    self._pot = 0
-	    self._round = 0
-		
-	def after_round(self):
-      	for p in self._players:
-	        p.reset()
-			self.check_eligibility(p)
-		if self._dealer:
-			self._dealer.reset()
-				
-	def take_bets(self):
-	    for player in self._active_players:
-	        self._pot += self._prompt_bet(player)
-
-  	def next(self, player, verbose = True):
-      	if player.has_strategy():
-          	hit = player.strategy.decide(self._deck, verbose = verbose)
-      	else:
-			hit = input(f"{player.name} [Current Score = {player.score}]: Press 'y' to hit, any other key to stand:\n").strip().lower() == 'y'
-		if hit:
-        	self.deal(player, verbose=verbose)
-        else:
-            self.skip(player)
-				
-  	def _prompt_bet(self, player, prompt = "{} [chips: {}], enter bet ≥ {}: \n", min_bet = 1):
-      	if player.has_strategy():
-         	return player.strategy.autobet(self._deck)
-      	prompt = prompt.format(player.name, player.chips, min_bet)
-		while True:
-			try:
-          		bet = int(input(prompt))
-          	except ValueError:
-				print("Error:  Please enter a whole number.")
-				continue
-          	if bet < 1:
-              	print(f"Error: Minimum bet is $1.")
-				continue
-          	if bet > player.chips:
-				print(f"Error:  You only have {player.chips} chips.  Betting the rest.")
-				bet = player.chips
-            return player.bet(bet)
-
-  	def get_active_players(self, verbose = False) -> List[BlackjackPlayer]: return [p for p in self._active_players if not p.is_done(verbose = verbose)]
-	@abstractmethod
-	def deal(self, player): ...
-	@abstractmethod
-	def skip(self, player): ...
-	@abstractmethod
-	def deal_opening(self): ...
-	@abstractmethod
-	def loop_turns(self): ...
-	@abstractmethod
-	def settle(self): ...
-
-class Blackjack(Game):
-	def __init__(self, players:List[BlackjackPlayer]):
-		self._dealer = Dealer()
-		super().__init__(players, self._dealer, BlackjackCardComparer)
-	
-	def phases(self):
-		phases = {"Dealing First Two Cards": self.deal_opening,
-				  "Play Rounds": self.loop_turns,
-				  "Settling": self.settle}
-		return phases.items()
-			
-  	def deal(self, player, verbose = True):
-	    card = player.hit(self._deck.draw())
-	    if verbose:
-	        flash_line(f"{player.name} drew {str(card)}")
-	    return card
-
-	def skip(self, player, verbose = True):
-		if verbose:
-			flash_line(f"{player.name} [Score: {player.score}] has decided to stand, skipping...")
-		player.stand()
-
-  	def deal_opening(self):
-		for _ in range(2):
-			self._round += 1
-			for p in self._all_active_players:
-				self.deal(p)
-		blackjack_players = [p for p in self._active_players if p.is_blackjack()]
-		if not blackjack_players:
-			return False
-		if self._dealer.peek():
-			for p in self._active_players:
-				if p not in blackjack_players:
-					self._payout(p, "loser")
-				  	continue
-			  	self.payout(p, "push")
-		  	self.exit_game()
-		  	return True
-		else:
-		  	for p in blackjack_players:
-			  	self.payout(p, "blackjack")
-			  	p.current_bet = 0
-		  	return False
-
-	def loop_turns(self):
-		while (actives:=self.get_active_players()):
-			self._round += 1
-			print(f"Round {self._round}:")
-			for player in actives:
-				self.next(player)
-				if player.is_21():
-					player.stand()
-		self._dealer.reveal()
-		while self._dealer.is_playing():
-			self.next(self._dealer)
-	
-	def settle(self):
-		if self._dealer.is_bust():
-			for player in self.get_pending():
-				self.payout(player, "win")
-	  	elif self._dealer.is_21():
-		   	for player in self.get_pending():
-			   	outcome = "push" if player.is_21() else "loser"
-			   	self.payout(player, outcome)
-	  	else:
-		  	dealer_hand = self._dealer.score
-		  	for player in self.get_pending():
-			  	outcome = self.compare(player.hand, dealer_hand)
-			  	self.payout(player, outcome)
-	  	dealer_outcome = self.compare(self._pot, 0)
-	  	self.add_history(self._dealer, dealer_outcome)
-	  	self._dealer.settle(self._pot)
-
-  	def payout(self, player, outcome):
-		self.add_history(player, outcome)
-		if outcome == "blackjack":
-			multiplier = 3
-			out_message = "{}:\nOutcome: Blackjack! \nWon:{}"
-		elif outcome == "win":
-			multiplier = 2
-		  	out_message = "{}:\nOutcome: Winner\nWon:{}"	
-		elif outcome == "push":
-			multiplier = 1
-		 	out_message = "{}:\nOutcome: Tied\nBroke Even, Net: {}"
-		else:
-			multiplier = 0
-		  	out_message = "{}:\nOutcome: Loser\nLost:{}"
-		winnings = player.current_bet * multiplier
-		net = winnings - player.current_bet
-    	flash_line(out_message.format(player.name, net)
-    	player.settle(winnings)
-    	self._pot -= winnings
+  PHASES: Tuple[Tuple[str, str], ...] = ()
+
+  def __init__(self, players:List[Participant], deck:Deck, verbose:bool = False, timed:bool = False):
+      self._game = 0
+      self._players = players
+      self._active_players = list(players)
+      self._all_active_players = list(players)
+      self._inactive_players = []
+      self._deck = deck
+      self._verbose = verbose
+      self._timed = timed or verbose
+      self._round_results: List[Dict] = []
+      self._timings: Dict[str, float] = defaultdict(float)   # seconds spent in each phase
+      self._calls = self.compile()
+
+  def compile(self) -> List[Callable[[], Optional[bool]]]:
+      """`PHASES` as bound calls, wrapped for timing and console messages only when enabled."""
+      calls = []
+      for label, name in self.PHASES:
+          fn = getattr(self, name)
+          if self._timed:
+              fn = self._timer(label, fn)
+          if self._verbose:
+              fn = self._announcer(label, fn)
+          calls.append(fn)
+      return calls
+
+  @property
+  def timed(self) -> bool:
+      """Whether phase times are added up in `_timings`; off by default, on when verbose."""
+      return self._timed
+
+  @timed.setter
+  def timed(self, on:bool) -> None:
+      self._timed = on
+      self._calls = self.compile()
+
+  def __getstate__(self):
+      state = self.__dict__.copy()
+      del state["_calls"]   # closures; rebuilt on unpickling
+      return state
+
+  def __setstate__(self, state):
+      self.__dict__.update(state)
+      self._calls = self.compile()
+
+  def _timer(self, label, fn):
+      timings = self._timings
+      def timed():
+          start = perf_counter()
+          done = fn()
+          timings[label] += perf_counter() - start
+          return done
+      return timed
+
+  @staticmethod
+  def _announcer(label, fn):
+      def announced():
+          flash_line(f"{label}…")
+          done = fn()
+          clear_line()
+          return done
+      return announced
+
+  def play_round(self) -> None:
+      if not self._active_players: exit()
+      self.before_round()
+      self.run_phases()
+      self.after_round()
+
+  def run_phases(self) -> None:
+      for fn in self._calls:
+          if fn():
+              break
+
+  def before_round(self) -> None: self._game += 1
+  def after_round(self) -> None: pass
+
+  def leave(self, player):
+      """Take a player off the table; they keep their chips and seat number."""
+      self._inactive_players.append(player)
+      self._all_active_players.remove(player)
+      self._active_players.remove(player)
+
+  def check_eligible_players(self, player):
+      if not player.is_eligible():
+          self.leave(player)
+          return False
+      return True
+
+  def add_history(self, player:Participant, outcome:str) -> None:
+      self._round_results.append({
+          "game": self._game,
+          "player": player.name,
+          "outcome": outcome
+      })
+
+  def get_scores(self) -> pd.Series: return pd.Series([player.score for player in self._all_active_players], name = "Scores")
+  def get_chips(self) -> pd.Series: return pd.Series([player.chips for player in self._all_active_players], name = "Chips")
+  def get_names(self) -> pd.Series: return pd.Series([player.name for player in self._all_active_players], name = "Names")
+  def get_hands(self) -> pd.Series: return pd.Series([p.get_hand() for p in self._all_active_players], name = "Hands")
+
+
+class ArrayGame(Base):
+  """
+  Games whose seats all play the same way, settled as arrays.
+
+  Chips, bets and the active mask live in NumPy arrays indexed by seat;
+  players' `chips` are brought up to date after every round. Outcome counts
+  per seat are kept in `tally` (columns as in `OUTCOMES`); with `history`
+  every result is also added to `_round_results`, as in Blackjack.
+  """
+  OUTCOMES: Tuple[str, ...] = ()
+
+  def __init__(self, players:List[Participant], deck:Deck, verbose:bool = False, timed:bool = False, history:bool = False):
+      super().__init__(players, deck, verbose, timed)
+      self._chips = np.array([p.chips for p in players], dtype=float)
+      self._bets = np.zeros(len(players))
+      self._active = self._chips > 0
+      self._seated = np.flatnonzero(self._active)   # seats still playing
+      self._history = history
+      self.tally = np.zeros((len(players), len(self.OUTCOMES)), dtype=np.int64)
+      self._end_round = getattr(deck, "end_round", None)
+
+  def draw_ranks(self, n:int) -> np.ndarray:
+      """`n` cards off the deck as `HIGH_RANK` ranks."""
+      draw = self._deck.draw
+      return HIGH_RANK[[draw().id for _ in range(n)]]
+
+  def record(self, seats:np.ndarray, outcomes:np.ndarray) -> None:
+      """Count outcome `outcomes[i]` (an index into `OUTCOMES`) for seat `seats[i]`; seats are distinct."""
+      self.tally[seats, outcomes] += 1
+      if self._history:
+          for seat, outcome in zip(seats.tolist(), outcomes.tolist()):
+              self.add_history(self._players[seat], self.OUTCOMES[outcome])
+
+  def after_round(self) -> None:
+      seats = self._seated
+      self._bets[seats] = 0
+      for seat, chips in zip(seats.tolist(), self._chips[seats].tolist()):
+          self._players[seat].chips = chips
+      broke = seats[self._chips[seats] <= 0]
+      if len(broke):
+          for seat in broke.tolist():
+              self.check_eligible_players(self._players[seat])
+          self._active[broke] = False
+          self._seated = np.flatnonzero(self._active)
+      if self._end_round is not None:
+          self._end_round()
+
+  def get_chips(self) -> pd.Series: return pd.Series(self._chips[self._active], name = "Chips")
+
+  def results(self) -> pd.DataFrame:
+      """Outcome counts and chips per player."""
+      out = pd.DataFrame(self.tally, index = [p.name for p in self._players], columns = list(self.OUTCOMES))
+      out["chips"] = self._chips
+      return out
+
+
+class HighCard(ArrayGame):
+  """
+  🃏 High Card: every seat antes, then each seat and the dealer get one
+  card. Higher rank (aces high) wins even money; equal ranks push.
+
+  Example usage:
+  -------------------
+  game = HighCard([Participant("Anna", 100), Participant("Noe", 100)])
+  for _ in range(10_000): game.play_round()
+  game.results()
+  -------------------
+  """
+  PHASES = (("Antes", "take_bets"), ("Deal", "deal"), ("Showdown", "settle"))
+  OUTCOMES = ("win", "push", "lose")
+
+  def __init__(self, players:List[Participant], deck:Optional[Deck] = None, ante:float = 1, **kwargs):
+      super().__init__(players, deck if deck is not None else Deck(comparer = DefaultCardComparer), **kwargs)
+      self._ante = ante
+      self._cards = np.zeros(0, dtype=int)
+      self._dealer_card = 0
+
+  def take_bets(self):
+      seats = self._seated
+      self._bets[seats] = np.minimum(self._ante, self._chips[seats])
+      self._chips[seats] -= self._bets[seats]
+
+  def deal(self):
+      ranks = self.draw_ranks(len(self._seated) + 1)
+      self._cards, self._dealer_card = ranks[:-1], ranks[-1]
+
+  def settle(self):
+      seats = self._seated
+      sign = np.sign(self._cards - self._dealer_card)
+      self._chips[seats] += self._bets[seats] * (1 + sign)
+      self.record(seats, 1 - sign)
+
+
+class War(HighCard):
+  """
+  ⚔️ Casino War: High Card, except a tie goes to war. The player raises
+  a second bet equal to the first, the dealer burns `burn` cards and deals
+  the tied seats and itself one more card each. Winning (or tying) the war
+  wins the raise and returns the ante; losing it loses both. A player who
+  cannot cover the raise surrenders half the ante instead.
+  """
+  PHASES = (("Antes", "take_bets"), ("Deal", "deal"), ("Showdown", "settle"), ("War", "war"))
+  OUTCOMES = ("win", "lose", "war win", "war lose", "surrender")
+
+  def __init__(self, players:List[Participant], deck:Optional[Deck] = None, ante:float = 1, burn:int = 3, **kwargs):
+      super().__init__(players, deck, ante, **kwargs)
+      self._burn = burn
+      self._tied = np.zeros(0, dtype=int)
+
+  def settle(self):
+      seats = self._seated
+      sign = np.sign(self._cards - self._dealer_card)
+      decided = sign != 0
+      self._chips[seats[decided]] += 2 * self._bets[seats[decided]] * (sign[decided] > 0)
+      self.record(seats[decided], np.where(sign[decided] > 0, 0, 1))
+      self._tied = seats[~decided]
+      return not len(self._tied)
+
+  def war(self):
+      tied = self._tied
+      covered = self._chips[tied] >= self._bets[tied]
+      quitters = tied[~covered]
+      self._chips[quitters] += self._bets[quitters] / 2
+      self.record(quitters, np.full(len(quitters), 4))
+
+      fighters = tied[covered]
+      if not len(fighters):
+          return
+      self._chips[fighters] -= self._bets[fighters]
+      for _ in range(self._burn):
+          self._deck.draw()
+      ranks = self.draw_ranks(len(fighters) + 1)
+      won = ranks[:-1] >= ranks[-1]
+      self._chips[fighters] += np.where(won, 3, 0) * self._bets[fighters]
+      self.record(fighters, np.where(won, 2, 3))
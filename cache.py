@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+import numpy as np
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Optional
+
+# Bump whenever a table builder changes what it computes; older files stop
+# matching and are removed by `TableCache.invalidate(stale_only=True)`.
+CACHE_VERSION = 1
+DEFAULT_ROOT = Path(os.environ.get("COUNTINGCARDS_CACHE", Path.home() / ".cache" / "countingcards"))
+
+
+class TableCache:
+  """
+  Directory of precomputed NumPy tables stored as `.npy` files.
+
+  Tables are keyed by (name, rule set, deck count, composition bucket, code
+  version) and read back memory-mapped, so any number of worker processes
+  share one copy through the page cache. Files are written atomically and the
+  directory is kept under `max_bytes` by evicting the least recently used.
+  """
+  def __init__(self, root = DEFAULT_ROOT, max_bytes:int = 256 * 2**20, version:int = CACHE_VERSION):
+      self._root = Path(root)
+      self._max_bytes = max_bytes
+      self._version = version
+
+  def path(self, name:str, rules:Hashable, num_decks:int, bucket:Hashable) -> Path:
+      digest = hashlib.sha1(repr((rules, num_decks, bucket)).encode()).hexdigest()[:16]
+      return self._root / f"{name}-v{self._version}-{digest}.npy"
+
+  def get(self, name, rules, num_decks, bucket) -> Optional[np.ndarray]:
+      path = self.path(name, rules, num_decks, bucket)
+      try:
+          table = np.load(path, mmap_mode="r")
+      except (FileNotFoundError, ValueError, OSError):
+          return None
+      os.utime(path)   # mark as recently used
+      return table
+
+  def put(self, name, rules, num_decks, bucket, table:np.ndarray) -> np.ndarray:
+      """Store `table` and return it memory-mapped; a table bigger than the whole cache is returned as is."""
+      table = np.ascontiguousarray(table)
+      if table.nbytes > self._max_bytes:
+          return table
+      self._root.mkdir(parents=True, exist_ok=True)
+      path = self.path(name, rules, num_decks, bucket)
+      fd, tmp = tempfile.mkstemp(dir=self._root, suffix=".tmp")
+      with os.fdopen(fd, "wb") as f:
+          np.save(f, table)
+      os.replace(tmp, path)
+      self.evict(keep=path)
+      try:
+          return np.load(path, mmap_mode="r")
+      except FileNotFoundError:   # evicted by another process in the meantime
+          return table
+
+  def get_or_build(self, name, rules, num_decks, bucket, builder:Callable[[Hashable, int, Hashable], np.ndarray]) -> np.ndarray:
+      table = self.get(name, rules, num_decks, bucket)
+      if table is None:
+          table = self.put(name, rules, num_decks, bucket, builder(rules, num_decks, bucket))
+      return table
+
+  def files(self):
+      return sorted(self._root.glob("*.npy"), key=lambda p: p.stat().st_mtime) if self._root.exists() else []
+
+  def size(self) -> int:
+      return sum(p.stat().st_size for p in self.files())
+
+  def evict(self, keep:Optional[Path] = None) -> None:
+      """Drop least recently used tables until the cache fits in `max_bytes`, never `keep` (the newest)."""
+      files = self.files()
+      total = sum(p.stat().st_size for p in files)
+      for p in files:
+          if total <= self._max_bytes:
+              break
+          if p == keep:
+              continue
+          total -= p.stat().st_size
+          p.unlink(missing_ok=True)
+
+  def invalidate(self, name:Optional[str] = None, stale_only:bool = False) -> None:
+      """Remove tables called `name` (all tables if None); with `stale_only`, only other code versions."""
+      for p in self.files():
+          table_name, version = p.stem.split("-")[:2]
+          if name is not None and table_name != name:
+              continue
+          if stale_only and version == f"v{self._version}":
+              continue
+          p.unlink(missing_ok=True)
+
+
+class DecisionCache:
+  """
+  Bounded in-memory table of decisions keyed by a strategy's state key.
+  The least recently used entry is dropped once `maxsize` is reached.
+  """
+  MISSING = object()   # what `get` returns for a key not in the table, by default
+
+  def __init__(self, maxsize:int = 4096):
+      self._maxsize = maxsize
+      self._table = OrderedDict()
+      self.hits = self.misses = 0
+
+  def get(self, key:Hashable, default = MISSING):
+      value = self._table.get(key, self.MISSING)
+      if value is self.MISSING:
+          self.misses += 1
+          return default
+      self.hits += 1
+      self._table.move_to_end(key)
+      return value
+
+  def put(self, key:Hashable, value) -> None:
+      self._table[key] = value
+      self._table.move_to_end(key)
+      if len(self._table) > self._maxsize:
+          self._table.popitem(last=False)
+
+  def stats(self) -> dict:
+      lookups = self.hits + self.misses
+      return {"hits": self.hits, "misses": self.misses, "size": len(self._table),
+              "hit_rate": self.hits / lookups if lookups else 0.0}
+
+  def clear(self) -> None:
+      self._table.clear()
+      self.hits = self.misses = 0
+
+  def __len__(self): return len(self._table)
+
+
+_default = None
+
+def default_cache() -> TableCache:
+  """The cache under `DEFAULT_ROOT`; strategies only use it when their `cache` is set to it."""
+  global _default
+  if _default is None:
+      _default = TableCache()
+  return _default
@@ -4,39 +4,72 @@ import random
 import matplotlib.pyplot as plt
 import numpy as np
 
-from typing import List
+from typing import List, Optional
 from collections import defaultdict
 from IPython.display import DisplayHandle, display
 from .playingcards import PlayingCard, DefaultCardComparer, BlackjackCardComparer
 from ._utils import CardInfo
+from .odds import HILO_TAGS
+from .shuffles import Shuffle, PerfectShuffle, CutCard, landing
 ALL_RANKS = list(CardInfo.NAMES.keys())
+# Blackjack value of each card id, aces as 1.
+CARD_VALUES = [min(card_id // len(CardInfo.SUITS) + 1, 10) for card_id in range(len(CardInfo.INFO))]
+
+
+def _read_only(array:np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
 
 
 class Hand():
     def __init__(self, cards = None):
         self._cards = cards or []
-
-    def _cmp(self, other, op):
+        self._ids = np.zeros(max(32, len(self._cards)), dtype=np.int16)
+        self._ids[:len(self._cards)] = [card.id for card in self._cards]
+        self._view = _read_only(self._ids)
+
+    @staticmethod
+    def _score_of(other) -> int:
+        if isinstance(other, Hand):
+            return other.score
         try:
-            o = other.score if isinstance(other, Hand) else int(other)
+            return int(other)
         except (TypeError, ValueError):
             raise TypeError("Objects are not comparable")
-        return op(self.score, o)
+
+    # Read-only views would unpickle as copies; they are rebuilt instead.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_view", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._view = _read_only(self._ids)
 
     def __len__(self): return len(self._cards)
     def __getitem__(self, position): return self._cards[position]
     def __iter__(self): return iter(self._cards)
     def __str__(self): return ", ".join([str(card) for card in self._cards])
 
-    def __eq__(self, other): return self._cmp(other, lambda a, b: a == b)
-    def __gt__(self, other): return self._cmp(other, lambda a, b: a >  b)
-    def __ge__(self, other): return self._cmp(other, lambda a, b: a >= b)
-    def __lt__(self, other): return self._cmp(other, lambda a, b: a <  b)
-    def __le__(self, other): return self._cmp(other, lambda a, b: a <= b)
+    def __eq__(self, other): return self.score == self._score_of(other)
+    def __gt__(self, other): return self.score >  self._score_of(other)
+    def __ge__(self, other): return self.score >= self._score_of(other)
+    def __lt__(self, other): return self.score <  self._score_of(other)
+    def __le__(self, other): return self.score <= self._score_of(other)
 
     def reveal_all(self): [card.reveal() for card in self._cards if not card.faceup]
     def hide_all(self): [card.hide() for card in self._cards if card.faceup]
-    def add(self, card:PlayingCard): self._cards.append(card)
+    def add(self, card:PlayingCard):
+        n = len(self._cards)
+        if n == len(self._ids):
+            self._ids = np.concatenate([self._ids, np.zeros(n, dtype=np.int16)])
+            self._view = _read_only(self._ids)
+        self._ids[n] = card.id
+        self._cards.append(card)
+
+    def pop(self) -> PlayingCard: return self._cards.pop()
     def copy(self): return Hand([card.copy() for card in self._cards])
     def reset(self): self._cards = []
     def clear(self): self._cards = []
@@ -69,16 +102,31 @@ class Hand():
             totals = {t + v for t in totals for v in card.values}
         return totals
 
-    def true_score(self):
-        totals = self.scoring_algorithm(False)
-        legal = [t for t in totals if t <= 21]
-        return max(legal) if legal else min(totals)
+    def _totals(self, ignore_hidden = True):
+        """(hard total, best total): aces count 1, then one of them 11 if that stays within 21."""
+        hard, aces = 0, False
+        for card in self._cards:
+            if ignore_hidden and not card.faceup:
+                continue
+            value = CARD_VALUES[card.id]
+            hard += value
+            aces = aces or value == 1
+        return hard, hard + 10 if aces and hard <= 11 else hard
+
+    def true_score(self): return self._totals(False)[1]
 
     @property
-    def score(self):
-        totals = self.scoring_algorithm()
-        legal = [t for t in totals if t <= 21]
-        return max(legal) if legal else min(totals)
+    def score(self): return self._totals()[1]
+
+    def is_soft(self):
+        """True when an ace is currently being counted as 11."""
+        hard, best = self._totals()
+        return best != hard
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Card ids (positions in `CardInfo.INFO`) of the hand, as a read-only view: nothing is copied."""
+        return self._view[:len(self._cards)]
 
     @property
     def cards(self): return self.view()
@@ -97,21 +145,32 @@ class Deck(Hand):
   A full 52-card deck (Standard Usage)  Shuffled once upon creation.
   You can draw cards one at a time.
   """
-  def __init__(self, build:bool = True, comparer = DefaultCardComparer):
+  def __init__(self, build:bool = True, comparer = DefaultCardComparer, seed = None):
       self._comparer = comparer
       self._info = CardInfo.get_info()
+      self._seed = seed
+      self._random = random.Random(seed)
       self._cards = self._create_deck() if build is True else []
 
+  # A deck keeps no id array: it pickles as a plain object.
+  def __getstate__(self): return self.__dict__.copy()
+  def __setstate__(self, state): self.__dict__.update(state)
+
   def deck(self):
       return self._cards
 
+  @property
+  def ids(self) -> np.ndarray:
+      """Card ids of the cards left, in `deck()` order."""
+      return np.array([card.id for card in self._cards], dtype=np.int16)
+
   def _create_deck(self):
       deck = []
       comparer = self._comparer
       for card_code, rank_name, suit_name, symbol_code in self._info:
           deck.append(PlayingCard(card_code, rank_name, suit_name, symbol_code, comparer = comparer))
 
-      random.shuffle(deck)
+      self._random.shuffle(deck)
       return deck
 
   def _extend(self, cards:List[PlayingCard]):
@@ -119,11 +178,11 @@ class Deck(Hand):
 
   def _merge(self, deck):
       self._cards += deck._cards
-      random.shuffle(self._cards)
+      self._random.shuffle(self._cards)
 
   def _append(self, num_decks = 1):
       self._cards += self._create_deck()
-      random.shuffle(self._cards)
+      self._random.shuffle(self._cards)
 
   def draw(self):
       if len(self._cards) == 0: self.reset()
@@ -132,32 +191,257 @@ class Deck(Hand):
   def reset(self): self._cards = self._create_deck()
       
 
+class DealtHistory:
+    """
+    Every card dealt, in order, across shoes: a ring buffer of the last
+    `capacity` cards holding the card's index in the shoe, the shoe it came
+    from and running Hi-Lo / high-card totals, so the content of any
+    stretch of the discard tray is a difference of two entries.
+
+    `append` and every per-position lookup are O(1).
+    """
+    SLUG = np.dtype([("start", "<i4"), ("stop", "<i4"), ("count", "<i4"), ("high", "<i4")])
+
+    def __init__(self, tags:np.ndarray, high:np.ndarray, capacity:int):
+        self._tags, self._high_cards = tags, high
+        self._card = np.zeros(capacity, dtype=np.int16)
+        self._shoe = np.zeros(capacity, dtype=np.int32)
+        self._count = np.zeros(capacity, dtype=np.int64)   # running Hi-Lo before each card
+        self._high = np.zeros(capacity, dtype=np.int64)    # running tens and aces before each card
+        self._totals = {"count": 0, "high": 0}
+        self._n = 0
+        self._starts = {}
+
+    def __len__(self): return min(self._n, len(self._card))
+
+    def append(self, card:int, shoe:int) -> None:
+        i = self._n % len(self._card)
+        if shoe not in self._starts:
+            first = max(self._starts, default=shoe - 1) + 1
+            self._starts.update({s: self._n for s in range(first, shoe + 1)})
+        self._card[i], self._shoe[i] = card, shoe
+        totals = self._totals
+        self._count[i], self._high[i] = totals["count"], totals["high"]
+        totals["count"] += int(self._tags[card])
+        totals["high"] += int(self._high_cards[card])
+        self._n += 1
+
+    def _range(self, shoe):
+        start, stop = self._starts.get(shoe), self._starts.get(shoe + 1, self._n)
+        oldest = self._n - len(self._card)
+        if start is None or stop <= oldest < self._n:
+            raise KeyError(f"shoe {shoe} is not in the history")
+        return max(start, oldest), stop
+
+    def _running(self, field, g):
+        return getattr(self, "_" + field)[g % len(self._card)] if g < self._n else self._totals[field]
+
+    def tray(self, shoe:int) -> np.ndarray:
+        """
+        Card indexes dealt from `shoe`, first dealt first: the discard tray
+        from the bottom up (only the part still in the buffer, for long shoes).
+        """
+        start, stop = self._range(shoe)
+        return self._card.take(np.arange(start, stop), mode="wrap")
+
+    def slugs(self, shoe:int, size:int = 26) -> np.ndarray:
+        """
+        The discard tray of `shoe` cut into slugs of `size` cards: tray
+        positions [start, stop), Hi-Lo count and number of tens and aces of each.
+        """
+        start, stop = self._range(shoe)
+        bounds = np.append(np.arange(start, stop, size), stop)
+        out = np.empty(len(bounds) - 1, dtype=self.SLUG)
+        out["start"], out["stop"] = bounds[:-1] - start, bounds[1:] - start
+        for field in ("count", "high"):
+            out[field] = np.diff([self._running(field, g) for g in bounds])
+        return out
+
+
 class Shoe(Deck):
-    def __init__(self, num_decks = 4):
-        super().__init__(build=False, comparer=BlackjackCardComparer)
+    """
+    `num_decks` decks dealt from a shoe.
+
+    `shuffle` (see `shuffles`) decides how the cards are mixed and
+    `cut_card` (a `shuffles.CutCard`) when they are: after the round in
+    which the cut card comes out, or, with no cut card, when the shoe runs
+    dry (then only the discards are reshuffled). A continuous shuffler puts
+    every round's cards straight back instead.
+
+    Every physical card is one `PlayingCard` for the life of the shoe;
+    shuffles work on arrays of their indexes. Before a shuffle the cards are
+    stacked as a dealer would: the discard tray in the order it was dealt,
+    with the undealt cards on top, and `history` remembers that order for
+    the last `history_shoes` shoes (see `DealtHistory`).
+
+    The counts only include cards seen: one drawn face down (the dealer's
+    hole card) is counted when `show()` is called, or at the end of the round.
+    """
+    def __init__(self, num_decks = 4, seed = None, shuffle:Optional[Shuffle] = None, cut_card:Optional[CutCard] = None,
+                 history_shoes:int = 4, comparer = BlackjackCardComparer):
+        super().__init__(build=False, comparer=comparer, seed=seed)
         self._num_decks = num_decks
-        self._stats = None
+        self._shuffle = shuffle if shuffle is not None else PerfectShuffle()
+        self._cut_card = cut_card
+        self._rng = np.random.default_rng(seed)
+        self._physical = [PlayingCard(*info, comparer=self._comparer) for _ in range(num_decks) for info in self._info]
+        self._history = self._new_history(history_shoes)
+        self._track()
+        self._undealt: List[int] = []   # physical index of each card in self._cards
+        self._round: List[int] = []     # dealt this round
+        self._hidden: List[int] = []    # dealt face down this round, not counted yet
+        self._discards: List[int] = []  # dealt in earlier rounds since the last shuffle
+        self._stats = Stats(self._cards, self._values_left)
+        self._shoes = -1
         self.reset()
 
+    def _new_history(self, shoes:int) -> DealtHistory:
+        values = np.array([BlackjackCardComparer.get_values(card)[0] for card in self._physical], dtype=int)
+        return DealtHistory(HILO_TAGS[values - 1], np.isin(values, (1, 10)), max(1, shoes * len(self._physical)))
+
+    def _track(self):
+        """Live counts behind the read-only views, updated in O(1) per card dealt."""
+        ids = np.array([card.id for card in self._physical], dtype=np.int16)
+        self._card_id, self._rank_of = ids, ids // len(CardInfo.SUITS)
+        self._value_of = np.array([BlackjackCardComparer.get_values(card)[0] - 1 for card in self._physical], dtype=np.int8)
+        self._ranks_left = np.zeros(len(ALL_RANKS), dtype=np.int32)
+        self._ranks_dealt = np.zeros(len(ALL_RANKS), dtype=np.int32)
+        self._values_left = np.zeros(10, dtype=np.int32)
+        self._dealt = np.zeros(len(self._physical), dtype=np.int16)
+        self._dealt_n = 0
+        self._make_views()
+
+    def _make_views(self):
+        self._views = {name: _read_only(getattr(self, name)) for name in ("_ranks_left", "_ranks_dealt", "_values_left", "_dealt")}
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state["_views"]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._make_views()
+
+    def _load(self, order:np.ndarray, returned):
+        for i in returned:
+            self._physical[i].hide()
+        self._undealt[:] = order.tolist()
+        self._cards[:] = [self._physical[i] for i in self._undealt]
+        self._ranks_left[:] = np.bincount(self._rank_of[order], minlength=len(ALL_RANKS))
+        self._values_left[:] = np.bincount(self._value_of[order], minlength=10)
+        self._ranks_dealt[:] = 0
+        self._dealt_n = 0
+        self._hidden = []   # not in the new order, so never counted against it
+
+    def _shuffled(self, order:np.ndarray, returned):
+        self._load(self._shuffle(order, self._rng), returned)
+        self._discards = []
+        self._shoes += 1
+        n = len(self._physical)
+        self._cut_at = self._cut_card.position(n, self._rng) if self._cut_card is not None else None
+
     def draw(self, flip = True):
-      card = super().draw()
-      if flip: return card.reveal()
-      return card
+      if not self._cards:
+          if not self._discards:
+              raise RuntimeError("The shoe ran out of cards in the middle of a round.")
+          self._shuffled(np.array(self._discards), self._discards)
+      card, i = self._cards.pop(), self._undealt.pop()
+      self._round.append(i)
+      self._history.append(i, self._shoes)
+      if flip:
+          self._count(i)
+          return card.reveal()
+      self._hidden.append(i)
+      return card.hide()
+
+    def _count(self, i:int):
+        rank = self._rank_of[i]
+        self._ranks_left[rank] -= 1
+        self._ranks_dealt[rank] += 1
+        self._values_left[self._value_of[i]] -= 1
+        self._dealt[self._dealt_n] = self._card_id[i]
+        self._dealt_n += 1
+
+    def show(self):
+        """Count the cards drawn face down this round: they have been turned over."""
+        for i in self._hidden:
+            self._count(i)
+        self._hidden = []
+
+    def end_round(self):
+        """Called by the game once a round's cards are cleared away."""
+        self.show()
+        returned, self._round = self._round, []
+        if self._shuffle.continuous:
+            self._load(self._shuffle.insert(np.array(self._undealt, dtype=int), np.array(returned, dtype=int), self._rng), returned)
+            return
+        self._discards += returned
+        if self._cut_at is not None and self.dealt >= self._cut_at:
+            self.reset()
 
     def reset(self):
-        super().reset()
-        self._append(self._num_decks)
-        self._stats = Stats(self._cards)
+        """Gather every card and shuffle a new shoe."""
+        pile = self._discards + self._round + self._undealt if self._shoes >= 0 else range(len(self._physical))
+        self._round = []
+        self._shuffled(np.array(pile, dtype=int), range(len(self._physical)))
 
     @property
     def stats(self): return self._stats
+    @property
+    def seed(self): return self._seed
+    @property
+    def shoes(self): return self._shoes
+    @property
+    def num_decks(self): return self._num_decks
+    @property
+    def dealt(self) -> int: return len(self._physical) - len(self._cards)
+    @property
+    def ids(self) -> np.ndarray: return self._card_id[self._undealt]
+    @property
+    def history(self) -> DealtHistory: return self._history
+
+    # Read-only views over the shoe's live state. They are never copied and
+    # stay current as cards are dealt, so a strategy can keep one around.
+    # A card drawn face down stays "left" until it is shown.
+    @property
+    def rank_counts(self) -> np.ndarray:
+        """Cards left by rank, in `ALL_RANKS` order (A, 2, ..., K)."""
+        return self._views["_ranks_left"]
+    @property
+    def dealt_rank_counts(self) -> np.ndarray:
+        """Cards dealt since the last shuffle by rank."""
+        return self._views["_ranks_dealt"]
+    @property
+    def value_counts(self) -> np.ndarray:
+        """Cards left by blackjack value (index 0 = ace, 9 = tens)."""
+        return self._views["_values_left"]
+    @property
+    def dealt_ids(self) -> np.ndarray:
+        """Card ids dealt since the last shuffle, in order."""
+        return self._views["_dealt"][:self._dealt_n]
+
+    def landing(self, samples:int = 200, seed = None) -> np.ndarray:
+        """
+        Where the shuffle model sends each position of the pre-shuffle pile
+        (0 = bottom of the discard tray): (samples, cards) of deal positions,
+        0 = dealt first. Uses its own random numbers, not the shoe's.
+        """
+        return landing(self._shuffle, len(self._physical), samples, np.random.default_rng(seed))
 
 
 
 class Stats:
-    def __init__(self, all_cards):
+    def __init__(self, all_cards, values:Optional[np.ndarray] = None):
         self._all_cards = all_cards
-        self.display_handle = display(DisplayHandle(), display_id=True) # display_id=True automatically generates a unique id
+        self._values = values   # live counts by value kept by a Shoe, if any
+        self._display_handle = None   # created on first use, so headless games print nothing
+
+    @property
+    def display_handle(self) -> DisplayHandle:
+        if self._display_handle is None:
+            self._display_handle = display(DisplayHandle(), display_id=True) # display_id=True automatically generates a unique id
+        return self._display_handle
 
     def outcome_odds(self, hand: Hand):
         """Return bust/safe/blackjack odds if the player hits."""
@@ -194,6 +478,12 @@ class Stats:
         legal = [t for t in totals if t <= 21]
         return max(legal) if legal else min(totals)
 
+    def composition(self) -> np.ndarray:
+        """Remaining cards as counts by blackjack value (index 0 = ace, 9 = tens)."""
+        if self._values is not None:
+            return self._values.copy()
+        return np.bincount([card.values[0] - 1 for card in self._all_cards], minlength=10)
+
     def counter_df(self, mode = ""):
         rank_counts = self.counter(mode)
         return pd.Series(rank_counts, dtype=int).reindex(ALL_RANKS, fill_value=0).to_frame().T
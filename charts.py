@@ -0,0 +1,233 @@
+"""
+Playing decisions as data: basic-strategy charts and count-index deviations
+compiled into lookup arrays.
+
+A chart is a CSV with one row per hand and one column per dealer up card:
+
+    hand,2,3,4,5,6,7,8,9,10,A
+    H16,S,S,S,S,S,H,H,R,R,R
+    S18,S,Ds,Ds,Ds,Ds,S,S,H,H,H
+    P8,P,P,P,P,P,P,P,P,P,P
+
+Hands are H<total> (hard), S<total> (soft, an ace counted as 11) and
+P<card> (a pair: P2 ... P10, PA). Entries are
+
+    H   hit                      S   stand
+    D   double, otherwise hit    Ds  double, otherwise stand
+    R   surrender, otherwise hit Rs  surrender, otherwise stand
+    P   split                    Ph  split if doubling after a split is allowed
+    -   (pair rows) don't split: play the hard or soft total instead
+
+Hard and soft totals without a row hit below 17 (soft 18) and stand above.
+
+Deviations are CSV rows `hand,up,index,action[,when]`: play `action` instead
+when the true count is at least `index` (when ">=", the default) or below it
+(when "<"). The hand "I" takes insurance from `index` up. A JSON file holds
+everything in one document:
+
+    {"chart": {"H16": ["S", "S", "S", "S", "S", "H", "H", "R", "R", "R"], ...},
+     "deviations": [{"hand": "H16", "up": "10", "index": 0, "action": "Rs"}],
+     "bets": {"-10": 25, "1": 100, "2": 200, "4": 400}}
+
+`bets` maps a true count to the bet from that count up.
+
+Everything is compiled into arrays indexed by (soft, total, up card, count
+bucket), so a decision is one lookup. The charts that ship with the package
+are in content/charts and can be loaded by name, e.g. `load_chart("basic")`.
+"""
+import csv
+import json
+import re
+import numpy as np
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Mapping, Optional, Sequence, Tuple, Union
+
+from .rules import HIT, STAND, DOUBLE, SURRENDER
+
+CHARTS = Path(__file__).parent.resolve() / "content" / "charts"
+
+LO, HI = -10, 10   # count buckets, as `odds.count_bucket`
+UP_CARDS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")
+
+# Chart entries for hard and soft totals: (action, fallback when it isn't allowed).
+PLAYS = {"H": (HIT, HIT), "S": (STAND, STAND), "D": (DOUBLE, HIT), "Ds": (DOUBLE, STAND),
+         "R": (SURRENDER, HIT), "Rs": (SURRENDER, STAND)}
+PLAY_CODES = {entry: code for code, entry in enumerate(PLAYS)}
+CODE_PLAYS = tuple(PLAYS.values())
+
+# Chart entries for pairs.
+NO_SPLIT, SPLIT, SPLIT_DAS = range(3)
+SPLITS = {"-": NO_SPLIT, "": NO_SPLIT, "N": NO_SPLIT, "P": SPLIT, "Ph": SPLIT_DAS}
+
+_HAND = re.compile(r"^([HSP])(\d+|A)$")
+Pathish = Union[str, Path]
+
+
+def _card(label) -> int:
+  """Blackjack value of a card label: "2" ... "10", "A" (1)."""
+  label = str(label).strip().upper()
+  value = 1 if label in ("A", "1", "11") else 10 if label in ("T", "J", "Q", "K") else int(label)
+  if not 1 <= value <= 10:
+      raise ValueError(f"Not a card: {label!r}")
+  return value
+
+
+def _hand(label:str) -> Tuple[str, int]:
+  """("H" | "S" | "P", total or pair card) from a hand label such as "H16", "S18" or "PA"."""
+  found = _HAND.match(label.strip().upper())
+  if found is None:
+      raise ValueError(f"Not a hand: {label!r} (expected H<total>, S<total> or P<card>)")
+  kind, rest = found.groups()
+  value = _card(rest) if kind == "P" else int(rest)
+  if kind != "P" and not 4 <= value <= 21:
+      raise ValueError(f"Total out of range: {label!r}")
+  return kind, value
+
+
+def _buckets(index, when:str = ">=") -> slice:
+  """Count buckets at or above `index` (">="), or below it ("<")."""
+  index = int(np.clip(round(float(index)), LO, HI + 1)) - LO
+  if when == ">=":
+      return slice(index, None)
+  if when == "<":
+      return slice(None, index)
+  raise ValueError(f"Deviation condition {when!r}: expected '>=' or '<'")
+
+
+def bet_ramp(ramp:Mapping) -> np.ndarray:
+  """Bets per count bucket: `ramp[count]` from each listed true count up; below the lowest, its bet."""
+  counts = sorted((int(count), float(bet)) for count, bet in ramp.items())
+  bets = np.full(HI - LO + 1, counts[0][1])
+  for count, bet in counts:
+      bets[_buckets(count)] = bet
+  return bets
+
+
+class DecisionChart:
+  """
+  A compiled strategy chart.
+
+  - plays[soft, total, up, bucket]: code into `CODE_PLAYS`
+  - splits[card, up, bucket]: NO_SPLIT, SPLIT or SPLIT_DAS
+  - insurance[bucket]: take insurance
+  - bets[bucket]: amount to bet, or None for a flat bet
+
+  Up cards are indexed by value (1 = ace), buckets from `LO`.
+  """
+  def __init__(self, chart:Mapping[str, Union[Sequence[str], Mapping[str, str]]], deviations:Iterable[Mapping] = (),
+               bets:Optional[Mapping] = None, name:str = ""):
+      self.name = name
+      buckets = HI - LO + 1
+      totals = np.arange(22)[None, :, None, None]
+      soft = np.arange(2)[:, None, None, None]
+      self.plays = np.where(totals < 17 + soft, PLAY_CODES["H"], PLAY_CODES["S"]).astype(np.uint8)
+      self.plays = np.broadcast_to(self.plays, (2, 22, 11, buckets)).copy()
+      self.splits = np.full((11, 11, buckets), NO_SPLIT, dtype=np.uint8)
+      self.insurance = np.zeros(buckets, dtype=bool)
+      self.bets = None
+
+      for label, row in chart.items():
+          if not isinstance(row, Mapping):
+              if len(row) != len(UP_CARDS):
+                  raise ValueError(f"{label}: {len(row)} entries, one per up card {', '.join(UP_CARDS)} expected")
+              row = dict(zip(UP_CARDS, row))
+          for up, entry in row.items():
+              self._set(label, up, entry, slice(None))
+      for deviation in deviations:
+          self.deviate(**deviation)
+      if bets:
+          self.set_bets(bets)
+
+  def _set(self, label:str, up, entry:str, buckets) -> None:
+      kind, value = _hand(label)
+      entry = (entry or "").strip()
+      if kind == "P":
+          if entry not in SPLITS:
+              raise ValueError(f"{label} vs {up}: {entry!r} is not a pair entry ({', '.join(repr(s) for s in SPLITS)})")
+          self.splits[value, _card(up), buckets] = SPLITS[entry]
+      else:
+          if entry not in PLAYS:
+              raise ValueError(f"{label} vs {up}: {entry!r} is not a chart entry ({', '.join(PLAYS)})")
+          self.plays[int(kind == "S"), value, _card(up), buckets] = PLAY_CODES[entry]
+
+  def deviate(self, hand:str, index, action:str = "", up = None, when:str = ">=") -> None:
+      """Play `action` with `hand` against `up` at true counts `when` `index` (">=" or "<"); hand "I" is insurance."""
+      buckets = _buckets(index, when or ">=")
+      if hand.strip().upper() in ("I", "INSURANCE"):
+          self.insurance[buckets] = True
+      else:
+          self._set(hand, up, action, buckets)
+
+  def set_bets(self, ramp:Mapping) -> None:
+      self.bets = bet_ramp(ramp)
+
+  def play(self, soft:bool, total:int, up:int, bucket:int) -> Tuple[str, str]:
+      """(action, fallback) for a hard or soft `total` against up card value `up`."""
+      return CODE_PLAYS[self.plays[int(soft), total, up, bucket - LO]]
+
+  def split(self, card:int, up:int, bucket:int, das:bool = True) -> bool:
+      """Split a pair of `card`s (by value) against `up`? `das`: doubling after a split is allowed."""
+      split = self.splits[card, up, bucket - LO]
+      return split == SPLIT or (das and split == SPLIT_DAS)
+
+  def bet(self, bucket:int) -> Optional[float]:
+      return None if self.bets is None else float(self.bets[bucket - LO])
+
+  def __repr__(self): return f"DecisionChart({self.name!r})"
+
+  @classmethod
+  def from_csv(cls, path:Pathish, deviations:Optional[Pathish] = None, bets:Optional[Mapping] = None) -> "DecisionChart":
+      path = Path(path)
+      with open(path, newline="") as f:
+          rows = list(csv.DictReader(f, skipinitialspace=True))
+      chart = {row.pop("hand"): row for row in rows if row.get("hand") and not row["hand"].startswith("#")}
+      if deviations is None:
+          return cls(chart, (), bets, name = path.stem)
+      return cls(chart, read_deviations(deviations), bets, name = f"{path.stem}+{_resolve(deviations).stem}")
+
+  @classmethod
+  def from_json(cls, path:Pathish) -> "DecisionChart":
+      path = Path(path)
+      spec = json.loads(path.read_text())
+      return cls(spec["chart"], spec.get("deviations", ()), spec.get("bets"), name = spec.get("name", path.stem))
+
+
+def read_deviations(path:Pathish) -> list:
+  """Deviation rows (hand, up, index, action, when) from a CSV, or a JSON list."""
+  path = _resolve(path)
+  if path.suffix == ".json":
+      return json.loads(path.read_text())
+  with open(path, newline="") as f:
+      return [{k: v for k, v in row.items() if k in ("hand", "up", "index", "action", "when")}
+              for row in csv.DictReader(f, skipinitialspace=True) if row.get("hand") and not row["hand"].startswith("#")]
+
+
+def _resolve(path:Pathish) -> Path:
+  """A path, or the name of a chart in content/charts ("basic", "illustrious18")."""
+  path = Path(path)
+  if not path.suffix and not path.exists():
+      for suffix in (".csv", ".json"):
+          if (CHARTS / path).with_suffix(suffix).exists():
+              return (CHARTS / path).with_suffix(suffix)
+  return path
+
+
+@lru_cache(maxsize=None)
+def _load(path:Path, deviations:Optional[Path]) -> DecisionChart:
+  if path.suffix == ".json":
+      chart = DecisionChart.from_json(path)
+      for deviation in (read_deviations(deviations) if deviations is not None else ()):
+          chart.deviate(**deviation)
+      return chart
+  return DecisionChart.from_csv(path, deviations)
+
+
+def load_chart(path:Pathish = "basic", deviations:Optional[Pathish] = None) -> DecisionChart:
+  """
+  A chart from CSV or JSON (by suffix), with deviations from a second file.
+  Either may be the name of a chart in content/charts. Charts are compiled
+  once per path and shared: don't modify one returned from here.
+  """
+  return _load(_resolve(path).resolve(), None if deviations is None else _resolve(deviations).resolve())
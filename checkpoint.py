@@ -0,0 +1,130 @@
+"""
+Checkpoints of long simulations, and resuming from them.
+
+A checkpoint is the whole game pickled between rounds: shoe order and
+arrays, every RNG, players' chips and strategies, plus whatever aggregates
+the caller passes along. Resuming unpickles it and play continues exactly as
+if it had never stopped.
+
+Round results are not re-pickled every time: each checkpoint appends the
+results added since the previous one to a journal, and the state records how
+far into the journal it reaches. Everything is pickled in the calling thread
+(so the snapshot is consistent); the writes happen on a background thread,
+the state file atomically, so a crash mid-write leaves the last good
+checkpoint in place.
+"""
+import os
+import pickle
+import tempfile
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+STATE = "state.pkl"
+JOURNAL = "results.pkl"
+
+
+def _fsync_write(path:Path, data:bytes) -> None:
+  """Write `data` to `path` atomically: to a temporary file first, then renamed over it."""
+  fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+  try:
+      with os.fdopen(fd, "wb") as f:
+          f.write(data)
+          f.flush()
+          os.fsync(f.fileno())
+      os.replace(tmp, path)
+  except BaseException:
+      os.unlink(tmp)
+      raise
+
+
+class Checkpointer:
+  """
+  Saves a game to `directory` every `every` rounds.
+
+  Call `step()` after every round; it only does work on checkpoint rounds.
+  `extra` is anything picklable to save alongside, e.g. running statistics.
+  A game's round log is not saved (it is a file of its own); pass it again
+  to `load()`. Class-level decision caches (`CachedDecisions`) are not part
+  of the game either, so strategies using them resume with a cold cache.
+
+  Example usage:
+  -------------------
+  checkpoints = Checkpointer("runs/sweep-1", every = 100_000)
+  game, stats = checkpoints.load() if checkpoints.exists() else (make_game(), {})
+  while game._game < 10**8:
+      game.play_round()
+      checkpoints.step(game, stats)
+  checkpoints.close()
+  -------------------
+  """
+  def __init__(self, directory, every:int = 100_000):
+      self._dir = Path(directory)
+      self._dir.mkdir(parents=True, exist_ok=True)
+      self._every = every
+      self._results = 0   # round results already in the journal
+      self._journal = 0   # bytes of journal the last checkpoint covers
+      self._pool = ThreadPoolExecutor(1, thread_name_prefix="checkpoint")
+      self._pending: Optional[Future] = None
+
+  def exists(self) -> bool: return (self._dir / STATE).exists()
+
+  def step(self, game, extra:Any = None) -> Optional[Future]:
+      if game._game % self._every == 0:
+          return self.save(game, extra)
+      return None
+
+  def save(self, game, extra:Any = None) -> Future:
+      """Snapshot `game` now and write it in the background."""
+      results = game._round_results
+      kept = {name: getattr(game, name) for name in ("_round_results", "_log") if hasattr(game, name)}
+      for name in kept:
+          setattr(game, name, [] if name == "_round_results" else None)
+      try:
+          new = pickle.dumps(results[self._results:], pickle.HIGHEST_PROTOCOL)
+          journal = self._journal + len(new)
+          state = pickle.dumps({"game": game, "extra": extra, "results": len(results), "journal": journal},
+                               pickle.HIGHEST_PROTOCOL)
+      finally:
+          for name, value in kept.items():
+              setattr(game, name, value)
+      start, self._results, self._journal = self._journal, len(results), journal
+
+      if self._pending is not None:
+          self._pending.result()   # one write in flight at a time; raises if the last one failed
+      self._pending = self._pool.submit(self._write, new, state, start)
+      return self._pending
+
+  def _write(self, new:bytes, state:bytes, start:int) -> None:
+      with open(self._dir / JOURNAL, "ab" if start else "wb") as f:   # a fresh run starts a fresh journal
+          f.write(new)
+          f.flush()
+          os.fsync(f.fileno())
+      _fsync_write(self._dir / STATE, state)
+
+  def load(self, log = None) -> Tuple[Any, Any]:
+      """(game, extra) of the last checkpoint; later saves continue its journal."""
+      with open(self._dir / STATE, "rb") as f:
+          state = pickle.load(f)
+      journal = self._dir / JOURNAL
+      with open(journal, "r+b") as f:
+          f.truncate(state["journal"])   # drop anything written after the checkpoint
+          results = []
+          while f.tell() < state["journal"]:
+              results += pickle.load(f)
+
+      game = state["game"]
+      game._round_results = results[:state["results"]]
+      if log is not None:
+          game._log = log
+      self._results, self._journal = state["results"], state["journal"]
+      return game, state["extra"]
+
+  def close(self) -> None:
+      if self._pending is not None:
+          self._pending.result()
+      self._pool.shutdown()
+
+  def __enter__(self): return self
+  def __exit__(self, *exc): self.close()
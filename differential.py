@@ -0,0 +1,530 @@
+"""
+Differential checks of the fast engines against the reference behaviour.
+
+A `Scenario` is a random table: shoe order (seed, decks, shuffle), seats
+and their strategies and bankrolls, house rules, and whether the dealer
+takes the opening cards before the seats or after them. `ReferenceTable`, a
+plain engine written from the house procedure and sharing nothing with
+`Blackjack` but the shoe, the strategies and the round log format, plays
+it first; every engine in `ENGINES` must agree with it on everything the
+round log records (every card dealt, every action, every seat's net) as
+well as on outcomes and final chips. The rounds are also audited against
+the reference code paths:
+
+- every settled hand's score against `Hand.scoring_algorithm`
+- the dealer's draws against the dealer rule, scored the same way
+- every seat's net against `Replayer.audit`, which settles by plain comparisons
+- every round of the `Table` engine's log played again by `Replayer.reexecute`
+
+and the vectorized rollout dealer (`rollout.dealer_totals`) is played
+against the reference dealer on card sequences drawn from the same shoe.
+
+With Hypothesis installed, `scenarios()` generates scenarios and `check()`
+runs them as a property test, shrinking any failure to a small table;
+without it `check()` draws scenarios from a seeded generator. The same
+check runs under pytest (tests/test_differential.py).
+
+    python -m package.differential --examples 200
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+
+from collections import defaultdict
+from fractions import Fraction
+from functools import partial
+from time import perf_counter
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from . import shuffles
+from ._utils import CardInfo
+from .cards import Hand, Shoe
+from .events import Observer, RoundSettled
+from .game import Blackjack, DEALER_SEAT, Table
+from .odds import ONE_DECK
+from .participants import BlackjackPlayer, Dealer
+from .playingcards import PlayingCard, BlackjackCardComparer
+from .replay import RoundLog, RoundReader, Replayer
+from .rollout import sample_sequences, dealer_totals
+from .rules import Rules, HIT, STAND, DOUBLE, SPLIT, SURRENDER, INSURANCE
+from .strategy import HiLoStrategy, TableStrategy, StrategyGroup
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    st = None
+
+STRATEGIES = {
+    "hilo": HiLoStrategy,
+    "basic": TableStrategy,
+    "i18": partial(TableStrategy, deviations = "illustrious18", bets = {-10: 10, 1: 10, 2: 20, 4: 40}),
+}
+SHUFFLES = (None, "CASINO", "RiffleShuffle", "StripShuffle")
+RULES = {
+    "hit_soft_17": (False, True),
+    "blackjack_pays": ((3, 2), (6, 5)),
+    "double_after_split": (True, False),
+    "max_hands": (2, 3, 4),
+    "resplit_aces": (False, True),
+    "hit_split_aces": (False, True),
+    "surrender": (True, False),
+    "insurance": (True, False),
+    "peek": (True, False),
+}
+BANKROLLS = (10**9, 60, 150, 400)   # small ones run out mid-scenario: partial bets, no chips to double or split
+
+
+class Scenario(NamedTuple):
+  seed: int
+  decks: int
+  strategies: Tuple[str, ...]   # names from `STRATEGIES`, one per seat
+  rules: Tuple[Tuple[str, object], ...] = ()   # `Rules` keywords
+  shuffle: Optional[str] = None
+  rounds: int = 100
+  chips: float = 10**9   # every seat's bankroll
+  dealer_last: bool = False   # the opening cards go to the seats first (`Table`'s default)
+
+  def make_rules(self) -> Rules: return Rules(**dict(self.rules))
+
+  def make_shoe(self) -> Shoe:
+      found = getattr(shuffles, self.shuffle) if self.shuffle else None
+      return Shoe(self.decks, seed = self.seed, shuffle = found() if isinstance(found, type) else found)
+
+  def make_players(self) -> List[BlackjackPlayer]:
+      return [BlackjackPlayer(f"Seat {i}", chips = self.chips, strategy = STRATEGIES[name]) for i, name in enumerate(self.strategies)]
+
+
+class Trace(NamedTuple):
+  """What one engine did with a scenario."""
+  engine: str
+  log: str   # round log path
+  outcomes: List[Tuple[int, str, str]]   # (game, player, outcome)
+  chips: List[float]
+  seconds: float
+  problems: List[str]   # reference checks that failed while playing
+
+
+def reference_total(hand:Hand) -> int:
+  """Best total by `Hand.scoring_algorithm`: the highest not over 21, else the lowest."""
+  totals = hand.scoring_algorithm(False)
+  return max((t for t in totals if t <= 21), default = min(totals))
+
+
+def reference_dealer_hits(hand:Hand, rules:Rules) -> bool:
+  """The dealer rule scored by `Hand.scoring_algorithm`: below 17, or soft 17 under H17."""
+  total = reference_total(hand)
+  soft = total - 10 in hand.scoring_algorithm(False)
+  return total < 17 or (total == 17 and soft and rules.hit_soft_17)
+
+
+class ReferenceCheck(Observer):
+  """Scores every hand as it is settled, both ways, and checks where the dealer stopped."""
+  def __init__(self, rules:Rules):
+      self.rules = rules
+      self.problems: List[str] = []
+
+  def on_round_settled(self, event:RoundSettled):
+      hand = event.player.hand
+      if isinstance(event.player, Dealer):
+          cards = list(hand.hand)
+          for n in range(2, len(cards)):
+              if not reference_dealer_hits(Hand(cards[:n]), self.rules):
+                  self.problems.append(f"game {event.game}: dealer drew on {reference_total(Hand(cards[:n]))}")
+          if len(cards) > 2 and reference_total(hand) <= 21 and reference_dealer_hits(hand, self.rules):
+              self.problems.append(f"game {event.game}: dealer stood on {reference_total(hand)}")
+      elif hand.true_score() != reference_total(hand):
+          self.problems.append(f"game {event.game}: {event.player.name} scored {hand.true_score()}, reference {reference_total(hand)}")
+
+
+class SeatBySeat(StrategyGroup):
+  """Each seat decides on its own through `decide()`, from the same point in the round as a batch would."""
+  def decide(self, players, deck:Shoe, up_card = None) -> list:
+      return [player.strategy.decide(deck) for player in players]
+
+
+def reference_legal(rules:Rules, hand:Hand, split:bool, aces:bool, hands:int, chips, bet) -> FrozenSet[str]:
+  """The actions allowed, read off the house rules one by one (not `Rules`' precomputed table)."""
+  first_two = len(hand) == 2
+  pair = first_two and hand[0].values[0] == hand[1].values[0]
+  can_split = pair and hands < rules.max_hands and (not aces or rules.resplit_aces)
+  if aces and not rules.hit_split_aces:
+      legal = {STAND, SPLIT} if can_split else {STAND}
+  else:
+      legal = {HIT, STAND}
+      if first_two and (not split or rules.double_after_split) and (rules.double_on is None or reference_total(hand) in rules.double_on):
+          legal.add(DOUBLE)
+      if can_split:
+          legal.add(SPLIT)
+      if first_two and rules.surrender and not split:
+          legal.add(SURRENDER)
+  if chips < bet:
+      legal -= {DOUBLE, SPLIT}
+  return frozenset(legal)
+
+
+def reference_action(decision, legal:FrozenSet[str]) -> str:
+  """A strategy's answer as a legal action: what isn't allowed becomes a hit, then a stand."""
+  action = decision if isinstance(decision, str) else HIT if decision else STAND
+  if action not in legal and action in (DOUBLE, SPLIT, SURRENDER):
+      action = HIT
+  return action if action in legal else STAND
+
+
+def reference_outcome(total:int, natural:bool, dealer:int, dealer_natural:bool) -> str:
+  """A hand's outcome by plain comparisons ("loser": a loss to a dealer 21, see `rules.OUTCOMES`)."""
+  if total > 21:
+      return "lose"
+  if natural:
+      return "push" if dealer_natural else "blackjack"
+  if dealer_natural:
+      return "loser"
+  if dealer > 21:
+      return "win"
+  if dealer == 21:
+      return "push" if total == 21 else "loser"
+  return "win" if total > dealer else "lose" if total < dealer else "push"
+
+
+def reference_payout(rules:Rules, outcome:str, bet):
+  """Chips returned for `outcome` on `bet`, stake included."""
+  won = {"blackjack": bet + Fraction(*rules.blackjack_pays) * bet, "win": 2 * bet, "push": bet,
+         "surrender": Fraction(bet) / 2}.get(outcome, 0)
+  return int(won) if won == int(won) else float(won)
+
+
+class _Hand:
+  """A hand the reference engine is playing: the player object the strategy reads, and where it sits."""
+  __slots__ = ("player", "seat", "index", "split", "aces", "stood", "settled")
+
+  def __init__(self, player:BlackjackPlayer, seat:int, index:int = 0, split:bool = False, aces:bool = False):
+      self.player, self.seat, self.index, self.split, self.aces = player, seat, index, split, aces
+      self.stood = self.settled = False
+
+  @property
+  def total(self) -> int: return reference_total(self.player.hand)
+  @property
+  def natural(self) -> bool: return not self.split and len(self.player.hand) == 2 and self.total == 21
+  @property
+  def done(self) -> bool: return self.stood or self.settled or self.total >= 21
+
+
+class ReferenceTable:
+  """
+  A deliberately plain Blackjack engine to check the others against: the
+  house procedure written out step by step, with no phases, events, legal-
+  action or settlement tables. It shares only the shoe, the strategies
+  (which read their player objects) and the round log format with
+  `Blackjack`, and deals as it does: the dealer first or last as the
+  scenario says, one decision per hand per pass, every decision of a pass
+  taken before any is carried out.
+  """
+  def __init__(self, scenario:Scenario, log:RoundLog):
+      self.rules = scenario.make_rules()
+      self.shoe = scenario.make_shoe()
+      self.players = scenario.make_players()
+      self.seated = list(self.players)
+      self.dealer = Dealer(self.rules)
+      self.log = log
+      self.dealer_last = scenario.dealer_last
+      self.outcomes: List[Tuple[int, str, str]] = []
+      self.game = 0
+      for player in self.players:
+          player.show = False
+          player.strategy.watch(self.dealer)
+
+  def _deal(self, hand:_Hand, flip:bool = True):
+      card = self.shoe.draw(flip)
+      hand.player.hand.add(card)
+      self.log.card(hand.seat, hand.index, card.id)
+      if hand.total > 21:
+          hand.settled = True
+
+  def _deal_dealer(self, flip:bool):
+      card = self.shoe.draw(flip)
+      self.dealer.hand.add(card)
+      self.log.card(DEALER_SEAT, 0, card.id)
+
+  def _pay(self, hand:_Hand, outcome:str):
+      won = reference_payout(self.rules, outcome, hand.player.current_bet)
+      hand.player.chips += won
+      self.pot -= won
+      hand.settled = True
+      self.outcomes.append((self.game, hand.player.name, outcome))
+
+  def _act(self, hand:_Hand, action:str, hands:List[_Hand]):
+      player = hand.player
+      if action == STAND:
+          hand.stood = True
+      elif action == HIT:
+          self._deal(hand)
+      elif action == DOUBLE:
+          self.pot += player.double()
+          self._deal(hand)
+          hand.stood = True
+      elif action == SURRENDER:
+          self._pay(hand, "surrender")
+      elif action == SPLIT:
+          aces = player.hand[0].rank == "A"
+          new = _Hand(player.split(), hand.seat, len(hands), True, aces)
+          hand.split, hand.aces = True, aces
+          hands.append(new)
+          self.pot += new.player.current_bet
+          self._deal(hand)
+          self._deal(new)
+      if hand.total == 21:
+          hand.stood = True
+
+  def play_round(self):
+      self.game += 1
+      rules, shoe, log, dealer = self.rules, self.shoe, self.log, self.dealer
+      log.begin(self.game, shoe.seed or 0, shoe.shoes, [p.chips for p in self.players], self.dealer_last)
+      self.pot = 0
+      seat = {p: self.players.index(p) for p in self.seated}
+      for player in self.seated:
+          bet = player.strategy.autobet(shoe)
+          self.pot += bet
+          log.bet(seat[player], bet)
+
+      hands = {player: [_Hand(player, seat[player])] for player in self.seated}
+      for flip in (True, False):
+          if not self.dealer_last:
+              self._deal_dealer(flip)
+          for player in self.seated:
+              self._deal(hands[player][0])
+          if self.dealer_last:
+              self._deal_dealer(flip)
+      up, hole = dealer.hand[0], dealer.hand[1]
+
+      if rules.insurance and rules.peek and up.rank == "A":
+          for player in self.seated:
+              if player.chips >= player.current_bet / 2 and player.strategy.insure(shoe):
+                  self.pot += player.insure()
+                  log.action(seat[player], 0, INSURANCE)
+      naturals = [hands[player][0] for player in self.seated if hands[player][0].natural]
+      if rules.peek and up.values[0] in (1, 10) and reference_total(dealer.hand) == 21:
+          hole.reveal()
+          shoe.show()
+          for player in self.seated:
+              if player.insurance:
+                  player.chips += 3 * player.insurance
+                  self.pot -= 3 * player.insurance
+          for player in self.seated:
+              self._pay(hands[player][0], reference_outcome(hands[player][0].total, hands[player][0].natural, 21, True))
+          return self._end_round()
+      for hand in naturals:
+          if rules.peek:
+              self._pay(hand, "blackjack")
+          else:
+              hand.stood = True
+
+      while True:
+          active = [hand for player in self.seated for hand in hands[player] if not hand.done]
+          if not active:
+              break
+          decisions = [hand.player.strategy.decide(shoe) for hand in active]
+          for hand, decision in zip(active, decisions):
+              player = hand.player
+              legal = reference_legal(rules, player.hand, hand.split, hand.aces, len(hands[player.owner]),
+                                      player.chips, player.current_bet)
+              action = reference_action(decision, legal)
+              log.action(hand.seat, hand.index, action)
+              self._act(hand, action, hands[player.owner])
+
+      hole.reveal()
+      shoe.show()
+      pending = [hand for player in self.seated for hand in hands[player] if not hand.settled]
+      if pending:
+          while reference_dealer_hits(dealer.hand, rules):
+              card = shoe.draw()
+              dealer.hand.add(card)
+              log.card(DEALER_SEAT, 0, card.id)
+      total, natural = reference_total(dealer.hand), len(dealer.hand) == 2 and reference_total(dealer.hand) == 21
+      for hand in pending:
+          self._pay(hand, reference_outcome(hand.total, hand.natural, total, natural))
+      return self._end_round()
+
+  def _end_round(self):
+      self.outcomes.append((self.game, self.dealer.name, "loser" if self.pot < 0 else "win" if self.pot > 0 else "push"))
+      self.log.end([p.chips for p in self.players])
+      for player in self.seated:
+          player.reset()
+      self.dealer.reset()
+      self.shoe.end_round()
+      self.seated = [p for p in self.seated if p.chips > 0]
+
+
+def play_reference(scenario:Scenario, log:str, engine:str = "reference") -> Trace:
+  """Play `scenario` through `ReferenceTable`."""
+  with RoundLog(log) as round_log:
+      table = ReferenceTable(scenario, round_log)
+      start = perf_counter()
+      for _ in range(scenario.rounds):
+          if not table.seated:
+              break
+          table.play_round()
+      seconds = perf_counter() - start
+  return Trace(engine, log, table.outcomes, [p.chips for p in table.players], seconds, [])
+
+
+def play(scenario:Scenario, log:str, engine:str = "batched", group:Optional[StrategyGroup] = None, table:bool = False) -> Trace:
+  """
+  Play `scenario` through `Blackjack`, or a `Table` with a seat per player,
+  dealing the dealer first or last as the scenario says, with `group`
+  making the decisions (default: batched per strategy class).
+  """
+  rules = scenario.make_rules()
+  players = scenario.make_players()
+  check = ReferenceCheck(rules)
+  with RoundLog(log) as round_log:
+      game = (Table if table else Blackjack)(players, rules, shoe = scenario.make_shoe(), verbose = False, log = round_log,
+                                             dealer_last = scenario.dealer_last)
+      if group is not None:
+          game._group = group
+      check.attach(game.events)
+      start = perf_counter()
+      for _ in range(scenario.rounds):
+          if not game._active_players:
+              break
+          game.play_round()
+      seconds = perf_counter() - start
+  outcomes = [(r["game"], r["player"], r["outcome"]) for r in game._round_results]
+  return Trace(engine, log, outcomes, [p.chips for p in players], seconds, check.problems)
+
+
+# name -> (scenario, log path) -> Trace. The first engine is the reference the others are compared to.
+ENGINES: Dict[str, Callable[[Scenario, str], Trace]] = {
+    "reference": play_reference,
+    "object": partial(play, engine = "object", group = SeatBySeat()),
+    "batched": partial(play, engine = "batched"),
+    "table": partial(play, engine = "table", table = True),
+}
+
+
+def _compare_logs(reference:Trace, other:Trace) -> List[str]:
+  problems = []
+  expected, got = RoundReader(reference.log), RoundReader(other.log)
+  if len(expected) != len(got):
+      return [f"{other.engine}: {len(got)} rounds logged, {reference.engine} {len(expected)}"]
+  for a, b in zip(expected, got):
+      if len(a.events) != len(b.events) or (a.events != b.events).any():
+          cards = [[int(v) for k, _, _, v in r.events.tolist() if k == 0] for r in (a, b)]
+          what = "cards" if cards[0] != cards[1] else "actions"
+          problems.append(f"game {a.game}: {other.engine} {what} differ from {reference.engine}")
+      elif not np.array_equal(a.bets, b.bets) or not np.array_equal(a.net, b.net):
+          problems.append(f"game {a.game}: {other.engine} bets/nets {b.bets}/{b.net}, {reference.engine} {a.bets}/{a.net}")
+      if len(problems) > 10:
+          break
+  return problems
+
+
+def check_rollout(scenario:Scenario, samples:int = 256) -> List[str]:
+  """`rollout.dealer_totals` against the reference dealer on sequences from the scenario's shoe."""
+  rules = scenario.make_rules()
+  seqs = sample_sequences(ONE_DECK * scenario.decks, samples, 16, np.random.default_rng(scenario.seed))
+  fast = dealer_totals(seqs, np.full(samples, 2), seqs[:, 0].astype(np.int64), seqs[:, 1], rules.hit_soft_17)
+  problems = []
+  for row, total in zip(seqs.tolist(), fast.tolist()):
+      cards = [PlayingCard(*CardInfo.INFO[4 * (v - 1)], comparer = BlackjackCardComparer) for v in row]
+      n = 2
+      while n < len(cards) and reference_dealer_hits(Hand(cards[:n]), rules):
+          n += 1
+      if reference_total(Hand(cards[:n])) != total:
+          problems.append(f"rollout dealer on {row[:n]}: {total}, reference {reference_total(Hand(cards[:n]))}")
+  return problems
+
+
+def compare(scenario:Scenario, engines:Optional[List[str]] = None, directory = None) -> Tuple[List[str], Dict[str, float]]:
+  """
+  Play `scenario` on every engine; returns (problems, seconds per engine).
+  No problems means every engine matched the first one and the reference checks.
+  """
+  engines = list(engines or ENGINES)
+  with tempfile.TemporaryDirectory(dir = directory) as tmp:
+      traces = [ENGINES[name](scenario, os.path.join(tmp, f"{name}.bin")) for name in engines]
+      reference = traces[0]
+      problems = [f"{t.engine}: {p}" for t in traces for p in t.problems]
+      rules = scenario.make_rules()
+      problems += [f"game {game}: net differs from Replayer.audit" for game in Replayer(RoundReader(reference.log), rules).mismatches()]
+      if "table" in engines:
+          reader = RoundReader(traces[engines.index("table")].log)
+          replayer = Replayer(reader, rules)
+          problems += [f"game {rnd.game}: Replayer.reexecute differs from the table log"
+                       for rnd in reader if not np.allclose(replayer.reexecute(rnd), rnd.net)]
+      for trace in traces[1:]:
+          problems += _compare_logs(reference, trace)
+          if trace.outcomes != reference.outcomes:
+              problems.append(f"{trace.engine}: outcomes differ from {reference.engine}")
+          if trace.chips != reference.chips:
+              problems.append(f"{trace.engine}: chips {trace.chips}, {reference.engine} {reference.chips}")
+  problems += check_rollout(scenario)
+  return problems, {t.engine: t.seconds for t in traces}
+
+
+def random_scenarios(n:int, seed:int = 0, max_rounds:int = 200):
+  """`n` scenarios from a seeded generator, for when Hypothesis isn't installed."""
+  rng = np.random.default_rng(seed)
+  names = sorted(STRATEGIES)
+  for _ in range(n):
+      rules = tuple((key, options[rng.integers(len(options))]) for key, options in RULES.items() if rng.random() < 0.5)
+      yield Scenario(int(rng.integers(2**63)), int(rng.integers(1, 9)),
+                     tuple(names[i] for i in rng.integers(len(names), size = rng.integers(1, 8))),
+                     rules, SHUFFLES[rng.integers(len(SHUFFLES))], int(rng.integers(1, max_rounds + 1)),
+                     BANKROLLS[rng.integers(len(BANKROLLS))], bool(rng.integers(2)))
+
+
+def scenarios(max_rounds:int = 200):
+  """A Hypothesis strategy generating `Scenario`s."""
+  if st is None:
+      raise ImportError("scenarios() needs Hypothesis: pip install hypothesis")
+  rules = st.lists(st.sampled_from(sorted(RULES)), unique = True).flatmap(
+      lambda keys: st.tuples(*(st.tuples(st.just(k), st.sampled_from(RULES[k])) for k in keys)))
+  return st.builds(Scenario,
+                   seed = st.integers(0, 2**63 - 1),
+                   decks = st.integers(1, 8),
+                   strategies = st.lists(st.sampled_from(sorted(STRATEGIES)), min_size = 1, max_size = 7).map(tuple),
+                   rules = rules,
+                   shuffle = st.sampled_from(SHUFFLES),
+                   rounds = st.integers(1, max_rounds),
+                   chips = st.sampled_from(BANKROLLS),
+                   dealer_last = st.booleans())
+
+
+def check(examples:int = 100, engines:Optional[List[str]] = None, seed:int = 0, max_rounds:int = 200) -> Dict[str, float]:
+  """
+  Run `examples` scenarios through `compare()`, raising AssertionError on
+  the first disagreement. Returns the throughput of every engine, in rounds
+  per second over all scenarios.
+  """
+  rounds, seconds = [0], defaultdict(float)
+
+  def run(scenario:Scenario):
+      problems, spent = compare(scenario, engines)
+      if problems:
+          raise AssertionError(f"{scenario}\n  " + "\n  ".join(problems[:20]))
+      rounds[0] += scenario.rounds
+      for engine, s in spent.items():
+          seconds[engine] += s
+
+  if st is not None:
+      settings(max_examples = examples, deadline = None, database = None)(given(scenarios(max_rounds))(run))()
+  else:
+      for scenario in random_scenarios(examples, seed, max_rounds):
+          run(scenario)
+  return {engine: rounds[0] / s for engine, s in seconds.items()}
+
+
+def main(argv = None):
+  parser = argparse.ArgumentParser(description = "Check the fast engines against the reference on random tables.")
+  parser.add_argument("--examples", type = int, default = 100, help = "scenarios to play")
+  parser.add_argument("--engines", nargs = "+", choices = list(ENGINES), help = "engines to compare (first is the reference)")
+  parser.add_argument("--rounds", type = int, default = 200, help = "most rounds per scenario")
+  parser.add_argument("--seed", type = int, default = 0, help = "seed of the scenarios without Hypothesis")
+  args = parser.parse_args(argv)
+  throughput = check(args.examples, args.engines, args.seed, args.rounds)
+  for engine, rate in throughput.items():
+      print(f"{engine:>10}: {rate:,.0f} rounds/s")
+
+
+if __name__ == '__main__':
+  main()
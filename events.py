@@ -0,0 +1,154 @@
+"""
+Events a game emits, and the bus observers subscribe to them on.
+
+The game only builds an event when something listens for its type: it
+holds the bus's live handler list for each type and checks it is non-empty
+before constructing anything, so a bare simulation pays one truth test per
+card, action or payout. Events are slotted and carry references, not copies.
+
+Example usage:
+-------------------
+game = Blackjack(players, verbose = False)
+count = RunningCount().attach(game.events)
+game.events.subscribe(RoundSettled, lambda e: print(e.player.name, e.outcome))
+-------------------
+"""
+from collections import Counter
+from typing import Callable, Dict, List, Type
+
+from ._utils import flash_line
+from .odds import HILO_TAGS
+from .participants import Dealer
+
+
+class Event:
+  __slots__ = ("game",)
+
+  def __init__(self, game:int):
+      self.game = game
+
+  def __repr__(self):
+      fields = ", ".join(f"{k}={getattr(self, k)!r}" for cls in type(self).__mro__ for k in getattr(cls, "__slots__", ()))
+      return f"{type(self).__name__}({fields})"
+
+
+class CardDealt(Event):
+  """`card` went to `player`'s hand; `faceup` is False for the dealer's hole card."""
+  __slots__ = ("player", "card", "faceup")
+
+  def __init__(self, game:int, player, card, faceup:bool):
+      super().__init__(game)
+      self.player, self.card, self.faceup = player, card, faceup
+
+
+class ActionTaken(Event):
+  """`player` (a hand, or the dealer) is about to carry out `action`."""
+  __slots__ = ("player", "action")
+
+  def __init__(self, game:int, player, action:str):
+      super().__init__(game)
+      self.player, self.action = player, action
+
+
+class RoundSettled(Event):
+  """`player` was paid `winnings` (stake included) on `bet` for `outcome`; the dealer's is the round's pot."""
+  __slots__ = ("player", "outcome", "bet", "winnings")
+
+  def __init__(self, game:int, player, outcome:str, bet, winnings):
+      super().__init__(game)
+      self.player, self.outcome, self.bet, self.winnings = player, outcome, bet, winnings
+
+
+class EventBus:
+  """Handlers per event type, called in the order they subscribed."""
+  def __init__(self):
+      self._handlers: Dict[Type[Event], List[Callable]] = {}
+
+  def handlers(self, event_type:Type[Event]) -> List[Callable]:
+      """The live list of handlers for `event_type`; empty (falsy) while nobody listens."""
+      return self._handlers.setdefault(event_type, [])
+
+  def subscribe(self, event_type:Type[Event], handler:Callable) -> Callable:
+      self.handlers(event_type).append(handler)
+      return handler
+
+  def unsubscribe(self, event_type:Type[Event], handler:Callable) -> None:
+      self.handlers(event_type).remove(handler)
+
+  def emit(self, event:Event) -> None:
+      for handler in self.handlers(type(event)):
+          handler(event)
+
+
+class Observer:
+  """Subscribes its `on_<event>` methods, e.g. `on_card_dealt`, for the event types it defines them for."""
+  EVENTS = {CardDealt: "on_card_dealt", ActionTaken: "on_action_taken", RoundSettled: "on_round_settled"}
+
+  def attach(self, bus:EventBus):
+      for event_type, name in self.EVENTS.items():
+          if hasattr(self, name):
+              bus.subscribe(event_type, getattr(self, name))
+      return self
+
+  def detach(self, bus:EventBus) -> None:
+      for event_type, name in self.EVENTS.items():
+          if hasattr(self, name):
+              bus.unsubscribe(event_type, getattr(self, name))
+
+
+class ConsoleReporter(Observer):
+  """What a verbose game shows: scoreboards, and a console line per card, action and payout."""
+  MESSAGES = {
+      "stand": "{name} [Score: {score}] has decided to stand, skipping...",
+      "double": "{name} doubles down",
+      "split": "{name} splits",
+  }
+  OUTCOME_MESSAGES = {
+      "blackjack": "Outcome: Blackjack! \nWon:{net}",
+      "win": "Outcome: Winner\nWon:{net}",
+      "push": "Outcome: Tied\nBroke Even",
+      "surrender": "Outcome: Surrendered\nLost:{lost}",
+  }
+
+  def on_card_dealt(self, event:CardDealt):
+      event.player.display()
+      flash_line(f"{event.player.name} drew {str(event.card)}")
+
+  def on_action_taken(self, event:ActionTaken):
+      message = self.MESSAGES.get(event.action)
+      if message:
+          flash_line(message.format(name = event.player.name, score = event.player.score))
+
+  def on_round_settled(self, event:RoundSettled):
+      if isinstance(event.player, Dealer):
+          flash_line("Game Over")
+          return
+      message = self.OUTCOME_MESSAGES.get(event.outcome, "Outcome: Loser\nLost:{lost}")
+      flash_line(f"{event.player.name}:\n" + message.format(net = event.winnings - event.bet, lost = event.bet - event.winnings))
+
+
+class RunningCount(Observer):
+  """Hi-Lo running count of the cards seen: face-up cards as dealt, the dealer's hole card at settlement."""
+  def __init__(self):
+      self.count = 0
+      self.seen = 0
+
+  def _see(self, card):
+      self.count += int(HILO_TAGS[card.values[0] - 1])
+      self.seen += 1
+
+  def on_card_dealt(self, event:CardDealt):
+      if event.faceup:
+          self._see(event.card)
+
+  def on_round_settled(self, event:RoundSettled):
+      if isinstance(event.player, Dealer) and len(event.player.hand) > 1:
+          self._see(event.player.hand[1])
+
+
+class ActionCounter(Observer):
+  """How often each action was taken, e.g. for a metrics dashboard."""
+  def __init__(self):
+      self.actions = Counter()
+
+  def on_action_taken(self, event:ActionTaken): self.actions[event.action] += 1
@@ -0,0 +1,313 @@
+"""
+Exact expected values by enumerating card sequences.
+
+Compositions are length-10 arrays of card counts by value (index 0 = ace,
+9 = tens), as returned by `Stats.composition()`.
+
+Dealer side: every way the dealer can finish from an up card is a multiset
+of drawn cards, and the chance of drawing a given multiset in any one
+valid order only depends on its counts, not on the order. So the dealer's
+finishing sequences are enumerated once per (up card, rules) as rows of
+(multiset, number of valid orders, outcome), and the outcome distribution
+for any composition is a product of falling factorials over those rows.
+
+Player side: every hand is a multiset of cards removed from the shoe;
+values are memoized on it, so each distinct composition is solved once.
+
+With the dealer peeking, everything is computed *unnormalized*: a value is
+(probability the dealer has no blackjack) x (expected result given he
+hasn't), which makes conditioning on the hole card exact instead of
+drawing the player's cards from an adjusted shoe.
+"""
+import numpy as np
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from .odds import ONE_DECK
+from .rules import Rules, DEFAULT_RULES, HIT, STAND, DOUBLE, SPLIT, SURRENDER
+
+# Columns of a dealer distribution: totals 17..21, bust, blackjack.
+BUST, BLACKJACK = 5, 6
+
+# (total, soft, up card value, legal actions) -> action
+Policy = Callable[[int, bool, int, frozenset], str]
+
+
+def _total(hard:int, ace:bool) -> int:
+  return hard + 10 if ace and hard + 10 <= 21 else hard
+
+
+@lru_cache(maxsize=None)
+def dealer_rows(up:int, hit_soft_17:bool = False, peek:bool = True):
+  """
+  Every way the dealer can finish from up card `up` (1 = ace):
+  (multisets drawn (R, 10), cards drawn (R,), valid orders (R,), outcome (R,)).
+
+  With `peek`, naturals are left out: the round never reaches them.
+  """
+  rows = {}
+  live = {(0,) * 10: 1}
+  while live:
+      grown = {}
+      for drawn, ways in live.items():
+          for v in range(10):
+              m = drawn[:v] + (drawn[v] + 1,) + drawn[v + 1:]
+              hard = up + sum((i + 1) * n for i, n in enumerate(m))
+              total = _total(hard, up == 1 or m[0] > 0)
+              if sum(m) == 1 and total == 21:
+                  if peek:
+                      continue
+                  outcome = BLACKJACK
+              elif total > 21:
+                  outcome = BUST
+              elif total > 17 or (total == 17 and not (hit_soft_17 and total != hard)):
+                  outcome = total - 17
+              else:
+                  grown[m] = grown.get(m, 0) + ways
+                  continue
+              rows[m] = rows.get(m, (0, outcome))[0] + ways, outcome
+      live = grown
+  drawn = np.array(list(rows), dtype=np.int64)
+  ways, outcome = map(np.array, zip(*rows.values()))
+  return drawn, drawn.sum(axis=1), ways.astype(float), outcome
+
+
+@lru_cache(maxsize=None)
+def _design(up, hit_soft_17, peek):
+  """
+  `dealer_rows` as matrices: the log chance of a row is
+  features(pool) @ design.T + log(ways), where features hold the log falling
+  factorials of every card count and of the shoe size.
+  """
+  drawn, cards, ways, outcome = dealer_rows(up, hit_soft_17, peek)
+  depth = int(cards.max()) + 1
+  design = np.zeros((len(drawn), 11 * depth))
+  rows = np.arange(len(drawn))
+  for v in range(10):
+      design[rows, v * depth + drawn[:, v]] = 1
+  design[rows, 10 * depth + cards] = 1
+  return design, np.log(ways), np.eye(7)[outcome], depth
+
+
+def _log_falling(x, depth):
+  """log(x (x - 1) ... (x - j + 1)) for j = 0..depth-1; impossible draws get a huge negative log."""
+  steps = np.maximum(x[..., None] - np.arange(depth - 1), 1e-300)
+  return np.concatenate([np.zeros(x.shape + (1,)), np.cumsum(np.log(steps), axis=-1)], axis=-1)
+
+
+def dealer_distribution(pool, up:int, hit_soft_17:bool = False, peek:bool = True) -> np.ndarray:
+  """
+  Chance of each dealer result (17..21, bust, blackjack) for up card `up`,
+  drawing without replacement from `pool`. With `peek` the results only
+  cover the rounds where the dealer has no blackjack and sum to that chance.
+
+  `pool` may also be a (B, 10) array of compositions, giving (B, 7).
+  """
+  pools = np.asarray(pool, dtype=float)
+  design, log_ways, outcome, depth = _design(up, hit_soft_17, peek)
+  flat = pools.reshape(-1, 10)
+  out = np.empty((len(flat), 7))
+  step = max(1, 2**22 // len(design))
+  for i in range(0, len(flat), step):
+      chunk = flat[i:i + step]
+      features = np.concatenate([_log_falling(chunk, depth).reshape(len(chunk), -1),
+                                 -_log_falling(chunk.sum(axis=1), depth)], axis=1)
+      out[i:i + step] = np.exp(features @ design.T + log_ways) @ outcome
+  return out.reshape(pools.shape[:-1] + (7,))
+
+
+class ExactCalculator:
+  """
+  Exact expected value of every starting hand, and the house edge, for a
+  shoe composition, a rule set and a playing policy.
+
+  The policy maps (total, soft, up card value, legal actions) to an action;
+  None plays every decision optimally for the exact cards left (composition
+  dependent strategy). Insurance is never taken.
+
+  Splits are valued one hand at a time, each hand drawing from the shoe
+  without the other split card, with no resplits; everything else is exact.
+
+  Example usage:
+  -------------------
+  calc = ExactCalculator.fresh(6)
+  calc.house_edge()                     # about -0.004 for the default rules
+  calc.actions((10, 6), up = 10)        # {'hit': ..., 'stand': ..., 'surrender': -0.5, ...}
+  ExactCalculator.from_shoe(game._deck).house_edge()
+  -------------------
+  """
+  def __init__(self, pool, rules:Rules = DEFAULT_RULES, policy:Optional[Policy] = None):
+      self._pool = tuple(float(n) for n in pool)
+      self._shoes = {up: _add(self._pool, up - 1, -1) for up in range(1, 11)}   # shoe after the up card
+      self._rules = rules
+      self._policy = policy
+      self._bonus = float(rules.payouts["blackjack"] - 1)
+      self._dealer: Dict = {}
+      self._values: Dict = {}
+
+  @classmethod
+  def fresh(cls, num_decks:int, rules:Rules = DEFAULT_RULES, policy:Optional[Policy] = None) -> "ExactCalculator":
+      return cls(ONE_DECK * num_decks, rules, policy)
+
+  @classmethod
+  def from_shoe(cls, shoe, rules:Rules = DEFAULT_RULES, policy:Optional[Policy] = None) -> "ExactCalculator":
+      return cls(shoe.stats.composition(), rules, policy)
+
+  # Hands and removed cards are tuples of counts by value; `up` is 1..10.
+
+  def _left(self, removed, up):
+      return [n - r for n, r in zip(self._shoes[up], removed)]
+
+  def _reachable(self, up):
+      """Every set of removed player cards whose dealer distribution the player's hands can need."""
+      seen, needed = set(), set()
+      def grow(hand, extra):
+          if (hand, extra) in seen:
+              return
+          seen.add((hand, extra))
+          removed = _add(hand, extra) if extra >= 0 else hand
+          needed.add(removed)
+          if _hand_total(hand) >= 21 or (extra == 0 and not self._rules.hit_split_aces):
+              return
+          for v, n in enumerate(self._left(removed, up)):
+              if n > 0 and _hand_total(_add(hand, v)) <= 21:
+                  grow(_add(hand, v), extra)
+      for a in range(10):
+          for b in range(a, 10):
+              grow(_add(_add(_EMPTY, a), b), -1)
+          for w in range(10):
+              grow(_add(_add(_EMPTY, a), w), a)
+      return needed
+
+  def _prefetch(self, up):
+      """Compute every dealer distribution one up card can need in one batch."""
+      keys = [removed for removed in self._reachable(up) if (removed, up) not in self._dealer
+              and min(self._left(removed, up)) >= 0]
+      if keys:
+          dists = dealer_distribution(np.array([self._left(k, up) for k in keys]), up, self._rules.hit_soft_17, self._rules.peek)
+          self._dealer.update(zip(((k, up) for k in keys), dists.tolist()))
+
+  def _distribution(self, removed, up):
+      key = (removed, up)
+      if key not in self._dealer:
+          self._dealer[key] = dealer_distribution(self._left(removed, up), up, self._rules.hit_soft_17, self._rules.peek).tolist()
+      return self._dealer[key]
+
+  def _no_blackjack(self, left, up):
+      """Chance the hole card doesn't give the dealer blackjack (1 without peek: it's in the distribution)."""
+      if not self._rules.peek or up not in (1, 10):
+          return 1.0
+      return 1.0 - left[9 if up == 1 else 0] / sum(left)
+
+  def _stand(self, removed, up, total):
+      d = self._distribution(removed, up)
+      k = total - 17
+      win = d[BUST] + (sum(d[:k]) if k > 0 else 0.0)
+      lose = sum(d[max(k + 1, 0):BUST]) + d[BLACKJACK]
+      return win - lose
+
+  def _options(self, hand, up, extra, split):
+      """Unnormalized value of every legal action for `hand`; `extra` is the other split card (-1 if none)."""
+      removed = _add(hand, extra) if extra >= 0 else hand
+      total = _hand_total(hand)
+      if total >= 21:
+          return {STAND: self._stand(removed, up, total)} if total == 21 else {}
+      legal = self._rules.legal(sum(hand) == 2, False, total, split, self._rules.max_hands if split else 1, extra == 0)
+      left = self._left(removed, up)
+      n = sum(left)
+      out = {}
+      for action in legal:
+          if action == STAND:
+              out[STAND] = self._stand(removed, up, total)
+          elif action == SURRENDER:
+              d = self._distribution(removed, up)
+              out[SURRENDER] = -0.5 * sum(d[:BLACKJACK]) - d[BLACKJACK]
+          else:
+              value = 0.0
+              for v, count in enumerate(left):
+                  if count <= 0:
+                      continue
+                  child = _add(hand, v)
+                  total_v = _hand_total(child)
+                  if total_v > 21:
+                      left[v] -= 1
+                      result = -self._no_blackjack(left, up)
+                      left[v] += 1
+                  elif action == DOUBLE:
+                      result = self._stand(_add(removed, v), up, total_v)
+                  else:
+                      result = self._value(child, up, extra, split)
+                  value += count / n * result
+              out[action] = 2 * value if action == DOUBLE else value
+      return out
+
+  def _choose(self, options, hand, up):
+      if self._policy is None:
+          return max(options, key=options.get)
+      hard = sum((i + 1) * n for i, n in enumerate(hand))
+      total = _total(hard, hand[0] > 0)
+      legal = frozenset(options)
+      return self._rules.resolve(self._policy(total, total != hard, up, legal), legal)
+
+  def _value(self, hand, up, extra, split):
+      key = (hand, up, extra, split)
+      if key not in self._values:
+          options = self._options(hand, up, extra, split)
+          self._values[key] = options[self._choose(options, hand, up)]
+      return self._values[key]
+
+  def _split(self, v, up):
+      """Unnormalized value of splitting a pair of `v` (index): two hands of one card each."""
+      single = _add(_EMPTY, v)
+      left = self._left(_add(single, v), up)
+      n = sum(left)
+      return 2 * sum(count / n * self._value(_add(single, w), up, v, True) for w, count in enumerate(left) if count > 0)
+
+  def _root(self, a, b, up):
+      """Unnormalized options for the starting hand (a, b) (indexes), including splitting."""
+      hand = _add(_add(_EMPTY, a), b)
+      options = self._options(hand, up, -1, False)
+      if a == b and SPLIT in self._rules.legal(True, True, _hand_total(hand), False, 1, False):
+          options[SPLIT] = self._split(a, up)
+      return hand, options
+
+  def actions(self, cards, up:int) -> Dict[str, float]:
+      """Expected result of every legal action for the two-card hand `cards` (values, 1 = ace), given no dealer blackjack."""
+      self._prefetch(up)
+      hand, options = self._root(cards[0] - 1, cards[1] - 1, up)
+      norm = self._no_blackjack(self._left(hand, up), up)
+      return {action: value / norm for action, value in options.items()}
+
+  def house_edge(self) -> float:
+      """Expected result per unit of opening bet over every deal (negative favours the house)."""
+      pool, n = self._pool, sum(self._pool)
+      ev = 0.0
+      for up in range(1, 11):
+          self._prefetch(up)
+          for a in range(10):
+              for b in range(a, 10):
+                  p = pool[a] / n * (pool[b] - (a == b)) / (n - 1) * (pool[up - 1] - (up - 1 == a) - (up - 1 == b)) / (n - 2)
+                  if p <= 0:
+                      continue
+                  p *= 1 if a == b else 2
+                  hand = _add(_add(_EMPTY, a), b)
+                  no_bj = self._no_blackjack(self._left(hand, up), up)
+                  if (a, b) == (0, 9):
+                      blackjack = 0.0 if self._rules.peek else self._distribution(hand, up)[BLACKJACK]
+                      ev += p * self._bonus * (no_bj - blackjack)
+                      continue
+                  hand, options = self._root(a, b, up)
+                  ev += p * (options[self._choose(options, hand, up)] - (1 - no_bj))
+      return ev
+
+
+_EMPTY = (0,) * 10
+
+
+def _add(counts, v, n = 1):
+  return counts[:v] + (counts[v] + n,) + counts[v + 1:]
+
+
+@lru_cache(maxsize=None)
+def _hand_total(hand):
+  return _total(sum((i + 1) * n for i, n in enumerate(hand)), hand[0] > 0)
@@ -1,59 +1,96 @@
-from abc import ABC, abstractmethod
-from typing import List, Optional, Dict
+from abc import abstractmethod
+from typing import List, Optional, Dict, Sequence
+import numpy as np
 import pandas as pd
 from IPython.display import HTML, DisplayHandle, display
 from ._utils import flash_line, clear_line
+from .basegame import Base
 from .playingcards import DefaultCardComparer, BlackjackCardComparer
-from .participants import BlackjackPlayer, Dealer
+from .participants import BlackjackPlayer, Dealer, Spot
 from .cards import Shoe
-
-
-class Game(ABC):
-  def __init__(self, players:List[BlackjackPlayer], dealer:Optional[Dealer] = None, comparer = DefaultCardComparer):
+from .rules import Rules, DEFAULT_RULES, OUTCOMES, HIT, STAND, DOUBLE, SPLIT, SURRENDER, INSURANCE
+from .strategy import StrategyGroup
+from .events import EventBus, CardDealt, ActionTaken, RoundSettled, ConsoleReporter
+
+# Keys a human player types to pick an action; anything else stands.
+ACTION_KEYS = {"y": HIT, "d": DOUBLE, "p": SPLIT, "r": SURRENDER}
+DEALER_SEAT = 255   # seat number of the dealer in round logs
+
+
+class Game(Base):
+  PHASES = (
+      ("Placing Bets", "take_bets"),
+      ("Deal Opening", "deal_opening"),
+      ("Play Rounds", "loop_turns"),
+      ("Payout", "settle"),
+  )
+
+  def __init__(self, players:List[BlackjackPlayer], dealer:Optional[Dealer] = None, comparer = DefaultCardComparer, rules:Rules = DEFAULT_RULES,
+               shoe:Optional[Shoe] = None, verbose:bool = True, log:Optional["RoundLog"] = None,
+               events:Optional[EventBus] = None, record:bool = True, dealer_last:bool = False, timed:bool = False):
+    super().__init__(players, shoe if shoe is not None else Shoe(comparer = comparer), verbose, timed)
     self._pot = 0
+    self._rules = rules
+    self._log = log
     self._round = 0
-    self._game = 0
 
-    self._players = players
     self._dealer = dealer
+    self._seats = {player: seat for seat, player in enumerate(players)}
+    for player in players + [dealer]:
+      player.show = verbose
+      player.strategy.watch(dealer)
+
+    # Deal order of the opening cards: seats in order, the dealer first or last.
+    self._dealer_last = dealer_last
+    self._all_active_players = players + [dealer] if dealer_last else [dealer] + players
+    self._active_players = list(players)
+    self._round_bets: Dict[BlackjackPlayer, int] = {}
+    self._handle = display(DisplayHandle(), display_id=True) if verbose else None
+    self._actions = {HIT: self.deal, STAND: self.skip}
+    self._group = StrategyGroup()
+    self._splits: Dict[BlackjackPlayer, List[BlackjackPlayer]] = {}
+
+    # Events are only built when their handler list is non-empty.
+    self.events = events if events is not None else EventBus()
+    self._on_card = self.events.handlers(CardDealt)
+    self._on_action = self.events.handlers(ActionTaken)
+    self._on_settled = self.events.handlers(RoundSettled)
+    if record:
+        self.events.subscribe(RoundSettled, self._record)
+    if verbose:
+        ConsoleReporter().attach(self.events)
+
+  def _record(self, event:RoundSettled): self.add_history(event.player, event.outcome)
 
-    self._all_active_players = [dealer] + players
-    self._active_players = players
-    self._inactive_players = []
-    self._deck = Shoe()
-    self._round_results: List[Dict] = []
-    self._handle = display(DisplayHandle(), display_id=True)
-    
-  def get_scores(self) -> pd.Series: return pd.Series([player.score for player in self._all_active_players], name = "Scores")
-  def get_chips(self) -> pd.Series: return pd.Series([player.chips for player in self._all_active_players], name = "Chips")
-  def get_names(self) -> pd.Series: return pd.Series([player.name for player in self._all_active_players], name = "Names")
-  def get_hands(self) -> pd.Series: return pd.Series([p.get_hand() for p in self._all_active_players], name = "Hands")
   def get_status(self) -> pd.Series: return pd.Series([not p.is_done() for p in self._all_active_players], name = "Status")
-  def get_active_players(self, verbose = False) -> List[BlackjackPlayer]: return [p for p in self._active_players if not p.is_done(verbose = verbose)]
-  def get_pending(self): return [p for p in self._active_players if p.is_waiting()]
+  def get_active_players(self, verbose = False) -> List[BlackjackPlayer]: return [p for p in self._hands() if not p.is_done(verbose = verbose)]
+  def get_pending(self): return [p for p in self._hands() if p.is_waiting()]
+  def _hands(self): return self._active_players
   def play_round(self):
     if not self._active_players: exit()
-    self._game += 1
-    for phase, fn in [
-        ("Placing Bets", self.take_bets),
-        ("Deal Opening", self.deal_opening),
-        ("Play Rounds", self.loop_turns),
-        ("Payout",self.settle),
-    ]:
-        flash_line(f"{phase}…")
-        done_early = fn()
-        clear_line()
-        if done_early:
-            break
+    self.before_round()
+    if self._log is not None:
+        self._log.begin(self._game, self._deck.seed or 0, self._deck.shoes, self._ledger(), self._dealer_last, self._owners())
+    self.run_phases()
+    if self._log is not None:
+        self._log.end(self._ledger())
     self.after_round()
 
-  def check_eligible_players(self, player):
-    if not player.is_eligible():
-      self._inactive_players.append(player)
-      self._all_active_players.remove(player)
-      self._active_players.remove(player)
-      return False
-    return True
+  def _ledger(self) -> List:
+    """Chips of every seat, in seat order, for the round log."""
+    return [p.chips for p in self._seats]
+
+  def _owners(self):
+    """Who sits in every seat, for the round log; None when every seat is a player of its own."""
+    return None
+
+  def _where(self, player):
+    """(seat, hand) of a player's hand for the round log; the dealer is seat 255."""
+    if player is self._dealer:
+        return DEALER_SEAT, 0
+    owner = player.owner
+    hand = 0 if player is owner else self._splits[owner].index(player) + 1
+    return self._seats[owner], hand
 
   def _prompt_bet(self, player):
       """
@@ -78,31 +115,55 @@ class Game(ABC):
               return player.bet(bet)
 
   def take_bets(self):
+    self._round_bets = {}
     for player in self._active_players:
       bet = self._prompt_bet(player)
       self._pot += bet
+      self._round_bets[player] = bet
+      if self._log is not None:
+          self._log.bet(self._seats[player], bet)
+
+  def legal_actions(self, player): return frozenset((HIT, STAND))
+
+  def legal_action(self, player, decision) -> str:
+      """Turn a strategy's answer (True/False or an action name) into an action the table allows."""
+      if not isinstance(decision, str):
+          decision = HIT if decision else STAND
+      return self._rules.resolve(decision, self.legal_actions(player))
+
+  def _prompt_action(self, player):
+      legal = self.legal_actions(player)
+      options = ", ".join(f"'{key}' to '{action}'" for key, action in ACTION_KEYS.items() if action in legal)
+      key = input(f"{player.name}, Your Current Score is {player.score}.\nPress {options}, or press any other key to 'stand': \n")
+      return ACTION_KEYS.get(key.lower(), STAND)
+
+  def act(self, player, decision):
+      """Carry out a strategy's decision for `player`."""
+      action = self.legal_action(player, decision)
+      if self._log is not None and player is not self._dealer:
+          self._log.action(*self._where(player), action)
+      if self._on_action:
+          self.events.emit(ActionTaken(self._game, player, action))
+      self._actions[action](player)
 
   def next(self, player, verbose = True):
       if player.has_strategy():
-          if player.strategy.decide(self._deck, verbose = verbose):
-              self.deal(player, verbose = verbose)
-          else:
-              self.skip(player, verbose = verbose)
+          self.act(player, player.strategy.decide(self._deck, verbose = verbose))
       else:
-          action = input(f"{player.name}, Your Current Score is {player.score}.\nPress 'y' to 'hit', or press any other key to 'stand': \n")
-          if action.lower() == 'y':
-              card = self.deal(player)
+          action = self.legal_action(player, self._prompt_action(player))
+          if self._log is not None:
+              self._log.action(*self._where(player), action)
+          if self._on_action:
+              self.events.emit(ActionTaken(self._game, player, action))
+          self._actions[action](player)
+          if action != STAND:
               print(f"{player.name}: Current Score = {player.score}")
-          else:
-              self.skip(player)
 
   @abstractmethod
   def deal(self, player): ...
   @abstractmethod
   def skip(self, player): ...
   @abstractmethod
-  def before_round(self): ...
-  @abstractmethod
   def deal_opening(self): ...
   @abstractmethod
   def loop_turns(self): ...
@@ -112,51 +173,98 @@ class Game(ABC):
   def after_round(self): ...
 
 class Blackjack(Game):
-  def __init__(self, players:List[BlackjackPlayer]):
-    self._dealer = Dealer()
-    super().__init__(players, self._dealer, BlackjackCardComparer)
-
-  def deal(self, player, verbose = True):
-    card = player.hit(self._deck.draw())
-    if verbose:
-        flash_line(f"{player.name} drew {str(card)}")
+  def __init__(self, players:List[BlackjackPlayer], rules:Rules = DEFAULT_RULES, **kwargs):
+    self._dealer = Dealer(rules)
+    super().__init__(players, self._dealer, BlackjackCardComparer, rules, **kwargs)
+    self._actions.update({DOUBLE: self.double, SPLIT: self.split, SURRENDER: self.surrender})
+
+  def deal(self, player):
+    card = player.hit(self._deck.draw(flip = not player.next_face_down()))
+    if self._log is not None:
+        self._log.card(*self._where(player), card.id)
+    if self._on_card:
+        self.events.emit(CardDealt(self._game, player, card, card.faceup))
     return card
 
-  def skip(self, player, verbose = True):
-    if verbose:
-        flash_line(f"{player.name} [Score: {player.score}] has decided to stand, skipping...")
+  def skip(self, player):
     player.stand()
 
-  def before_round(self):
-    if not self._deck:
-        self._deck = Shoe()
-
-    self._pool = 0
-    self._round = 0
+  def double(self, player):
+    self._pot += player.double()
+    self.deal(player)
+    if not player.is_bust():
+        player.stand()
+
+  def split(self, player):
+    hand = player.split()
+    self._splits.setdefault(player.owner, []).append(hand)
+    self._pot += hand.current_bet
+    self.deal(player)
+    self.deal(hand)
+    for h in (player, hand):
+        if h.is_21():
+            h.stand()
+
+  def surrender(self, player):
+    self._payout(player, "surrender")
+
+  def legal_actions(self, player):
+    if player is self._dealer:
+        return super().legal_actions(player)
+    hands = 1 + len(self._splits.get(player.owner, ()))
+    return self._rules.legal_actions(player.hand, player.was_split, hands, player.split_aces, player.chips, player.current_bet)
+
+  def _hands(self):
+    for p in self._active_players:
+        yield p
+        yield from self._splits.get(p, ())
+
+  def offer_insurance(self):
+    for p in self._active_players:
+        if p.chips < p.current_bet / 2:
+            continue
+        if p.has_strategy():
+            take = p.strategy.insure(self._deck)
+        else:
+            take = input(f"{p.name}, the dealer shows an ace. Press 'y' for insurance: \n").lower() == 'y'
+        if take:
+            self._pot += p.insure()
+            if self._log is not None:
+                self._log.action(self._seats[p], 0, INSURANCE)
+            if self._on_action:
+                self.events.emit(ActionTaken(self._game, p, INSURANCE))
 
   def deal_opening(self):
-      flash_line("Dealing First Two Cards....")
+      if self._verbose:
+          flash_line("Dealing First Two Cards....")
       for _ in range(2):
           self._round += 1
           for p in self._all_active_players:
               self.deal(p)
+      if self._rules.insurance and self._rules.peek and self._dealer._get_up_card().rank == "A":
+          self.offer_insurance()
       blackjack_players = [p for p in self._active_players if p.is_blackjack()]
-      if not blackjack_players:
-        return False
+      if not self._rules.peek:   # the hole card stays down: naturals are paid at the settle
+          for p in blackjack_players:
+              p.stand()
+          return False
 
       peek = self._dealer.peek()
 
       if peek:
-          for p in self._active_players:
-              if p not in blackjack_players:
-                  self._payout(p, "loser")
-                  continue
-              self._payout(p, "push")
+          self._deck.show()
+          players = list(self._active_players)
+          for p in players:
+              if p.insurance:
+                  winnings = p.insurance * 3
+                  p.add_chips(winnings)
+                  self._pot -= winnings
+          self._settle(players, 21, True)
           self.exit_game()
           return True
       else:
+          self._settle(blackjack_players, self._dealer.score, False)
           for p in blackjack_players:
-              self._payout(p, "blackjack")
               p.current_bet = 0
           return False
 
@@ -164,8 +272,11 @@ class Blackjack(Game):
       while (actives:=self.get_active_players()):
           self._play_round(actives)
       self._dealer.reveal()
+      self._deck.show()
+      if not self.get_pending():
+          return
       while self._dealer.is_playing():
-          self.next(self._dealer)
+          self.next(self._dealer, verbose = self._verbose)
 
 
   def exit_game(self):
@@ -176,85 +287,105 @@ class Blackjack(Game):
       else:
           dealer_outcome = "push"
 
-      self._round_results.append({
-              "game": self._game,
-              "player": self._dealer.name,
-              "outcome": dealer_outcome
-          })
       self._dealer.settle(self._pot)
+      if self._on_settled:
+          self.events.emit(RoundSettled(self._game, self._dealer, dealer_outcome, 0, self._pot))
 
   def _play_round(self, active_players:List[BlackjackPlayer]):
       self._round += 1
-      print(f"Round {self._round}:")
+      if self._verbose:
+          print(f"Round {self._round}:")
+      automated = [p for p in active_players if p.has_strategy()]
+      up_card = self._dealer._get_up_card().values[0]
+      decisions = dict(zip(automated, self._group.decide(automated, self._deck, up_card)))
       for p in active_players:
-          self.next(p)
-          clear_line()
+          if p in decisions:
+              self.act(p, decisions[p])
+          else:
+              self.next(p, verbose = self._verbose)
+          if self._verbose:
+              clear_line()
           if p.is_21():
               p.stand()
 
   def settle(self):
-      pending_players = self.get_pending()
-
-      if self._dealer.is_bust():
-          for player in pending_players:
-              self._payout(player, "win")
-
-      elif self._dealer.score < 21:
-          for player in pending_players:
-              outcome = self.compare(player.hand)
-              self._payout(player, outcome)
-
-      else:
-          for player in pending_players:
-              if player.is_21():
-                  self._payout(player, "push")
-              else:
-                  self._payout(player, "loser")
+      self._settle(self.get_pending(), self._dealer.score, self._dealer.is_blackjack())
       self.exit_game()
 
-  def compare(self, player_hand):
-    if player_hand > self._dealer.hand:
-      return "win"
-    elif player_hand < self._dealer.hand:
-      return "lose"
-    else:
-      return "push"
+  def _settle(self, hands:List[BlackjackPlayer], dealer:int, dealer_natural:bool):
+      """Pay `hands` against the dealer's final total, all looked up at once."""
+      codes = self._rules.settle([p.score for p in hands], [p.is_natural() for p in hands], dealer, dealer_natural)
+      for p, code in zip(hands, codes.tolist()):
+          self._payout(p, OUTCOMES[code])
 
   def _payout(self, player, outcome):
     bet = player.current_bet
-
-    if outcome == "blackjack":
-      winnings = bet*3
-      out_message = f"{player.name}:\nOutcome: {outcome.capitalize()}! \nWon:{winnings - bet}"
-
-    elif outcome == "win":
-      winnings = bet*2
-      out_message = f"{player.name}:\nOutcome: Winner\nWon:{winnings - bet}"
-
-    elif outcome == "push":
-      out_message = f"{player.name}:\nOutcome: Tied\nBroke Even"
-      winnings = bet
-
-    else:
-      out_message = f"{player.name}:\nOutcome: Loser\nLost:{bet}"
-      winnings = 0
-      pass
-
+    winnings = self._rules.payout(outcome, bet)
     player.settle(winnings)
     self._pot -= winnings
-    flash_line(out_message)
-    self._round_results.append({
-            "game": self._game,
-            "player": player.name,
-            "outcome": outcome
-        })
+    if self._on_settled:
+        self.events.emit(RoundSettled(self._game, player, outcome, bet, winnings))
     return winnings
 
   def after_round(self):
-      for p in self._players:
+      self._pot = 0
+      self._splits = {}
+      for p in list(self._active_players):   # check_eligible_players removes the broke
         p.reset()
-        if not self.check_eligible_players(p):
-          continue
+        self.check_eligible_players(p)
       self._dealer.reset()
-
-
+      self._deck.end_round()
+
+
+
+
+class Table(Blackjack):
+  """
+  🪑 Blackjack at a table of seats, dealt as a casino deals: the opening
+  cards go round the seats in order, first base first, and the dealer
+  last.
+
+  `seating` lists who sits where, first base first; None leaves a seat
+  empty. A player may take several seats: each is a `Spot`, a hand of its
+  own with its own copy of the player's strategy, all betting from the
+  player's chips. The per-seat bookkeeping is a pair of arrays:
+  `nets[seat]` is what each seat has won or lost, and `owners[seat]` is
+  the index in `players` of whoever sits there (-1 for empty). Round logs
+  record seats by their position at the table.
+
+  Example usage:
+  -------------------
+  anna, noe = BlackjackPlayer("Anna", strategy = HiLoStrategy), BlackjackPlayer("Noe", strategy = HiLoStrategy)
+  table = Table([anna, anna, None, noe, anna], verbose = False)   # Anna plays three spots
+  table.play_round()
+  table.bankrolls()
+  -------------------
+  """
+  def __init__(self, seating:Sequence[Optional[BlackjackPlayer]], rules:Rules = DEFAULT_RULES, dealer_last:bool = True, **kwargs):
+    self.players = list(dict.fromkeys(p for p in seating if p is not None))
+    index = {p: i for i, p in enumerate(self.players)}
+    self.owners = np.array([index[p] if p is not None else -1 for p in seating], dtype=np.int8)
+    self.nets = np.zeros(len(seating))
+    spots = np.bincount(self.owners[self.owners >= 0], minlength=len(self.players))
+
+    seated, taken = {}, [0] * len(self.players)
+    for seat, p in enumerate(seating):
+        if p is None:
+            continue
+        i = index[p]
+        taken[i] += 1
+        name = p.name if spots[i] == 1 else f"{p.name}/{taken[i]}"
+        seated[seat] = Spot(p, name, self.nets, seat)
+    super().__init__(list(seated.values()), rules, dealer_last = dealer_last, **kwargs)
+    self._seats = {spot: seat for seat, spot in seated.items()}
+
+  def _ledger(self) -> List: return self.nets.tolist()
+  def _owners(self): return self.owners
+
+  def bankrolls(self) -> pd.Series:
+      """Chips of every player at the table."""
+      return pd.Series([p.chips for p in self.players], index = [p.name for p in self.players], name = "Chips")
+
+  def seat_nets(self) -> pd.Series:
+      """What every occupied seat has won or lost so far."""
+      return pd.Series({spot.name: self.nets[seat] for spot, seat in self._seats.items()}, name = "Net")
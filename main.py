@@ -1,5 +1,67 @@
+"""
+Command-line entry point for headless simulation sweeps.
+
+    python -m package.main sweep.toml [--rounds N] [--workers N] [--out DIR]
+
+The config file (TOML, or YAML if PyYAML is installed) describes one table:
+
+    rounds = 1_000_000          # per seat, over all blocks
+    blocks = 64                 # independent shoes, spread over the workers
+    seed = 0
+    workers = 8                 # processes; 0 = play in this process
+    output = "results"
+
+    [rules]                     # any `Rules` keyword
+    hit_soft_17 = true
+
+    [shoe]
+    decks = 6
+    penetration = 0.75
+    shuffle = "CASINO"          # a name from `shuffles`, optional
+    bank = "shoes.bank"         # or deal pre-shuffled shoes from a `shoebank` file (decks/shuffle unused)
+
+    [table]
+    dealer_last = false         # deal the dealer's opening cards after the seats'
+
+    [[seats]]
+    name = "hilo"
+    strategy = "HiLoStrategy"   # a name from `strategy`, or "module:Class"
+    chips = 1_000_000_000
+    params = {}                 # keyword arguments of the strategy
+    spots = 1                   # seats this player takes, side by side, on one bankroll
+
+    [[seats]]
+    name = "i18"
+    strategy = "TableStrategy"  # plays a chart from content/charts or a CSV/JSON file
+    params = { chart = "basic", deviations = "illustrious18", bets = { "-10" = 25, "2" = 100, "4" = 200 } }
+
+Progress and throughput go to stderr as blocks finish; per-block and
+per-seat results are written to `output` as CSV, with the resolved config.
+"""
+import argparse
+import importlib
+import json
+import math
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Dict, List
+
+from . import shuffles
+from . import strategy as strategies
+from .cards import Shoe
+from .game import Blackjack, Table
 from .participants import BlackjackPlayer
-from .game import Blackjack
+from .rules import Rules, OUTCOMES
+from .shared import SharedTables, worker_init, worker_tables
+from .shoebank import ShoeBank, BankedShoe
+from .strategy import HiLoStrategy
 from .visualization import WinRateVisualizer
 
 def run():
@@ -9,14 +71,205 @@ def run():
 
   game.play_round()
 
-  
+
 def batched_run():
   players = [BlackjackPlayer("Anna", strategy = HiLoStrategy), BlackjackPlayer("Noe", strategy = HiLoStrategy), BlackjackPlayer("Daniel", strategy = HiLoStrategy)]
 
   game = Blackjack(players)
 
   WinRateVisualizer(game).play(50)
-  
+
+
+def load_config(path) -> Dict:
+  """Read a TOML or YAML config and fill in defaults."""
+  path = Path(path)
+  if path.suffix in (".yaml", ".yml"):
+      try:
+          import yaml
+      except ImportError:
+          raise ImportError("YAML configs need PyYAML: pip install pyyaml") from None
+      config = yaml.safe_load(path.read_text()) or {}
+  else:
+      import tomllib
+      config = tomllib.loads(path.read_text())
+
+  config.setdefault("rounds", 100_000)
+  config.setdefault("blocks", 16)
+  config.setdefault("seed", 0)
+  config.setdefault("workers", None)
+  config.setdefault("output", "results")
+  config.setdefault("rules", {})
+  config.setdefault("shoe", {})
+  config.setdefault("table", {})
+  if not config.get("seats"):
+      raise ValueError(f"{path}: no [[seats]] to play")
+  for i, seat in enumerate(config["seats"]):
+      seat.setdefault("name", f"seat{i}")
+      seat.setdefault("strategy", "HiLoStrategy")
+      seat.setdefault("chips", 10**9)
+      seat.setdefault("params", {})
+      seat.setdefault("spots", 1)
+      if not BlackjackPlayer(seat["name"], strategy = _strategy(seat["strategy"], seat["params"])).has_strategy():
+          raise ValueError(f"{path}: seat {seat['name']!r} plays interactively; headless sweeps need an automatic strategy")
+  return config
+
+
+def _strategy(name:str, params:Dict):
+  """A strategy class by name (from `strategy`, or "module:Class"), with its keyword arguments bound."""
+  if ":" in name:
+      module, _, attr = name.partition(":")
+      cls = getattr(importlib.import_module(module), attr)
+  else:
+      cls = getattr(strategies, name, None)
+      if cls is None:
+          raise ValueError(f"Unknown strategy {name!r}")
+  return partial(cls, **params) if params else cls
+
+
+def _shuffle(spec):
+  """A shuffle from `shuffles`: a name ("CASINO", "RiffleShuffle") or a table with `type` and keywords."""
+  if spec is None:
+      return None
+  if isinstance(spec, str):
+      spec = {"type": spec}
+  spec = dict(spec)
+  found = getattr(shuffles, spec.pop("type"))
+  return found(**spec) if isinstance(found, type) else found
+
+
+def play_block(config:Dict, seed:int, rounds:int, block:int = 0) -> List[Dict]:
+  """
+  Play `rounds` rounds of the configured table on the shoe sequence drawn
+  from `seed`, or with a shoe bank on every `blocks`-th shoe from `block`;
+  one row per seat.
+  """
+  shoe_config = config["shoe"]
+  cut_card = shuffles.CutCard(shoe_config["penetration"]) if "penetration" in shoe_config else None
+  if "bank" in shoe_config:
+      shoe = BankedShoe(ShoeBank(shoe_config["bank"]), first = block, step = config["blocks"],
+                        cut_card = cut_card or shuffles.CutCard())
+  else:
+      shoe = Shoe(shoe_config.get("decks", 4), seed = seed, shuffle = _shuffle(shoe_config.get("shuffle")), cut_card = cut_card)
+  players = [BlackjackPlayer(seat["name"], chips = seat["chips"], strategy = _strategy(seat["strategy"], seat["params"]))
+             for seat in config["seats"]]
+  seating = [p for p, seat in zip(players, config["seats"]) for _ in range(seat["spots"])]
+  game = Table(seating, Rules(**config["rules"]), shoe = shoe, verbose = False,
+               dealer_last = config["table"].get("dealer_last", False))
+
+  totals = {p: np.zeros(4) for p in players}   # rounds, sum of nets, sum of squares, sum of bets
+  for _ in range(rounds):
+      if not game._active_players:   # the house's chips don't end a block: it has no bankroll here
+          break
+      seated = {spot.player for spot in game._active_players}
+      before = {p: p.chips for p in seated}
+      game.play_round()
+      wagered = Counter()
+      for spot, bet in game._round_bets.items():
+          wagered[spot.player] += bet
+      for p in seated:
+          net = p.chips - before[p]
+          totals[p] += (1, net, net * net, wagered[p])
+
+  owner = {spot.name: spot.player.name for spot in game._seats}
+  outcomes = Counter((owner.get(r["player"]), r["outcome"]) for r in game._round_results)
+  return [{"seed": seed, "player": p.name, "rounds": int(t[0]), "net": t[1], "net_sq": t[2], "wagered": t[3],
+           **{o: outcomes[p.name, o] for o in OUTCOMES}}
+          for p, t in totals.items()]
+
+
+COLUMNS = ["rounds", "net", "net_sq", "wagered", *OUTCOMES]   # numeric columns of a `play_block` row
+
+def _play_shared(config:Dict, seed:int, rounds:int, block:int) -> None:
+  """`play_block` in a pool worker: the rows go into the shared `blocks` buffer, not back through a pipe."""
+  rows = play_block(config, seed, rounds, block)
+  worker_tables()["blocks"][block] = [[row[c] for c in COLUMNS] for row in rows]
+
+
+def summarize_blocks(blocks:pd.DataFrame, z:float = 1.96) -> pd.DataFrame:
+  """Per-seat EV per round and per unit wagered, with a z-confidence interval, from `play_block` rows."""
+  totals = blocks.groupby("player", sort=False)[COLUMNS].sum()
+  n = totals["rounds"]
+  ev = totals["net"] / n
+  sd = np.sqrt(np.maximum(totals["net_sq"] / n - ev * ev, 0) * n / (n - 1).clip(lower=1))
+  half = z * sd / np.sqrt(n)
+  out = pd.DataFrame({"rounds": n, "ev": ev, "sd": sd, "ci_low": ev - half, "ci_high": ev + half,
+                      "ev_per_unit": totals["net"] / totals["wagered"]})
+  return out.join(totals[list(OUTCOMES)].div(n, axis=0))
+
+
+def sweep(config:Dict, out = sys.stderr) -> pd.DataFrame:
+  """
+  Play the configured table over `blocks` independent shoes on `workers`
+  processes, printing progress as blocks finish. Returns one row per block
+  and seat.
+  """
+  blocks = config["blocks"]
+  per_block = math.ceil(config["rounds"] / blocks)
+  seeds = np.random.SeedSequence(config["seed"]).generate_state(blocks, dtype=np.uint64).tolist()
+  rows, played, start = [], 0, time.perf_counter()
+
+  def progress(done):
+      spent = time.perf_counter() - start
+      rate = played / spent if spent else 0.0
+      eta = (blocks - done) * per_block / rate if rate else math.inf
+      print(f"[{done:>{len(str(blocks))}}/{blocks}] {played:,} rounds  {rate:,.0f} rounds/s  eta {eta:,.0f} s",
+            file=out, flush=True)
+
+  if config["workers"] == 0:
+      for done, seed in enumerate(seeds, 1):
+          block = play_block(config, seed, per_block, done - 1)
+          rows += block
+          played += max(row["rounds"] for row in block)   # fewer than per_block once every seat is broke
+          progress(done)
+  else:
+      names = [seat["name"] for seat in config["seats"]]
+      with SharedTables() as store:
+          results = store.buffer("blocks", (blocks, len(names), len(COLUMNS)))
+          with ProcessPoolExecutor(config["workers"], initializer=worker_init, initargs=(store.spec(),)) as pool:
+              futures = {pool.submit(_play_shared, config, seed, per_block, block): block for block, seed in enumerate(seeds)}
+              for done, future in enumerate(as_completed(futures), 1):
+                  future.result()
+                  played += int(results[futures[future], :, 0].max())
+                  progress(done)
+          rows = [{"seed": seed, "player": name, **dict(zip(COLUMNS, values))}
+                  for seed, block in zip(seeds, results) for name, values in zip(names, block.tolist())]
+      counts = [c for c in COLUMNS if c not in ("net", "net_sq", "wagered")]
+      return pd.DataFrame(rows).astype(dict.fromkeys(counts, np.int64))
+  return pd.DataFrame(rows)
+
+
+def main(argv = None):
+  parser = argparse.ArgumentParser(description = "Run a headless Blackjack simulation sweep from a config file.")
+  parser.add_argument("config", help = "TOML or YAML config")
+  parser.add_argument("--rounds", type = int, help = "rounds per seat (overrides the config)")
+  parser.add_argument("--blocks", type = int, help = "independent shoes (overrides the config)")
+  parser.add_argument("--workers", type = int, help = "worker processes, 0 = in this process (overrides the config)")
+  parser.add_argument("--seed", type = int, help = "master seed (overrides the config)")
+  parser.add_argument("--out", help = "output directory (overrides the config)")
+  args = parser.parse_args(argv)
+
+  config = load_config(args.config)
+  for key, value in (("rounds", args.rounds), ("blocks", args.blocks), ("workers", args.workers),
+                     ("seed", args.seed), ("output", args.out)):
+      if value is not None:
+          config[key] = value
+
+  start = time.perf_counter()
+  blocks = sweep(config)
+  summary = summarize_blocks(blocks)
+
+  output = Path(config["output"])
+  output.mkdir(parents = True, exist_ok = True)
+  blocks.to_csv(output / "blocks.csv", index = False)
+  summary.to_csv(output / "summary.csv")
+  (output / "config.json").write_text(json.dumps(config, indent = 2))
+
+  spent = time.perf_counter() - start
+  print(f"{int(summary['rounds'].max()):,} rounds in {spent:.1f} s; results in {output}/", file = sys.stderr)
+  with pd.option_context("display.float_format", "{:.4f}".format, "display.width", 200, "display.max_columns", None):
+      print(summary)
+  return summary
+
+
 if __name__ == '__main__':
-  batched_run()
-  
+  main()
@@ -0,0 +1,84 @@
+import numpy as np
+from functools import lru_cache
+
+# Columns of a dealer outcome table: final totals 17..21, then bust.
+OUTCOMES = (17, 18, 19, 20, 21, "bust")
+
+# Hi-Lo tag for each card value (index 0 = ace, 9 = tens).
+HILO_TAGS = np.array([-1, 1, 1, 1, 1, 1, 0, 0, 0, -1])
+ONE_DECK = np.array([4] * 9 + [16])
+
+
+def true_count(pool) -> float:
+    """Hi-Lo true count seen from the cards still in the shoe."""
+    pool = np.asarray(pool)
+    decks_left = pool.sum() / 52
+    if decks_left <= 0:
+        return 0.0
+    return float(-(HILO_TAGS * pool).sum() / decks_left)
+
+
+def count_bucket(pool, lo:int = -10, hi:int = 10) -> int:
+    """True count rounded and clipped to [lo, hi], used to key cached tables."""
+    return int(np.clip(round(true_count(pool)), lo, hi))
+
+
+def bucket_composition(num_decks:int, bucket:int) -> np.ndarray:
+    """
+    A representative shoe for a true-count bucket: every deck has `bucket / 2`
+    fewer low cards (2-6) and `bucket / 2` more high cards (10, A) than a fresh
+    deck. Counts are fractional, which is fine for probabilities.
+    """
+    per_deck = ONE_DECK.astype(float)
+    low, high = HILO_TAGS == 1, HILO_TAGS == -1
+    per_deck[low] *= (20 - bucket / 2) / 20
+    per_deck[high] *= (20 + bucket / 2) / 20
+    return per_deck * num_decks
+
+
+def dealer_outcomes(pool, hit_soft_17:bool = False) -> np.ndarray:
+    """
+    Probability of each dealer result in `OUTCOMES` for every up card (rows,
+    ace first), drawing from `pool` with replacement. The dealer hits below 17
+    and stands on soft 17 unless `hit_soft_17`, like `DealerStrategy`.
+    """
+    p = np.asarray(pool, dtype=float)
+    p = p / p.sum()
+
+    @lru_cache(maxsize=None)
+    def finish(hard, soft):
+        total = hard + 10 if soft and hard + 10 <= 21 else hard
+        out = np.zeros(len(OUTCOMES))
+        if total > 21:
+            out[-1] = 1.0
+        elif total > 17 or (total == 17 and not (hit_soft_17 and total != hard)):
+            out[total - 17] = 1.0
+        else:
+            for v in range(1, 11):
+                if p[v - 1]:
+                    out += p[v - 1] * finish(hard + v, soft or v == 1)
+        return out
+
+    return np.array([finish(up, up == 1) for up in range(1, 11)])
+
+
+def stand_ev(dealer:np.ndarray) -> np.ndarray:
+    """Expected result of standing on each total 0..21 (rows) against each up card."""
+    ev = np.empty((22, dealer.shape[0]))
+    finals = np.array(OUTCOMES[:-1])
+    for total in range(22):
+        win = dealer[:, -1] + dealer[:, :-1] @ (finals < total)
+        lose = dealer[:, :-1] @ (finals > total)
+        ev[total] = win - lose
+    return ev
+
+
+def _dealer_table(rules, num_decks, bucket):
+    return dealer_outcomes(bucket_composition(num_decks, bucket), rules.hit_soft_17)
+
+
+# Builders for tables served by `cache.TableCache`; each takes (rules, num_decks, bucket).
+TABLES = {
+    "dealer_outcomes": _dealer_table,
+    "stand_ev": lambda rules, num_decks, bucket: stand_ev(_dealer_table(rules, num_decks, bucket)),
+}
@@ -5,15 +5,18 @@ from IPython.display import HTML, DisplayHandle, display
 from .cards import Hand
 from .playingcards import PlayingCard
 from .strategy import Strategy, DealerStrategy
+from .rules import Rules, DEFAULT_RULES
 from ._utils import flash_line
 
 class Participant:
   def __init__(self, name:str, chips:int):
     self.name, self.chips = name, chips
     self._hand = Hand()
-    self.display_handle = display(DisplayHandle(), display_id=True) # display_id=True automatically generates a unique id
+    self._display_handle = None   # created on first redraw, so headless games print nothing
+    self.show = True   # redraw the scoreboard as the hand changes
     self._scoreboard = None
     self.current_bet = 0
+    self.insurance = 0
     self._settled = True
     self._skip_rounds = False
     self._skip_game = False
@@ -31,6 +34,12 @@ class Participant:
     
   def _set_scoreboard(self, commands:Dict) -> None: self._scoreboard = pd.DataFrame([commands])
   def _add_scoreboard(self, commands:Dict) -> None: self._scoreboard = pd.concat([self._scoreboard, self._set_scoreboard(commands)])
+  @property
+  def display_handle(self) -> DisplayHandle:
+      if self._display_handle is None:
+          self._display_handle = display(DisplayHandle(), display_id=True) # display_id=True automatically generates a unique id
+      return self._display_handle
+
   def _update_display(self) -> None: self.display_handle.update(HTML(self._scoreboard.to_html(escape=False)))
 
   def _bet(self, bet:int) -> int:
@@ -42,6 +51,7 @@ class Participant:
   def reset(self) -> None:
       self._hand.reset()
       self.current_bet = 0
+      self.insurance = 0
       self._settled = True
       self._skip_rounds = False
 
@@ -75,12 +85,38 @@ class BlackjackPlayer(Participant):
     super().__init__(name, chips)
     self._strategy = strategy(self)       
     self._lost = False
+    self.was_split = False
+    self.split_aces = False
     
   def has_strategy(self) -> bool: return bool(self._strategy)
   @property
   def strategy(self): return self._strategy
   def stand(self) -> None: self._skip_rounds = True
-  def bet(self, bid) -> int: return super()._bet(bid) 
+  def bet(self, bid) -> int:
+      """Bet `bid`, or every whole chip left if that is all there is."""
+      return super()._bet(min(bid, max(int(self.chips), 0)))
+
+  def double(self) -> int:
+      """Put up a second bet equal to the first; returns the extra chips."""
+      extra = self.current_bet
+      self.chips -= extra
+      self.current_bet += extra
+      return extra
+
+  def insure(self) -> int:
+      """Side bet of half the wager against a dealer blackjack."""
+      self.insurance = self.current_bet / 2
+      self.chips -= self.insurance
+      return self.insurance
+
+  def split(self) -> "SplitHand":
+      """Move the second card to a new hand with a matching bet."""
+      self.was_split = True
+      self.split_aces = self._hand[0].rank == "A"
+      return SplitHand(self, self._hand.pop())
+
+  @property
+  def owner(self) -> "BlackjackPlayer": return self
 
   def _add_scoreboard(self) -> None: super()._add_scoreboard({
             "Names": self.name,
@@ -91,8 +127,9 @@ class BlackjackPlayer(Participant):
         })
   
   def is_blackjack(self) -> bool: return len(self._hand) == 2 and self.true_score == 21
-  def is_bust(self): return self._hand > 21
-  def is_21(self): return self._hand == 21
+  def is_natural(self) -> bool: return not self.was_split and self.is_blackjack()
+  def is_bust(self): return self._hand.score > 21
+  def is_21(self): return self._hand.score == 21
 
   @property
   def _stood(self) -> bool: return self._skip_rounds
@@ -102,10 +139,11 @@ class BlackjackPlayer(Participant):
       if self.is_bust():
           self._lost = True
           self.settle()
-      self.display()
       return card
 
   def display(self) -> None :
+    if not self.show:
+        return
     super()._set_scoreboard({
             "Names": self.name,
             "Hands": self.get_hand(),
@@ -121,6 +159,10 @@ class BlackjackPlayer(Participant):
           if verbose:
               flash_line(f"{self.name} has lost, skipping...")
           return True
+      if self.is_settled() and not self.is_21():
+          if verbose:
+              flash_line(f"{self.name} has surrendered, skipping...")
+          return True
       if not self.is_waiting() and self.is_21():
           if verbose: 
               flash_line(f"{self.name} has already won blackjack, skipping...")
@@ -138,35 +180,63 @@ class BlackjackPlayer(Participant):
   def reset(self) -> None:
       super().reset()
       self._lost = False
+      self.was_split = False
+      self.split_aces = False
+
+  def next_face_down(self) -> bool:
+      """Whether the next card dealt goes face down (the dealer's hole card)."""
+      return False
 
   def _get_up_card(self): pass
   def _get_hole_card(self): pass
   def peek(self): pass
   def reveal(self): pass
 
+class SplitHand(BlackjackPlayer):
+    """
+    A hand created by splitting. It plays like a player of its own, with a
+    copy of the owner's strategy, but its chips are the owner's chips.
+    """
+    def __init__(self, owner:BlackjackPlayer, card:PlayingCard):
+        self._owner = owner.owner
+        super().__init__(owner.name, self._owner.chips, lambda p: owner.strategy.for_player(p))
+        self.was_split = True
+        self.split_aces = owner.split_aces
+        self.show = owner.show
+        self._hand.add(card)
+        self._bet(owner.current_bet)
+
+    @property
+    def chips(self): return self._owner.chips
+    @chips.setter
+    def chips(self, value): self._owner.chips = value
+    @property
+    def owner(self) -> BlackjackPlayer: return self._owner
+
+
 class Dealer(BlackjackPlayer):
-    def __init__(self):
+    def __init__(self, rules:Rules = DEFAULT_RULES):
         super().__init__("Dealer", 10000, DealerStrategy)
+        self.rules = rules
         self._reveal = False
 
+    def next_face_down(self) -> bool: return len(self._hand) == 1 and not self._reveal
+
     def hit(self, card:PlayingCard):
-        if len(self._hand) == 1 and not self._reveal: card.hide()
-        super().hit(card)
+        if self.next_face_down(): card.hide()
+        return super().hit(card)
 
     def _get_up_card(self) -> PlayingCard: return self._hand[0]
     def _get_hole_card(self) -> PlayingCard: return self._hand[1]
+    def is_playing(self) -> bool: return not self._skip_rounds and not self.is_bust()
 
-    def settle(self, winnings = 0):
-        super().settle(winnings)
-        flash_line("Game Over")
-    
     def reset(self):
         super().reset()
         self._reveal = False
     
 
     def peek(self) -> bool:
-        if self._get_up_card().name in ["10", "ace"] and self._hand.scoring_algorithm(False).__contains__(21):
+        if self._get_up_card().values[0] in (1, 10) and self._hand.scoring_algorithm(False).__contains__(21):
             self.reveal()
             return True
         return False
@@ -177,3 +247,24 @@ class Dealer(BlackjackPlayer):
         if self.is_bust(): 
           self._lost = True
         return card
+
+
+class Spot(BlackjackPlayer):
+    """
+    One of the seats a player takes at a `Table`: a hand of its own, with
+    its own copy of the player's strategy, betting from the player's chips.
+    What the seat wins or loses is also added to `nets[seat]`, the table's
+    per-seat ledger.
+    """
+    def __init__(self, player:BlackjackPlayer, name:str, nets, seat:int):
+        self._player, self._nets, self._seat = player, nets, seat
+        super().__init__(name, player.chips, lambda p: player.strategy.for_seat(p))
+
+    @property
+    def player(self) -> BlackjackPlayer: return self._player
+    @property
+    def chips(self): return self._player.chips
+    @chips.setter
+    def chips(self, value):
+        self._nets[self._seat] += value - self._player.chips
+        self._player.chips = value
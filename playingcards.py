@@ -1,5 +1,6 @@
 from pathlib import Path
 from typing import Optional
+from ._utils import CardInfo
 
 ROOT = Path(__file__).parent.resolve()
 
@@ -70,6 +71,8 @@ class PlayingCard():
   @property
   def rank(self): return self._rank
   @property
+  def id(self): return CardInfo.IDS[self._code]
+  @property
   def values(self): return self._comparer.get_values(self)
   @property
   def faceup(self): return self._faceup
@@ -0,0 +1,279 @@
+"""
+Binary round log.
+
+A log is two append-only files. `<path>` holds one record per round:
+
+    HEADER                  game, shoe seed, shoe number, seat count, event count, flags
+    bets    int32[seats]    opening bet of every seat (0 = sat out)
+    owners  int8[seats]     with TABLE: who sits in every seat (`Table.owners`)
+    net     float64[seats]  chips won or lost by every seat
+    events  EVENT[events]   cards dealt and decisions taken, in order
+
+The flags say how the round was dealt, so it can be played again exactly:
+DEALER_LAST if the dealer takes the opening cards after the seats, TABLE
+if it was a `Table`, whose seats are spots of the players in `owners`.
+
+`<path>.idx` holds one (game, offset) INDEX entry per record, so a round is
+found by game number with a binary search and decoded straight out of the
+memory-mapped file.
+"""
+import os
+import numpy as np
+
+from collections import deque, namedtuple
+from typing import List, Optional
+
+from ._utils import CardInfo
+from .cards import Shoe, Deck, Stats
+from .playingcards import PlayingCard, BlackjackCardComparer
+from .rules import Rules, DEFAULT_RULES, ACTIONS, INSURANCE, SPLIT, DOUBLE, SURRENDER
+from .shared import card_tables
+from .strategy import Strategy
+from .game import Blackjack, Table, DEALER_SEAT
+from .participants import BlackjackPlayer
+
+HEADER = np.dtype([("game", "<u4"), ("seed", "<u8"), ("shoe", "<u4"), ("seats", "u1"), ("events", "<u2"), ("flags", "u1")])
+EVENT = np.dtype([("kind", "u1"), ("seat", "u1"), ("hand", "u1"), ("value", "u1")])
+INDEX = np.dtype([("game", "<u4"), ("offset", "<u8")])
+
+CARD, ACTION = 0, 1
+DEALER_LAST, TABLE = 1, 2   # HEADER flags
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS + (INSURANCE,))}
+CODE_ACTIONS = ACTIONS + (INSURANCE,)
+CARD_VALUES = card_tables()["card_values"]
+
+Round = namedtuple("Round", ["game", "seed", "shoe", "bets", "net", "events", "dealer_last", "owners"])   # owners: None unless a Table
+
+
+class RoundLog:
+  """Writer side: pass one to `Game(log=...)` and every round is appended."""
+  def __init__(self, path):
+      self._path = str(path)
+      self._data = open(self._path, "ab")
+      self._index = open(self._path + ".idx", "ab")
+      self._offset = self._data.tell()
+      self._events = []
+
+  def begin(self, game:int, seed:int, shoe:int, chips:List, dealer_last:bool = False, owners = None) -> None:
+      self._header = (game, seed & 0xFFFFFFFFFFFFFFFF, shoe, len(chips))
+      self._flags = (DEALER_LAST if dealer_last else 0) | (TABLE if owners is not None else 0)
+      self._owners = b"" if owners is None else np.asarray(owners, dtype=np.int8).tobytes()
+      self._chips = list(chips)
+      self._bets = [0] * len(chips)
+      self._events = []
+
+  def bet(self, seat:int, amount) -> None: self._bets[seat] = amount
+  def card(self, seat:int, hand:int, card_id:int) -> None: self._events.append((CARD, seat, hand, card_id))
+  def action(self, seat:int, hand:int, action:str) -> None: self._events.append((ACTION, seat, hand, ACTION_CODES[action]))
+
+  def end(self, chips:List) -> None:
+      net = [after - before for before, after in zip(self._chips, chips)]
+      record = b"".join((
+          np.array([(*self._header, len(self._events), self._flags)], dtype=HEADER).tobytes(),
+          np.array(self._bets, dtype="<i4").tobytes(),
+          self._owners,
+          np.array(net, dtype="<f8").tobytes(),
+          np.array(self._events, dtype=EVENT).tobytes(),
+      ))
+      self._data.write(record)
+      self._index.write(np.array([(self._header[0], self._offset)], dtype=INDEX).tobytes())
+      self._offset += len(record)
+
+  def flush(self) -> None:
+      self._data.flush()
+      self._index.flush()
+
+  def close(self) -> None:
+      self._data.close()
+      self._index.close()
+
+  def __enter__(self): return self
+  def __exit__(self, *exc): self.close()
+
+
+def _memmap(path, dtype):
+  if not os.path.exists(path) or os.path.getsize(path) == 0:
+      return np.zeros(0, dtype=dtype)
+  return np.memmap(path, dtype=dtype, mode="r")
+
+
+class RoundReader:
+  """Reader side: memory-maps a log; `reader[i]` is the i-th record, `find(game)` looks one up by game number."""
+  def __init__(self, path):
+      self._data = _memmap(str(path), np.uint8)
+      self._index = _memmap(str(path) + ".idx", INDEX)
+
+  def __len__(self): return len(self._index)
+  def __iter__(self): return (self[i] for i in range(len(self)))
+
+  def __getitem__(self, i:int) -> Round:
+      offset = int(self._index["offset"][i])
+      header = np.frombuffer(self._data, HEADER, 1, offset)[0]
+      seats, events, flags = int(header["seats"]), int(header["events"]), int(header["flags"])
+      offset += HEADER.itemsize
+      bets = np.frombuffer(self._data, "<i4", seats, offset)
+      offset += 4 * seats
+      owners = None
+      if flags & TABLE:
+          owners = np.frombuffer(self._data, np.int8, seats, offset)
+          offset += seats
+      net = np.frombuffer(self._data, "<f8", seats, offset)
+      offset += 8 * seats
+      return Round(int(header["game"]), int(header["seed"]), int(header["shoe"]), bets, net,
+                   np.frombuffer(self._data, EVENT, events, offset), bool(flags & DEALER_LAST), owners)
+
+  def find(self, game:int) -> Round:
+      games = self._index["game"]
+      i = int(np.searchsorted(games, game))
+      if i >= len(games) or games[i] != game:
+          matches = np.nonzero(games == game)[0]   # log appended from several games
+          if not len(matches):
+              raise KeyError(f"game {game} is not in the log")
+          i = int(matches[0])
+      return self[i]
+
+
+def _total(values):
+  hard = sum(values)
+  return hard + 10 if 1 in values and hard + 10 <= 21 else hard
+
+
+class ScriptedShoe(Shoe):
+  """A shoe that deals exactly the given card ids, in order."""
+  def __init__(self, card_ids):
+      Deck.__init__(self, build=False, comparer=BlackjackCardComparer)
+      self._num_decks, self._shoes = 0, 0
+      self._physical = [PlayingCard(*CardInfo.INFO[i], comparer=BlackjackCardComparer) for i in reversed(card_ids)]
+      self._undealt, self._round = [], []
+      self._history = self._new_history(1)
+      self._track()
+      self._load(np.arange(len(self._physical)), [])
+      self._stats = Stats(self._cards, self._values_left)
+
+  def end_round(self): pass
+
+
+class ScriptedStrategy(Strategy):
+  """
+  Replays recorded bets and decisions for one seat instead of deciding.
+  `bets` are the round's bets by seat; at a `Table` the player's copy for
+  each spot takes the spot's seat.
+  """
+  def __init__(self, player, seat:Optional[int], bets, script:deque):
+      super().__init__(player, _is_strategy = True)
+      self._seat, self._bets, self._script = seat, bets, script
+
+  def for_seat(self, player):
+      strategy = super().for_seat(player)
+      strategy._seat = player._seat
+      return strategy
+
+  def autobet(self, deck): return self._player.bet(int(self._bets[self._seat]))
+
+  def insure(self, deck) -> bool:
+      if self._script and self._script[0] == (self._seat, INSURANCE):
+          self._script.popleft()
+          return True
+      return False
+
+  def decide(self, deck, verbose = False):
+      seat, action = self._script.popleft()
+      if seat != self._seat:
+          raise RuntimeError(f"replay diverged: seat {self._seat} acted, log expects seat {seat}")
+      return action
+
+
+class Replayer:
+  """
+  Re-simulates logged rounds without any strategy logic.
+
+  `audit()` rebuilds every hand from the logged cards and decisions and
+  settles it directly, which is far cheaper than playing the round.
+  `reexecute()` plays the round again through the engine that logged it,
+  a `Blackjack` or a `Table` dealt in the same order, with the logged
+  cards and decisions, as a check of the engine itself.
+  """
+  def __init__(self, reader:RoundReader, rules:Rules = DEFAULT_RULES):
+      self._reader = reader
+      self._rules = rules
+
+  def audit(self, rnd:Round) -> np.ndarray:
+      """Net result of every seat, recomputed from the logged events."""
+      rules = self._rules
+      hands, bets, surrendered = {}, {}, set()
+      insurance = np.zeros(len(rnd.bets))
+      for kind, seat, hand, value in rnd.events.tolist():
+          if kind == CARD:
+              hands.setdefault((seat, hand), []).append(int(CARD_VALUES[value]))
+              bets.setdefault((seat, hand), int(rnd.bets[seat]) if seat != DEALER_SEAT else 0)
+              continue
+          action = CODE_ACTIONS[value]
+          if action == SPLIT:
+              new = (seat, sum(1 for s, _ in hands if s == seat))
+              hands[new] = [hands[(seat, hand)].pop()]
+              bets[new] = bets[(seat, hand)]
+          elif action == DOUBLE:
+              bets[(seat, hand)] *= 2
+          elif action == SURRENDER:
+              surrendered.add((seat, hand))
+          elif action == INSURANCE:
+              insurance[seat] = rnd.bets[seat] / 2
+
+      dealer = hands.pop((DEALER_SEAT, 0), [])
+      dealer_total = _total(dealer)
+      dealer_bj = len(dealer) == 2 and dealer_total == 21
+      naturals = {key for key, cards in hands.items() if key[1] == 0 and len(cards) == 2 and _total(cards) == 21
+                  and not any(s == key[0] and h > 0 for s, h in hands)}
+      net = -insurance
+      if dealer_bj and rules.peek:
+          net += 3 * insurance
+          for key in hands:
+              outcome = "push" if key in naturals else "lose"
+              net[key[0]] += rules.payout(outcome, bets[key]) - bets[key]
+          return net
+
+      for key, cards in hands.items():
+          total = _total(cards)
+          if key in naturals:
+              outcome = "push" if dealer_bj else "blackjack"
+          elif key in surrendered:
+              outcome = "surrender"
+          elif total > 21 or dealer_bj:
+              outcome = "lose"
+          elif dealer_total > 21 or total > dealer_total:
+              outcome = "win"
+          else:
+              outcome = "push" if total == dealer_total else "lose"
+          net[key[0]] += rules.payout(outcome, bets[key]) - bets[key]
+      return net
+
+  def mismatches(self, atol:float = 1e-9) -> List[int]:
+      """Game numbers whose recomputed result differs from the logged one."""
+      return [rnd.game for rnd in self._reader if not np.allclose(self.audit(rnd), rnd.net, atol=atol)]
+
+  def reexecute(self, rnd:Round) -> np.ndarray:
+      """Play `rnd` again through the engine; returns the net result of every seat."""
+      cards = [int(value) for kind, _, _, value in rnd.events.tolist() if kind == CARD]
+      script = deque((int(seat), CODE_ACTIONS[value]) for kind, seat, _, value in rnd.events.tolist() if kind == ACTION)
+      bets = rnd.bets.tolist()
+      played = {seat for _, seat, _, _ in rnd.events.tolist() if seat != DEALER_SEAT}   # a broke spot still plays, for 0
+      shoe = ScriptedShoe(cards)
+      if rnd.owners is not None:
+          owners = rnd.owners.tolist()
+          players = [BlackjackPlayer(f"Player {i}", chips = 10 * sum(b for o, b in zip(owners, bets) if o == i),
+                                     strategy = lambda p: ScriptedStrategy(p, None, bets, script))
+                     for i in range(max(owners, default = -1) + 1)]
+          table = Table([players[o] if seat in played else None for seat, o in enumerate(owners)], self._rules,
+                        shoe = shoe, verbose = False, dealer_last = rnd.dealer_last)
+          table.play_round()
+          return table.nets.copy()
+
+      seats = sorted(played)
+      players = [BlackjackPlayer(f"Seat {seat}", chips = 10 * bets[seat],
+                                 strategy = lambda p, seat=seat: ScriptedStrategy(p, seat, bets, script))
+                 for seat in seats]
+      before = [p.chips for p in players]
+      Blackjack(players, self._rules, shoe = shoe, verbose = False, dealer_last = rnd.dealer_last).play_round()
+      net = np.zeros(len(bets))
+      net[seats] = [p.chips - b for p, b in zip(players, before)]
+      return net
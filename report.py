@@ -0,0 +1,211 @@
+"""
+Static HTML reports of simulation runs.
+
+A `RunReport` is a snapshot of a run: round outcomes, net results, phase
+timings and strategy settings, copied out of the game so it can be handed
+to another thread or process. `render()` turns it into one self-contained
+HTML page (charts are inline PNGs, downsampled to a few hundred points).
+`ReportWriter` renders and writes reports in the background, so the
+simulation never waits on matplotlib.
+"""
+import base64
+import html
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from matplotlib.figure import Figure
+
+from .analytics import log_results, summarize
+from .rules import OUTCOMES
+
+
+def describe(strategy) -> str:
+  """Class name and plain settings of a strategy, e.g. `MonteCarloStrategy(batch=256, z=1.96)`."""
+  settings = {k.lstrip("_"): v for k, v in vars(strategy).items()
+              if isinstance(v, (bool, int, float, str, type(None))) and k.lstrip("_") not in ("is_strategy",)}
+  return f"{type(strategy).__name__}({', '.join(f'{k}={v!r}' for k, v in settings.items())})"
+
+
+class RunReport:
+  """
+  Everything a report shows, detached from the live game.
+
+  `outcomes` are `Game._round_results` style records (or a DataFrame of
+  them); `nets` maps a player to its net result per round. Net results can
+  also come from `log`, a `replay.RoundReader`, with `seats` mapping
+  player names to seats; they are then read when the report is rendered,
+  off the simulation's thread.
+  """
+  def __init__(self, title:str, outcomes, nets:Optional[Dict[str, np.ndarray]] = None,
+               timings:Optional[Dict[str, float]] = None, rounds:int = 0, elapsed:Optional[float] = None,
+               configs:Optional[Dict[str, str]] = None, log = None, seats:Optional[Dict[str, int]] = None):
+      self.title = title
+      self.outcomes = outcomes
+      self.nets = nets or {}
+      self.timings = timings   # None: the game was not timed
+      self.rounds = rounds
+      self.elapsed = elapsed
+      self.configs = configs or {}
+      self.created = time.time()
+      self._log, self._seats = log, seats or {}
+
+  @classmethod
+  def from_game(cls, game, title:str = "Simulation run", log = None, elapsed:Optional[float] = None) -> "RunReport":
+      """
+      Snapshot `game`; only shallow copies are made here. Pass a
+      `replay.RoundReader` of its log as `log` to include net results (EV
+      tables, bankroll charts); outcomes alone give win rates. Phase
+      timings are only reported for a game built with `timed=True` (or
+      verbose); the game itself is left as it is.
+      """
+      timings = dict(game._timings) if game.timed else None
+      return cls(title, list(game._round_results), None, timings, game._game, elapsed,
+                 {player.name: describe(player.strategy) for player in game._seats},
+                 log, {player.name: seat for player, seat in game._seats.items()})
+
+  def load(self) -> "RunReport":
+      """Read net results from the log, if one was given."""
+      if self._log is not None:
+          self.nets = {**{name: log_results(self._log, seat)[0] for name, seat in self._seats.items()}, **self.nets}
+          self._log = None
+      return self
+
+
+def _downsample(y:np.ndarray, points:int) -> (np.ndarray, np.ndarray):
+  x = np.arange(1, len(y) + 1)
+  if len(y) <= points:
+      return x, y
+  idx = np.linspace(0, len(y) - 1, points).astype(int)
+  return x[idx], y[idx]
+
+
+def _chart(series:Dict[str, np.ndarray], ylabel:str, points:int) -> str:
+  fig = Figure(figsize=(7, 3))
+  ax = fig.subplots()
+  for name, y in series.items():
+      ax.plot(*_downsample(np.asarray(y, dtype=float), points), label=name)
+  ax.set_xlabel("Round")
+  ax.set_ylabel(ylabel)
+  ax.legend()
+  fig.tight_layout()
+  buf = io.BytesIO()
+  fig.savefig(buf, format="png")
+  return f'<img src="data:image/png;base64,{base64.b64encode(buf.getvalue()).decode()}">'
+
+
+def outcome_table(outcomes:pd.DataFrame) -> pd.DataFrame:
+  """Share of each outcome per player."""
+  if outcomes.empty:
+      return pd.DataFrame()
+  counts = pd.crosstab(outcomes["player"], outcomes["outcome"])
+  table = counts.div(counts.sum(axis=1), axis=0).reindex(columns=[o for o in OUTCOMES if o in counts])
+  table.insert(0, "rounds", counts.sum(axis=1))
+  return table
+
+
+def ev_table(nets:Dict[str, np.ndarray], z:float = 1.96) -> pd.DataFrame:
+  rows = []
+  for name, values in nets.items():
+      if not len(values):
+          continue
+      s = summarize(values)
+      half = z * s["sd"] / np.sqrt(s["rounds"])
+      rows.append({"player": name, **s, "ci_low": s["ev"] - half, "ci_high": s["ev"] + half})
+  return pd.DataFrame(rows).set_index("player") if rows else pd.DataFrame()
+
+
+def timing_table(timings:Dict[str, float], rounds:int) -> pd.DataFrame:
+  total = sum(timings.values())
+  return pd.DataFrame({
+      "seconds": timings,
+      "share": {k: v / total if total else 0.0 for k, v in timings.items()},
+      "us_per_round": {k: 1e6 * v / rounds if rounds else 0.0 for k, v in timings.items()},
+  })
+
+
+def render(report:RunReport, points:int = 500) -> str:
+  """The report as one HTML page."""
+  report.load()
+  outcomes = pd.DataFrame(report.outcomes)
+  spent = report.elapsed if report.elapsed is not None else sum((report.timings or {}).values())
+  parts = [
+      f"<h1>{html.escape(report.title)}</h1>",
+      f"<p>Generated {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report.created))}. "
+      f"{report.rounds:,} rounds in {spent:.1f} s ({report.rounds / spent if spent else 0:,.0f} rounds/s).</p>",
+  ]
+  if report.configs:
+      configs = pd.DataFrame({"strategy": report.configs})
+      parts += ["<h2>Strategies</h2>", configs.to_html()]
+  if report.nets:
+      parts += ["<h2>Expected value</h2>", ev_table(report.nets).to_html(float_format="%.4f"),
+                _chart({name: np.cumsum(v) for name, v in report.nets.items()}, "Net chips", points)]
+  if not outcomes.empty:
+      players = outcomes[outcomes["player"].isin(list(report.configs) or outcomes["player"].unique())]
+      wins = players.assign(win=players["outcome"].isin(["win", "blackjack"]))
+      rates = {name: g["win"].cumsum().to_numpy() / np.arange(1, len(g) + 1) for name, g in wins.groupby("player")}
+      parts += ["<h2>Outcomes</h2>", outcome_table(players).to_html(float_format="%.3f"), _chart(rates, "Win rate", points)]
+  if report.timings is None:
+      parts += ["<h2>Time per phase</h2>", "<p>Not available: the game was not timed (build it with <code>timed=True</code>).</p>"]
+  elif report.timings:
+      parts += ["<h2>Time per phase</h2>", timing_table(report.timings, report.rounds).to_html(float_format="%.3f")]
+  style = "body{font-family:sans-serif;max-width:60em;margin:auto}table{border-collapse:collapse}td,th{padding:2px 8px}"
+  return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(report.title)}</title>" \
+         f"<style>{style}</style></head><body>{''.join(parts)}</body></html>"
+
+
+def write(report:RunReport, path, points:int = 500) -> Path:
+  """Render `report` to `path`, atomically: readers never see half a file."""
+  path = Path(path)
+  path.parent.mkdir(parents=True, exist_ok=True)
+  fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+  try:
+      with os.fdopen(fd, "w", encoding="utf-8") as f:
+          f.write(render(report, points))
+      os.chmod(tmp, 0o644)
+      os.replace(tmp, path)
+  except BaseException:
+      os.unlink(tmp)
+      raise
+  return path
+
+
+class ReportWriter:
+  """
+  Writes reports to `path` in the background.
+
+  `submit()` returns at once; rendering runs on one worker thread, or in a
+  worker process with `processes=True` to keep it off the simulation's GIL.
+  A report still waiting when a newer one is submitted is skipped.
+
+  Example usage:
+  -------------------
+  with ReportWriter("out/report.html") as writer:
+      for _ in range(100):
+          for _ in range(1000): game.play_round()
+          writer.submit(RunReport.from_game(game, log = reader))
+  -------------------
+  """
+  def __init__(self, path, points:int = 500, processes:bool = False):
+      self._path = Path(path)
+      self._points = points
+      self._pool = ProcessPoolExecutor(1) if processes else ThreadPoolExecutor(1, thread_name_prefix="report")
+      self._pending: Optional[Future] = None
+
+  def submit(self, report:RunReport) -> Future:
+      if self._pending is not None:
+          self._pending.cancel()   # only succeeds if it hasn't started yet
+      self._pending = self._pool.submit(write, report, self._path, self._points)
+      return self._pending
+
+  def close(self, wait:bool = True) -> None: self._pool.shutdown(wait=wait)
+
+  def __enter__(self): return self
+  def __exit__(self, *exc): self.close()
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Cards are handled by their blackjack value: index 0 is the ace (1/11),
+# index 9 is every ten-valued card (10, J, Q, K).
+VALUES = np.arange(1, 11)
+
+
+def best_total(hard, soft):
+    """Best blackjack total for arrays of hard totals and 'holds an ace' flags."""
+    return np.where(soft & (hard + 10 <= 21), hard + 10, hard)
+
+
+def sample_sequences(pool, n:int, depth:int, rng:np.random.Generator) -> np.ndarray:
+    """
+    Draw `n` independent card sequences of length `depth` *without replacement*
+    from `pool` (a length-10 array of card counts by value).
+
+    Every column is drawn for all rows at once, so the cost is O(n * depth * 10)
+    regardless of how many cards are left in the shoe.
+    """
+    pool = np.asarray(pool, dtype=np.int64)
+    depth = int(min(depth, pool.sum()))
+    counts = np.broadcast_to(pool, (n, 10)).copy()
+    rows = np.arange(n)
+    out = np.empty((n, depth), dtype=np.int8)
+    for j in range(depth):
+        cum = counts.cumsum(axis=1)
+        u = rng.random(n) * cum[:, -1]
+        idx = (cum <= u[:, None]).sum(axis=1)
+        out[:, j] = idx + 1
+        counts[rows, idx] -= 1
+    return out
+
+
+def _draw(seqs, pos, mask, hard, soft):
+    """Give the next card of each masked row to the hand described by (hard, soft)."""
+    rows = np.nonzero(mask & (pos < seqs.shape[1]))[0]
+    card = seqs[rows, pos[rows]]
+    hard[rows] += card
+    soft[rows] |= card == 1
+    pos[rows] += 1
+
+
+def dealer_totals(seqs, pos, up_card, hole, hit_soft_17:bool = False):
+    """
+    Finish the dealer's hand for every row from `up_card` and `hole`, taking any
+    further cards from `seqs` at `pos`. Mirrors `DealerStrategy`: hit while the
+    best total is below 17, and on soft 17 with `hit_soft_17`.
+    """
+    hard = up_card + hole.astype(np.int64)
+    soft = (up_card == 1) | (hole == 1)
+    pos = pos.copy()
+    while True:
+        total = best_total(hard, soft)
+        hits = (total < 17) | (hit_soft_17 & (total == 17) & (total != hard))
+        active = hits & (pos < seqs.shape[1])
+        if not active.any():
+            return total
+        _draw(seqs, pos, active, hard, soft)
+
+
+def settle(player, dealer):
+    """+1 / 0 / -1 per row for final player and dealer totals."""
+    return np.where(player > 21, -1,
+           np.where(dealer > 21, 1, np.sign(player - dealer))).astype(np.int8)
+
+
+def hit_vs_stand(seqs, hard:int, soft:bool, up_card = None, hit_soft_17:bool = False):
+    """
+    Play every sampled sequence twice from the same cards (common random
+    numbers): once standing now and once hitting now.
+
+    The first column of each sequence is the dealer's hole card; when
+    `up_card` is unknown (None) the up card is sampled too and comes first.
+    After the first hit the player keeps hitting while below 17 against a
+    7-or-better up card (below 12 otherwise) and always hits soft 17 or less.
+
+    Returns per-row outcomes `(hit, stand)`.
+    """
+    n = seqs.shape[0]
+    if up_card is None:
+        up_card, seqs = seqs[:, 0].astype(np.int64), seqs[:, 1:]
+    hole = seqs[:, 0]
+    start = np.ones(n, dtype=np.int64)
+
+    stand_total = np.full(n, hard + 10 if soft and hard + 10 <= 21 else hard)
+    stand = settle(stand_total, dealer_totals(seqs, start, up_card, hole, hit_soft_17))
+
+    target = np.where((up_card == 1) | (up_card >= 7), 17, 12)
+    p_hard = np.full(n, hard, dtype=np.int64)
+    p_soft = np.full(n, soft)
+    pos = start.copy()
+    mask = np.ones(n, dtype=bool)
+    while mask.any():
+        _draw(seqs, pos, mask, p_hard, p_soft)
+        total = best_total(p_hard, p_soft)
+        is_soft = p_soft & (p_hard + 10 <= 21)
+        mask = ((total < target) | (is_soft & (total <= 17))) & (pos < seqs.shape[1])
+
+    hit = settle(best_total(p_hard, p_soft), dealer_totals(seqs, pos, up_card, hole, hit_soft_17))
+    return hit, stand
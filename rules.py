@@ -0,0 +1,155 @@
+import numpy as np
+
+from fractions import Fraction
+from itertools import product
+from typing import FrozenSet, Optional, Tuple
+
+# Settlement outcomes, indexed by the codes `Rules.settle` returns. "loser"
+# is a loss to a dealer 21 (or blackjack), "lose" one on points.
+OUTCOMES = ("blackjack", "win", "push", "surrender", "lose", "loser")
+BLACKJACK, WIN, PUSH, SURRENDERED, LOSE, LOSER = range(len(OUTCOMES))
+BUST = 22   # every total over 21 settles alike
+
+HIT, STAND, DOUBLE, SPLIT, SURRENDER = "hit", "stand", "double", "split", "surrender"
+ACTIONS = (HIT, STAND, DOUBLE, SPLIT, SURRENDER)
+INSURANCE = "insurance"   # a side bet, not a playing decision
+
+# Actions that put up another bet the size of the hand's.
+RAISES = frozenset((DOUBLE, SPLIT))
+
+# What to do instead when a strategy asks for something the rules don't allow
+# right now, e.g. "double, otherwise hit". Standing is always legal.
+FALLBACK = {DOUBLE: HIT, SPLIT: HIT, SURRENDER: HIT, HIT: STAND}
+
+
+def _index(values) -> np.ndarray: return np.asarray(values, dtype=np.intp)
+
+
+class Rules:
+  """
+  House rules for a Blackjack table.
+
+  - hit_soft_17: dealer hits soft 17 (H17) instead of standing (S17)
+  - blackjack_pays: (3, 2) or (6, 5)
+  - double_on: totals a first-two-card hand may double on (None = any)
+  - double_after_split: doubling allowed on split hands
+  - max_hands: hands a player may split up to (resplits included)
+  - resplit_aces / hit_split_aces: what split aces may still do
+  - surrender: late surrender, after the dealer checks for blackjack
+  - insurance: offered when the dealer shows an ace, pays 2:1
+  - peek: dealer checks the hole card for blackjack on an ace or ten
+
+  Which actions are legal is looked up from a table built once here, so
+  adding actions never adds branches to the game loop.
+  """
+  def __init__(self, hit_soft_17:bool = False, blackjack_pays:Tuple[int, int] = (3, 2),
+               double_on:Optional[Tuple[int, ...]] = None, double_after_split:bool = True,
+               max_hands:int = 4, resplit_aces:bool = False, hit_split_aces:bool = False,
+               surrender:bool = True, insurance:bool = True, peek:bool = True):
+      self.hit_soft_17 = hit_soft_17
+      self.blackjack_pays = tuple(blackjack_pays)
+      self.double_on = None if double_on is None else tuple(double_on)
+      self.double_after_split = double_after_split
+      self.max_hands = max_hands
+      self.resplit_aces = resplit_aces
+      self.hit_split_aces = hit_split_aces
+      self.surrender = surrender
+      self.insurance = insurance
+      self.peek = peek
+
+      # Returned amount per unit bet, stake included.
+      self.payouts = {
+          "blackjack": 1 + Fraction(*self.blackjack_pays),
+          "win": 2,
+          "push": 1,
+          "surrender": Fraction(1, 2),
+          "lose": 0,
+          "loser": 0,
+      }
+      self._legal = {key: self._build_legal(*key) for key in product((False, True), repeat=5)}
+      self._settlement = self._build_settlement()
+      self.multipliers = np.array([float(self.payouts[o]) for o in OUTCOMES])
+
+  def __repr__(self):
+      fields = ", ".join(f"{k}={v!r}" for k, v in vars(self).items() if not k.startswith("_") and k not in ("payouts", "multipliers"))
+      return f"Rules({fields})"
+
+  def __eq__(self, other): return isinstance(other, Rules) and repr(self) == repr(other)
+  def __hash__(self): return hash(repr(self))
+
+  def _build_legal(self, first_two, pair, split_hand, can_split, split_aces) -> FrozenSet[str]:
+      if split_aces and not self.hit_split_aces:
+          actions = {STAND}
+          if pair and can_split and self.resplit_aces:
+              actions.add(SPLIT)
+          return frozenset(actions)
+      actions = {HIT, STAND}
+      if first_two:
+          if not split_hand or self.double_after_split:
+              actions.add(DOUBLE)
+          if pair and can_split and (not split_aces or self.resplit_aces):
+              actions.add(SPLIT)
+          if self.surrender and not split_hand:
+              actions.add(SURRENDER)
+      return frozenset(actions)
+
+  def legal_actions(self, hand, split_hand:bool = False, hands:int = 1, split_aces:bool = False,
+                    chips = None, bet = 0) -> FrozenSet[str]:
+      """
+      Actions allowed for `hand` (a `cards.Hand`) given how the player got it.
+      With `chips`, the player's chips behind a `bet`, doubling and splitting
+      are only allowed if they can be covered.
+      """
+      first_two = len(hand) == 2
+      pair = first_two and hand[0].values == hand[1].values
+      total = hand.true_score() if self.double_on is not None else 0
+      actions = self.legal(first_two, pair, total, split_hand, hands, split_aces)
+      if chips is not None and chips < bet:
+          actions = actions - RAISES
+      return actions
+
+  def legal(self, first_two:bool, pair:bool, total:int, split_hand:bool = False, hands:int = 1,
+            split_aces:bool = False) -> FrozenSet[str]:
+      """`legal_actions` for a hand described only by its shape and total."""
+      actions = self._legal[(first_two, pair, split_hand, hands < self.max_hands, split_aces)]
+      if DOUBLE in actions and self.double_on is not None and total not in self.double_on:
+          actions = actions - {DOUBLE}
+      return actions
+
+  @staticmethod
+  def _build_settlement() -> np.ndarray:
+      totals = np.arange(BUST + 1)
+      player, natural, dealer, dealer_natural = np.meshgrid(totals, (False, True), totals, (False, True), indexing="ij")
+      return np.select(
+          [player >= BUST, natural & dealer_natural, natural, dealer_natural, dealer >= BUST, dealer == 21,
+           player > dealer, player < dealer],
+          [LOSE, PUSH, BLACKJACK, LOSER, WIN, np.where(player == 21, PUSH, LOSER), WIN, LOSE],
+          PUSH).astype(np.uint8)
+
+  def settle(self, player, natural, dealer, dealer_natural):
+      """
+      Outcome codes (indexes into `OUTCOMES`) of final totals `player` with
+      blackjack flags `natural` against the dealer's `dealer` and
+      `dealer_natural`, in one table lookup. Scalars or arrays of any
+      broadcastable shape, e.g. one entry per seat; `multipliers[code]` is
+      the return per unit bet.
+      """
+      return self._settlement[np.minimum(_index(player), BUST), _index(natural), np.minimum(_index(dealer), BUST), _index(dealer_natural)]
+
+  def resolve(self, action:str, legal:FrozenSet[str]) -> str:
+      """Follow `FALLBACK` from `action` until a legal action is reached."""
+      while action not in legal:
+          action = FALLBACK.get(action, STAND)
+      return action
+
+  def dealer_hits(self, hand) -> bool:
+      score = hand.score
+      return score < 17 or (score == 17 and self.hit_soft_17 and hand.is_soft())
+
+  def payout(self, outcome:str, bet):
+      """Chips returned to a player for `outcome` on `bet`, stake included."""
+      winnings = self.payouts[outcome] * bet
+      return int(winnings) if winnings == int(winnings) else float(winnings)
+
+
+DEFAULT_RULES = Rules()
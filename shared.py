@@ -0,0 +1,126 @@
+import numpy as np
+
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+from ._utils import CardInfo
+from .odds import HILO_TAGS
+
+# name -> (shared memory block name, shape, dtype, writable)
+Spec = Dict[str, Tuple[str, Tuple[int, ...], str, bool]]
+
+
+def card_tables() -> Dict[str, np.ndarray]:
+  """
+  Lookup tables indexed by card id, the card's position in `CardInfo.INFO`
+  (0 = 'AS' ... 51 = 'KH').
+  """
+  codes = np.array([code for code, *_ in CardInfo.INFO])
+  ranks = [code[:-1] for code in codes]
+  values = np.array([1 if r == "A" else 10 if not r.isdigit() else int(r) for r in ranks], dtype=np.int8)
+  return {
+      "card_codes": codes,
+      "card_values": values,
+      "card_tags": HILO_TAGS[values - 1].astype(np.int8),
+  }
+
+
+def _attach(name:str) -> shared_memory.SharedMemory:
+  try:
+      return shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+  except TypeError:
+      return shared_memory.SharedMemory(name=name)
+
+
+class SharedTables:
+  """
+  Named NumPy arrays living in `multiprocessing.shared_memory`.
+
+  The parent process creates the store with `add()` (read-only tables, copied
+  in once) and `buffer()` (zeroed arrays workers write results into), then
+  hands `spec()` to the workers. Workers call `SharedTables.attach(spec)` and
+  get views on the same memory: nothing is copied or pickled but the spec.
+  Only the creator unlinks the blocks, via `unlink()` or the context manager.
+  """
+  def __init__(self):
+      self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+      self._arrays: Dict[str, np.ndarray] = {}
+      self._spec: Spec = {}
+      self._owner = True
+
+  def _create(self, name:str, shape, dtype, writable:bool) -> np.ndarray:
+      if name in self._arrays:
+          raise KeyError(f"{name!r} is already in the store")
+      dtype = np.dtype(dtype)
+      size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+      block = shared_memory.SharedMemory(create=True, size=size)
+      self._blocks[name] = block
+      self._spec[name] = (block.name, tuple(shape), dtype.str, writable)
+      array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+      self._arrays[name] = array
+      return array
+
+  def add(self, name:str, table:np.ndarray) -> np.ndarray:
+      """Copy a read-only table into shared memory."""
+      table = np.asarray(table)
+      array = self._create(name, table.shape, table.dtype, writable=False)
+      array[...] = table
+      return array
+
+  def add_all(self, tables:Dict[str, np.ndarray]) -> "SharedTables":
+      for name, table in tables.items():
+          self.add(name, table)
+      return self
+
+  def buffer(self, name:str, shape, dtype = np.float64) -> np.ndarray:
+      """A zeroed, writable array, e.g. one row of results per worker."""
+      array = self._create(name, shape, dtype, writable=True)
+      array.fill(0)
+      return array
+
+  def spec(self) -> Spec: return dict(self._spec)
+
+  @classmethod
+  def attach(cls, spec:Spec) -> "SharedTables":
+      store = cls()
+      store._owner = False
+      for name, (block_name, shape, dtype, writable) in spec.items():
+          block = _attach(block_name)
+          array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+          array.flags.writeable = writable
+          store._blocks[name], store._arrays[name], store._spec[name] = block, array, spec[name]
+      return store
+
+  def __getitem__(self, name:str) -> np.ndarray: return self._arrays[name]
+  def __contains__(self, name:str) -> bool: return name in self._arrays
+  def __iter__(self): return iter(self._arrays)
+
+  def close(self) -> None:
+      self._arrays.clear()
+      for block in self._blocks.values():
+          block.close()
+
+  def unlink(self) -> None:
+      blocks = list(self._blocks.values())
+      self.close()
+      if self._owner:
+          for block in blocks:
+              block.unlink()
+      self._blocks.clear()
+
+  def __enter__(self): return self
+  def __exit__(self, *exc): self.unlink()
+
+
+# Per-process handle set by `worker_init`, for use as a pool initializer:
+#   Pool(n, initializer=worker_init, initargs=(store.spec(),))
+_worker_tables: Optional[SharedTables] = None
+
+def worker_init(spec:Spec) -> None:
+  global _worker_tables
+  _worker_tables = SharedTables.attach(spec)
+
+def worker_tables() -> SharedTables:
+  if _worker_tables is None:
+      raise RuntimeError("worker_init() has not been called in this process")
+  return _worker_tables
@@ -0,0 +1,213 @@
+"""
+A bank of pre-shuffled shoes in one memory-mapped file.
+
+For common random numbers across strategies, processes and machines, the
+shoes are generated once: row `i` of the bank is the order of shoe `i` as
+card ids (uint8, dealt first at column 0). `BankedShoe` deals straight
+from the rows, so a shoe costs no shuffling, and every process mapping the
+same file shares one copy of it through the page cache.
+
+Shoe `i` depends only on the bank's seed and `i`, so a bigger bank built
+from the same seed starts with the same shoes.
+
+    python -m package.shoebank shoes.bank --shoes 1000000 --decks 6 --seed 0
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+
+from pathlib import Path
+from typing import Optional
+
+from ._utils import CardInfo
+from .cards import Shoe, Stats
+from .playingcards import PlayingCard, BlackjackCardComparer
+from .shuffles import CutCard, Shuffle
+
+MAGIC = b"SHOEBANK"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("decks", "<u4"), ("cards", "<u4"), ("pad", "<u4"),
+                   ("shoes", "<u8"), ("seed", "<u8"), ("reserved", "V24")])   # 64 bytes
+CHUNK = 1024   # shoes drawn from one generator
+
+
+class ShoeBank:
+  """
+  A bank file opened read-only: `bank[i]` is shoe `i` as a read-only row of card ids.
+
+  Pickles as its path, so it can be handed to worker processes, which map
+  the file again.
+
+  Example usage:
+  -------------------
+  bank = ShoeBank.build("shoes.bank", shoes = 100_000, decks = 6, seed = 0)
+  game = Blackjack(players, shoe = BankedShoe(bank))
+  -------------------
+  """
+  def __init__(self, path):
+      self.path = str(path)
+      header = np.fromfile(self.path, dtype=HEADER, count=1)
+      if len(header) != 1 or header["magic"][0] != MAGIC:
+          raise ValueError(f"{self.path} is not a shoe bank")
+      if header["version"][0] != VERSION:
+          raise ValueError(f"{self.path}: shoe bank version {header['version'][0]}, expected {VERSION}")
+      self.decks, self.cards, self.seed = int(header["decks"][0]), int(header["cards"][0]), int(header["seed"][0])
+      self._shoes = np.memmap(self.path, dtype=np.uint8, mode="r", offset=HEADER.itemsize,
+                              shape=(int(header["shoes"][0]), self.cards))
+
+  def __len__(self): return len(self._shoes)
+  def __getitem__(self, i:int) -> np.ndarray: return self._shoes[i]
+  def __repr__(self): return f"ShoeBank({self.path!r}, shoes={len(self)}, decks={self.decks}, seed={self.seed})"
+
+  def __getstate__(self): return {"path": self.path}
+  def __setstate__(self, state): self.__init__(state["path"])
+
+  @classmethod
+  def build(cls, path, shoes:int, decks:int = 6, seed:int = 0, shuffle:Optional[Shuffle] = None) -> "ShoeBank":
+      """
+      Write a bank of `shoes` shoes of `decks` decks. Shoes are uniformly
+      random permutations, or, with a `shuffle` model, each shoe is that
+      shuffle of the one before (fully dealt), as a real shoe would be.
+      The file is written under a temporary name and renamed when complete.
+      """
+      path = Path(path)
+      deck = np.arange(len(CardInfo.INFO), dtype=np.uint8)
+      cards = len(deck) * decks
+      header = np.array([(MAGIC, VERSION, decks, cards, 0, shoes, seed, b"")], dtype=HEADER)
+      fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+      try:
+          with os.fdopen(fd, "wb") as f:
+              f.write(header.tobytes())
+              f.truncate(HEADER.itemsize + shoes * cards)
+          rows = np.memmap(tmp, dtype=np.uint8, mode="r+", offset=HEADER.itemsize, shape=(shoes, cards))
+          last = np.tile(deck, decks)
+          for start in range(0, shoes, CHUNK):
+              rng = np.random.default_rng([seed, start // CHUNK])
+              stop = min(start + CHUNK, shoes)
+              if shuffle is None:
+                  rows[start:stop] = rng.permuted(np.broadcast_to(last, (stop - start, cards)), axis=1)
+                  continue
+              for i in range(start, stop):
+                  last = last[shuffle(np.arange(cards), rng)][::-1]   # shuffles return the pile with the top card last
+                  rows[i] = last
+          rows.flush()
+          del rows
+          os.chmod(tmp, 0o644)   # mkstemp makes the file owner-only
+          os.replace(tmp, path)
+      except BaseException:
+          if os.path.exists(tmp):
+              os.unlink(tmp)
+          raise
+      return cls(path)
+
+
+class _Undealt:
+  """The cards left in a `BankedShoe`, for `Stats`: one stand-in card per id, nothing is built per shoe."""
+  def __init__(self, shoe:"BankedShoe"):
+      self._shoe = shoe
+
+  def __len__(self): return len(self._shoe._order) - self._shoe._pos
+  def __iter__(self):
+      cards = self._shoe._stand_ins
+      return (cards[i] for i in self._shoe._order[self._shoe._pos:].tolist())
+
+
+class BankedShoe(Shoe):
+  """
+  A `Shoe` dealing the shoes of a `ShoeBank` in turn: `first`, `first +
+  step`, ... so processes can split a bank between them without overlap.
+  It is reset after the round in which the cut card comes out; the bank
+  decides the order, so no shuffle model applies. A round can't continue
+  into the next shoe, whose copies of the cards on the table would be
+  dealt twice: a shoe running out mid-round raises `RuntimeError`, so
+  deal with a cut card.
+
+  Dealing is an index into the mapped row plus the usual O(1) count
+  updates; starting a shoe resets a few small arrays in place.
+  """
+  def __init__(self, bank:ShoeBank, first:int = 0, step:int = 1, cut_card:Optional[CutCard] = CutCard(),
+               history_shoes:int = 4, comparer = BlackjackCardComparer):
+      self._bank, self._first, self._step = bank, first, step
+      self._order, self._pos = bank[first][:0], 0
+      super().__init__(bank.decks, seed = bank.seed, cut_card = cut_card, history_shoes = history_shoes, comparer = comparer)
+      self._stand_ins = [PlayingCard(*info, comparer=self._comparer) for info in self._info]
+      self._cards = _Undealt(self)
+      self._stats = Stats(self._cards, self._values_left)
+
+  def _track(self):
+      super()._track()
+      ids = len(CardInfo.INFO)
+      self._copies = np.argsort(self._card_id, kind="stable").reshape(ids, -1)   # card id, copy -> physical card
+      self._copy = [0] * ids   # copies of each id dealt from this shoe
+      self._full_ranks = np.bincount(self._rank_of, minlength=len(self._ranks_left))
+      self._full_values = np.bincount(self._value_of, minlength=10)
+
+  @property
+  def bank_index(self) -> int:
+      """Row of the bank the shoe being dealt came from."""
+      return self._first + self._shoes * self._step
+
+  def _next_shoe(self):
+      self._shoes += 1
+      index = self.bank_index
+      if index >= len(self._bank):
+          raise RuntimeError(f"{self._bank!r} is exhausted: shoe {index} requested")
+      self._order, self._pos = self._bank[index], 0
+      self._ranks_left[:] = self._full_ranks
+      self._values_left[:] = self._full_values
+      self._ranks_dealt[:] = 0
+      self._dealt_n = 0
+      self._copy[:] = [0] * len(self._copy)
+      self._hidden = []
+      n = len(self._physical)
+      self._cut_at = self._cut_card.position(n, self._rng) if self._cut_card is not None else None
+
+  def draw(self, flip = True):
+      if self._pos == len(self._order):
+          if self._round:
+              raise RuntimeError(f"Shoe {self.bank_index} of {self._bank!r} ran out of cards in the middle of a round.")
+          self._next_shoe()
+      card_id = int(self._order[self._pos])
+      self._pos += 1
+      copy = self._copy[card_id]
+      self._copy[card_id] = copy + 1
+      i = int(self._copies[card_id, copy])
+      self._round.append(i)
+      self._history.append(i, self._shoes)
+      card = self._physical[i]
+      if flip:
+          self._count(i)
+          return card.reveal()
+      self._hidden.append(i)
+      return card.hide()
+
+  def end_round(self):
+      self.show()
+      self._round = []
+      if self._cut_at is not None and self._pos >= self._cut_at:
+          self.reset()
+
+  def reset(self):
+      self._round = []
+      self._next_shoe()
+
+  @property
+  def dealt(self) -> int: return self._pos
+  @property
+  def ids(self) -> np.ndarray: return self._order[self._pos:]
+
+
+def main(argv = None):
+  parser = argparse.ArgumentParser(description = "Generate a memory-mapped bank of shuffled shoes.")
+  parser.add_argument("path", help = "bank file to write")
+  parser.add_argument("--shoes", type = int, required = True, help = "number of shoes")
+  parser.add_argument("--decks", type = int, default = 6, help = "decks per shoe")
+  parser.add_argument("--seed", type = int, default = 0, help = "master seed")
+  args = parser.parse_args(argv)
+  bank = ShoeBank.build(args.path, args.shoes, args.decks, args.seed)
+  print(bank)
+
+
+if __name__ == '__main__':
+  main()
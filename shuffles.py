@@ -0,0 +1,159 @@
+"""
+Shuffle models for `cards.Shoe`.
+
+A shuffle takes the shoe order as an array of card indexes (the last one is
+dealt first) and a `numpy.random.Generator`, and returns the new order.
+Every model works on whole arrays: a shuffle of a 6-deck shoe is a handful
+of NumPy calls, not 312 list operations.
+"""
+import numpy as np
+
+from typing import Optional, Sequence
+
+
+class Shuffle:
+  """Base class; `continuous` models put the discards back after every round instead of using a cut card."""
+  continuous = False
+
+  def __call__(self, order:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+      raise NotImplementedError
+
+  def __repr__(self):
+      fields = ", ".join(f"{k}={v!r}" for k, v in vars(self).items())
+      return f"{type(self).__name__}({fields})"
+
+
+class PerfectShuffle(Shuffle):
+  """Every order equally likely."""
+  def __call__(self, order, rng): return rng.permutation(order)
+
+
+class RiffleShuffle(Shuffle):
+  """
+  Riffle shuffles, `passes` times.
+
+  The shoe is cut near the middle (normal, `cut_sd` cards off centre) and
+  the halves are dropped in alternating clumps whose sizes are geometric
+  with mean `clump`; dealers' riffles drop clumps of 2-4 cards. clump = None
+  is the Gilbert-Shannon-Reeds model of an ideal riffle instead (binomial
+  cut, every interleaving equally likely).
+  """
+  def __init__(self, passes:int = 3, clump:Optional[float] = 2.0, cut_sd:float = 4.0):
+      self.passes = passes
+      self.clump = clump
+      self.cut_sd = cut_sd
+
+  def _riffle(self, order, rng):
+      n = len(order)
+      if self.clump is None:
+          k = rng.binomial(n, 0.5)
+          sides = np.ones(n, int)
+          sides[rng.choice(n, k, replace=False)] = 0
+          return self._merge(order, sides, k)
+      k = int(np.clip(round(rng.normal(n / 2, self.cut_sd)), 0, n))
+      runs = rng.geometric(1 / self.clump, size=n + 1)
+      sides = np.repeat((np.arange(n + 1) + rng.integers(2)) % 2, runs)[:n]
+      # Drop until either half runs out; the rest of the other half goes on top.
+      exhausted = (np.cumsum(sides == 0) >= k) | (np.cumsum(sides == 1) >= n - k)
+      stop = int(np.argmax(exhausted)) + 1 if 0 < k < n else 0
+      lefts = int((sides[:stop] == 0).sum())
+      sides = np.concatenate([sides[:stop], np.zeros(k - lefts, int), np.ones(n - k - stop + lefts, int)])
+      return self._merge(order, sides, k)
+
+  @staticmethod
+  def _merge(order, sides, k):
+      out = np.empty_like(order)
+      out[sides == 0] = order[:k]
+      out[sides == 1] = order[k:]
+      return out
+
+  def __call__(self, order, rng):
+      for _ in range(self.passes):
+          order = self._riffle(order, rng)
+      return order
+
+
+class StripShuffle(Shuffle):
+  """Packets of about `packet` cards are pulled off one at a time and stacked in reverse order."""
+  def __init__(self, passes:int = 1, packet:float = 12.0, sd:float = 3.0):
+      self.passes = passes
+      self.packet = packet
+      self.sd = sd
+
+  def __call__(self, order, rng):
+      n = len(order)
+      for _ in range(self.passes):
+          sizes = np.maximum(1, np.round(rng.normal(self.packet, self.sd, size=n)).astype(int))
+          cuts = np.cumsum(sizes)
+          cuts = cuts[cuts < n]
+          order = np.concatenate(np.split(order, cuts)[::-1])
+      return order
+
+
+class Cut(Shuffle):
+  """A single cut, `sd` cards either side of the middle (the player cuts the shoe)."""
+  def __init__(self, sd:float = 0.0, at:float = 0.5):
+      self.sd = sd
+      self.at = at
+
+  def __call__(self, order, rng):
+      k = int(np.clip(round(rng.normal(len(order) * self.at, self.sd)), 0, len(order)))
+      return np.roll(order, -k)
+
+
+class ShuffleSequence(Shuffle):
+  """Several shuffles one after the other, e.g. a casino's riffle-strip-riffle-cut procedure."""
+  def __init__(self, steps:Sequence[Shuffle]):
+      self.steps = list(steps)
+
+  def __call__(self, order, rng):
+      for step in self.steps:
+          order = step(order, rng)
+      return order
+
+
+class ContinuousShuffler(Shuffle):
+  """
+  A continuous shuffling machine: the cards of every round go back in at
+  random positions before the next round, so the shoe never runs down and
+  there is never anything to count.
+  """
+  continuous = True
+
+  def __call__(self, order, rng): return rng.permutation(order)
+
+  def insert(self, order:np.ndarray, cards:np.ndarray, rng:np.random.Generator) -> np.ndarray:
+      """`order` with `cards` inserted at independent uniform positions."""
+      return np.insert(order, rng.integers(0, len(order) + 1, size=len(cards)), rng.permutation(cards))
+
+
+class CutCard:
+  """
+  Where the cut card goes: the shoe is reshuffled after the round in which
+  `penetration` of it (normal, `sd` either side, as a fraction of the shoe)
+  has been dealt.
+  """
+  def __init__(self, penetration:float = 0.75, sd:float = 0.02):
+      self.penetration = penetration
+      self.sd = sd
+
+  def __repr__(self): return f"CutCard(penetration={self.penetration!r}, sd={self.sd!r})"
+
+  def position(self, n:int, rng:np.random.Generator) -> int:
+      """Cards dealt before the cut card comes out."""
+      return int(np.clip(round(n * rng.normal(self.penetration, self.sd)), 1, n))
+
+
+def landing(shuffle:Shuffle, n:int, samples:int, rng:np.random.Generator) -> np.ndarray:
+  """
+  Deal position (0 = dealt first) of every pre-shuffle position, over
+  `samples` runs of `shuffle` on an `n`-card pile.
+  """
+  out = np.empty((samples, n), dtype=np.int32)
+  for s in range(samples):
+      order = shuffle(np.arange(n), rng)
+      out[s, order] = n - 1 - np.arange(n)
+  return out
+
+
+CASINO = ShuffleSequence([RiffleShuffle(2), StripShuffle(), RiffleShuffle(1), Cut(sd=20)])
@@ -1,5 +1,21 @@
+import copy
+import functools
+import time
+import numpy as np
 from abc import ABC, abstractmethod
+from collections import defaultdict
 from .cards import Shoe
+from .rollout import sample_sequences, hit_vs_stand
+from .cache import DecisionCache
+from .odds import TABLES, count_bucket
+from .rules import DEFAULT_RULES, SPLIT
+from .charts import CODE_PLAYS, LO, SPLIT as SPLIT_ALWAYS, SPLIT_DAS, DecisionChart, bet_ramp, load_chart
+
+@functools.lru_cache(maxsize = 256)
+def _build_table(name, rules, num_decks, bucket):
+    """An odds table built in memory, once per process (see `Strategy.table`)."""
+    return TABLES[name](rules, num_decks, bucket)
+
 
 class Strategy():
     """
@@ -14,6 +30,9 @@ class Strategy():
     Every Strategy has access to:
     - self._player: the player it controls
     - self._autobet: the default bet amount (100)
+    - self._dealer: the dealer at the table (set by the game, may be None)
+    - self.table(name, deck): a precomputed odds table (see odds.TABLES) for
+      the current shoe, built once per process, or kept on disk in `cache`
 
     You *must* fill in the 'decide()' method in your strategy.
     That's where you write your decision logic.
@@ -23,13 +42,69 @@ class Strategy():
     ✅ You ONLY need to define the logic inside YourStrategy.decide().
     """
 
+    cache = None   # a cache.TableCache (e.g. cache.default_cache()) to keep tables across runs; None builds them in memory
+
     def __init__(self, player, _is_strategy = False):
         self._player = player
         self._autobet = 100
         self._has_strategy = _is_strategy
+        self._dealer = None
+        self._tables = {}
 
     def __bool__(self):
         return self._has_strategy
+
+    def watch(self, dealer):
+        """Called by the game so the strategy can see the dealer's up card."""
+        self._dealer = dealer
+
+    def up_card(self):
+        """The dealer's face-up card, or None if there is no dealer to look at."""
+        if self._dealer is None or not len(self._dealer.hand):
+            return None
+        card = self._dealer.hand[0]
+        return card if card.faceup else None
+
+    @property
+    def rules(self):
+        return self._dealer.rules if self._dealer is not None else DEFAULT_RULES
+
+    def for_player(self, player):
+        """A copy of this strategy playing for `player` (used for split hands)."""
+        strategy = copy.copy(self)
+        strategy._player = player
+        return strategy
+
+    def for_seat(self, player):
+        """A copy of this strategy for another seat its player takes (see `Table`)."""
+        return self.for_player(player)
+
+    def table(self, name, deck: Shoe):
+        """The `name` table for the shoe's deck count and current true-count bucket."""
+        key = (name, self.rules, deck.num_decks, count_bucket(deck.stats.composition()))
+        if key not in self._tables:
+            if self.cache is not None:
+                self._tables[key] = self.cache.get_or_build(*key, TABLES[name])
+            else:
+                self._tables[key] = _build_table(*key)
+        return self._tables[key]
+
+    def bid(self, deck):
+        """The bet this strategy wants for the round, before `autobet` caps it at the player's chips."""
+        return self._autobet
+
+    def insure(self, deck) -> bool:
+        """Take insurance when the dealer shows an ace? Never, unless overridden."""
+        return False
+
+    @classmethod
+    def decide_batch(cls, strategies, snapshot):
+        """
+        Decisions for several players using this strategy class at once, all
+        from the same `ShoeSnapshot`. Override it to vectorise across seats;
+        by default each strategy simply decides on its own.
+        """
+        return [strategy.decide(snapshot.deck) for strategy in strategies]
         
     @abstractmethod
     def autobet(self, deck):
@@ -43,11 +118,14 @@ class Strategy():
 
         When the game reaches your turn, it will automatically call:
 
-            your_strategy.decide(game)
+            your_strategy.decide(deck)
 
-        In this method, you should call:
-        - game.deal(self._player)  → to hit
-        - game.skip(self._player)  → to stand
+        Return what you want to do:
+        - True  → hit
+        - False → stand
+        - or one of the actions in rules.ACTIONS ("double", "split",
+          "surrender", ...). If the table doesn't allow it right now the
+          game falls back (double → hit, for example), see rules.FALLBACK.
         """
         pass
 
@@ -57,6 +135,7 @@ class DealerStrategy(Strategy):
     🃏 This is the built-in strategy used by the Dealer.
     The dealer follows standard Blackjack rules:
     - Hit if score is < 17
+    - Hit soft 17 too if the table's rules say so (H17)
     - Stand otherwise
 
     You can use this as an example!
@@ -68,11 +147,8 @@ class DealerStrategy(Strategy):
     def autobet(self, deck):
         pass  # dealer doesn't bet
 
-    def decide(self, deck: Shoe, verbose: bool = False) -> None:
-        if self._player.score < 17:
-            return True
-        else:
-            return False
+    def decide(self, deck: Shoe, verbose: bool = False) -> bool:
+        return self._player.rules.dealer_hits(self._player.hand)
 
 class HiLoStrategy(Strategy):
     """
@@ -102,7 +178,15 @@ class HiLoStrategy(Strategy):
     def __init__(self, player):
         super().__init__(player, _is_strategy = True)
 
+    @staticmethod
+    def _count(rank_counts) -> int:
+        """Low cards (2-6) minus tens and faces, from counts by rank (A, 2, ..., K)."""
+        return int(rank_counts[1:6].sum() - rank_counts[9:].sum())
+
     def autobet(self, deck):
+        return self._player.bet(self.bid(deck))
+
+    def bid(self, deck):
         """
         💰 Smarter betting using card counts.
 
@@ -114,27 +198,20 @@ class HiLoStrategy(Strategy):
         This works *exactly* like our Hi-Lo count from the decide() method.
         """
 
-        card_counts = deck.stats.count_remaining_cards()
-        count = 0
-        for card, qty in card_counts.items():
-            rank = str(card.rank)
-            if rank in ['2', '3', '4', '5', '6']:
-                count += qty
-            elif rank in ['10', 'J', 'Q', 'K']:
-                count -= qty
+        count = self._count(deck.rank_counts)
 
         # Normalize to get "true count" if you want (not shown here)
 
         if count > 10:
-            return self._player.bet(500)  # 🔥 very favorable — bet big
+            return 500  # 🔥 very favorable — bet big
         elif count > 5:
-            return self._player.bet(300)
+            return 300
         elif count > 0:
-            return self._player.bet(200)
+            return 200
         elif count > -5:
-            return self._player.bet(100)
+            return 100
         else:
-            return self._player.bet(25)   # ❄️ not favorable — play cautious
+            return 25   # ❄️ not favorable — play cautious
 
 
     def decide(self, deck: Shoe, verbose = False) -> None:
@@ -143,16 +220,7 @@ class HiLoStrategy(Strategy):
         """
         score = self._player.score
 
-        card_counts = deck.stats.count_all_cards_dealt()
-        count = 0
-
-        for card, qty in card_counts.items():
-            rank = str(card.rank)
-            if rank in ['2', '3', '4', '5', '6']:
-                count += qty
-            elif rank in ['10', 'J', 'Q', 'K']:
-                count -= qty
-            # 7, 8, 9 → count += 0 (ignored)
+        count = self._count(deck.dealt_rank_counts)
 
         """
         Now use the Hi-Lo count to make a decision.
@@ -179,3 +247,333 @@ class HiLoStrategy(Strategy):
                 return True
             else:
                 return False
+
+
+    @classmethod
+    def decide_batch(cls, strategies, snapshot):
+        """The same rule as decide(), with the count taken once for every seat."""
+        count = cls._count(snapshot.deck.dealt_rank_counts)
+        limit = 18 if count > 5 else 12 if count < -5 else 16
+        return (snapshot.scores(strategies) < limit).tolist()
+
+
+class DealerBustHiLoStrategy(HiLoStrategy):
+    """
+    🔢💥 Hi-Lo that also stands on a stiff hand (12 to 17) whenever the
+    dealer is at least `STIFF_STAND` likely to bust from the up card, by the
+    dealer-outcome table for the current count (see `Strategy.table`).
+    """
+    STIFF_STAND = 0.3   # dealer bust chance from which stiff hands stand
+
+    def dealer_busts(self, deck: Shoe, up = None) -> bool:
+        """Is the dealer at least `STIFF_STAND` likely to bust from up card value `up` (default: the one showing)?"""
+        if up is None:
+            card = self.up_card()
+            if card is None:
+                return False
+            up = card.values[0]
+        return bool(self.table("dealer_outcomes", deck)[up - 1, -1] >= self.STIFF_STAND)
+
+    def decide(self, deck: Shoe, verbose = False):
+        if 12 <= self._player.score < 18 and self.dealer_busts(deck):
+            return False
+        return super().decide(deck, verbose)
+
+    @classmethod
+    def decide_batch(cls, strategies, snapshot):
+        hit = np.array(super().decide_batch(strategies, snapshot))
+        if snapshot.up_card is not None and strategies[0].dealer_busts(snapshot.deck, snapshot.up_card):
+            hit &= snapshot.scores(strategies) < 12
+        return hit.tolist()
+
+
+class ShoeSnapshot:
+    """
+    What every seat may look at for one batch of decisions: the shoe, its
+    composition and the dealer's up card, read once and shared.
+    """
+    def __init__(self, deck: Shoe, up_card = None):
+        self.deck = deck
+        self.up_card = up_card
+        self._composition = None
+
+    @property
+    def composition(self) -> np.ndarray:
+        if self._composition is None:
+            self._composition = self.deck.stats.composition()
+        return self._composition
+
+    @staticmethod
+    def scores(strategies) -> np.ndarray:
+        return np.array([strategy._player.score for strategy in strategies])
+
+
+class StrategyGroup:
+    """
+    Collects the decisions of every seat at the table in one call: seats are
+    grouped by strategy class and each class answers for all of its seats
+    through `decide_batch()`.
+    """
+    def decide(self, players, deck: Shoe, up_card = None) -> list:
+        snapshot = ShoeSnapshot(deck, up_card)
+        groups = defaultdict(list)
+        for i, player in enumerate(players):
+            groups[type(player.strategy)].append(i)
+        decisions = [None] * len(players)
+        for cls, seats in groups.items():
+            for i, decision in zip(seats, cls.decide_batch([players[i].strategy for i in seats], snapshot)):
+                decisions[i] = decision
+        return decisions
+
+
+class MonteCarloStrategy(Strategy):
+    """
+    🎲 Monte Carlo Strategy: decides by playing the hand out many times.
+
+    For every decision it samples futures from the cards nobody has seen yet
+    (the shoe plus the dealer's hole card) and plays each of them twice on the
+    same cards — once standing, once hitting — with the dealer following the
+    `DealerStrategy` rules. It hits when hitting wins more on average.
+
+    Sampling runs in batches of `batch` rollouts and stops as soon as the
+    confidence interval of (hit - stand) no longer contains zero, or when
+    `max_samples` rollouts or `time_budget` seconds are used up.
+
+    This is the reference for composition-aware play: compare its decisions
+    against `HiLoStrategy` to see how much a simple count leaves on the table.
+
+    Example usage:
+    -------------------
+    from functools import partial
+    player = BlackjackPlayer("Ref", strategy = partial(MonteCarloStrategy, max_samples = 4000))
+    -------------------
+    """
+    def __init__(self, player, batch = 256, max_samples = 2048, time_budget = None, z = 1.96, depth = 16, seed = None):
+        super().__init__(player, _is_strategy = True)
+        self._batch = batch
+        self._max_samples = max_samples
+        self._time_budget = time_budget
+        self._z = z
+        self._depth = depth
+        self._rng = np.random.default_rng(seed)
+        self.last_estimate = None   # (mean hit-minus-stand, standard error, samples)
+
+    def autobet(self, deck):
+        return self._player.bet(self.bid(deck))
+
+    def unseen(self, deck: Shoe) -> np.ndarray:
+        """Counts by value of every card the player cannot see: the shoe counts the hole card only once it is shown."""
+        return deck.stats.composition()
+
+    def decide(self, deck: Shoe, verbose = False) -> bool:
+        hand = self._player.hand
+        hard = sum(card.values[0] for card in hand)
+        soft = any(card.rank == "A" for card in hand)
+        if hard >= 21:
+            return False
+
+        up = self.up_card()
+        up = None if up is None else up.values[0]
+        pool = self.unseen(deck)
+
+        deadline = None if self._time_budget is None else time.perf_counter() + self._time_budget
+        n = total = total_sq = 0
+        mean = se = 0.0
+        while n < self._max_samples:
+            seqs = sample_sequences(pool, self._batch, self._depth, self._rng)
+            hit, stand = hit_vs_stand(seqs, hard, soft, up, self.rules.hit_soft_17)
+            d = hit.astype(np.int64) - stand
+            n += len(d)
+            total += d.sum()
+            total_sq += (d * d).sum()
+            mean = total / n
+            se = np.sqrt(max(total_sq / n - mean * mean, 0.0) / n)
+            if abs(mean) > self._z * se and n >= 2 * self._batch:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        self.last_estimate = (mean, se, n)
+        return bool(mean > 0)
+
+
+class CachedDecisions:
+    """
+    💾 Mix this in front of a strategy to remember its answers.
+
+    The strategy's `decide()` and `bid()` then run once per distinct state
+    key; after that the answer comes from a bounded table shared by every
+    player using the same strategy class. The default keys are
+
+    - decisions: (player total, soft flag, up card, true-count bucket)
+    - bets: (true-count bucket,)
+
+    and every key also holds the rules, the number of decks and the
+    arguments the strategy was built with, so differently configured
+    players and games never share answers. Bets are cached as bid and
+    capped at each player's own chips. Override `state_key()` / `bet_key()`
+    if your strategy looks at anything else (the number of cards in the
+    hand, a pair, ...).
+
+    Example usage:
+    -------------------
+    class CachedMonteCarlo(CachedDecisions, MonteCarloStrategy): pass
+    CachedMonteCarlo.decisions().stats()   # {'hits': ..., 'misses': ..., ...}
+    -------------------
+    """
+    cache_size = 4096
+
+    def __init__(self, player, *args, **kwargs):
+        super().__init__(player, *args, **kwargs)
+        self._settings = repr((args, sorted(kwargs.items())))   # e.g. a partial's max_samples
+
+    def _key(self, deck: Shoe, state):
+        return (self.rules, deck.num_decks, self._settings, state)
+
+    @classmethod
+    def decisions(cls) -> DecisionCache:
+        if "_decisions" not in cls.__dict__:
+            cls._decisions = DecisionCache(cls.cache_size)
+        return cls._decisions
+
+    @classmethod
+    def bets(cls) -> DecisionCache:
+        if "_bets" not in cls.__dict__:
+            cls._bets = DecisionCache(cls.cache_size)
+        return cls._bets
+
+    def state_key(self, deck: Shoe):
+        hand = self._player.hand
+        up = self.up_card()
+        return (hand.score, hand.is_soft(), None if up is None else up.values[0],
+                count_bucket(deck.stats.composition()))
+
+    def bet_key(self, deck: Shoe):
+        return (count_bucket(deck.stats.composition()),)
+
+    @classmethod
+    def decide_batch(cls, strategies, snapshot):
+        return [strategy.decide(snapshot.deck) for strategy in strategies]
+
+    def decide(self, deck: Shoe, verbose = False):
+        table, key = self.decisions(), self._key(deck, self.state_key(deck))
+        decision = table.get(key)
+        if decision is DecisionCache.MISSING:
+            decision = super().decide(deck, verbose = verbose)
+            table.put(key, decision)
+        return decision
+
+    def bid(self, deck):
+        table, key = self.bets(), self._key(deck, self.bet_key(deck))
+        amount = table.get(key)
+        if amount is DecisionCache.MISSING:
+            amount = super().bid(deck)
+            table.put(key, amount)
+        return amount
+
+    def autobet(self, deck):
+        return self._player.bet(self.bid(deck))
+
+
+class CachedMonteCarloStrategy(CachedDecisions, MonteCarloStrategy):
+    """🎲💾 `MonteCarloStrategy` that rolls out each state only once per simulation."""
+
+
+class TableStrategy(Strategy):
+    """
+    📋 Table Strategy: plays a chart instead of code.
+
+    The chart is data — basic strategy plus count-index deviations, in CSV
+    or JSON (see charts.py for the format) — compiled into arrays indexed by
+    (soft, total, up card, true-count bucket). Each decision is one lookup;
+    seats sharing a chart are looked up together.
+
+    - chart: a `DecisionChart`, a file, or a chart name from content/charts
+      (default "basic": multi-deck S17 basic strategy)
+    - deviations: a file or name of index plays to apply, e.g. "illustrious18"
+    - bets: {true count: bet} ramp, overriding the chart's (flat bet if none)
+
+    Splits are checked against the hands the player already has; "double,
+    otherwise stand" and the like fall back as the chart says. The count is
+    of the cards seen: the dealer's hole card is left out until it is shown.
+
+    Example usage:
+    -------------------
+    from functools import partial
+    player = BlackjackPlayer("I18", strategy = partial(TableStrategy, deviations = "illustrious18",
+                                                       bets = {-10: 25, 1: 100, 2: 200, 4: 400}))
+    -------------------
+    """
+    def __init__(self, player, chart = "basic", deviations = None, bets = None):
+        super().__init__(player, _is_strategy = True)
+        if not isinstance(chart, DecisionChart):
+            chart = load_chart(chart, deviations)
+        elif deviations is not None:
+            raise ValueError("deviations are only applied to charts loaded from a file; use DecisionChart.deviate()")
+        self.chart = chart
+        self._ramp = bet_ramp(bets) if bets else chart.bets
+        self._hands = [1]   # hands this round, shared with the split hands' copies
+
+    def for_player(self, player):
+        self._hands[0] += 1
+        return super().for_player(player)
+
+    def for_seat(self, player):
+        strategy = copy.copy(self)
+        strategy._player, strategy._hands = player, [1]
+        return strategy
+
+    def autobet(self, deck):
+        self._hands[0] = 1
+        return self._player.bet(self.bid(deck))
+
+    def bid(self, deck):
+        return self._autobet if self._ramp is None else int(self._ramp[self.bucket(deck)])
+
+    def insure(self, deck) -> bool:
+        return bool(self.chart.insurance[self.bucket(deck)])
+
+    @staticmethod
+    def bucket(deck: Shoe) -> int:
+        """Index of the true-count bucket from the cards seen, the hole card counted as unseen."""
+        return count_bucket(deck.value_counts) - LO
+
+    def _state(self):
+        """(legal actions, soft, total, pair card value or 0) of the hand being played."""
+        player = self._player
+        hand = player.hand
+        legal = self.rules.legal_actions(hand, player.was_split, self._hands[0], player.split_aces, player.chips, player.current_bet)
+        hard, total = hand._totals()
+        pair = hand[0].values[0] if SPLIT in legal else 0
+        return legal, total != hard, min(total, 21), pair
+
+    def _choose(self, legal, play, split) -> str:
+        if split == SPLIT_ALWAYS or (split == SPLIT_DAS and self.rules.double_after_split):
+            return SPLIT
+        action, fallback = CODE_PLAYS[play]
+        return action if action in legal else fallback
+
+    def decide(self, deck: Shoe, verbose = False) -> str:
+        up = self.up_card()
+        up = 10 if up is None else up.values[0]
+        bucket = self.bucket(deck)
+        legal, soft, total, pair = self._state()
+        return self._choose(legal, self.chart.plays[int(soft), total, up, bucket], self.chart.splits[pair, up, bucket])
+
+    @classmethod
+    def decide_batch(cls, strategies, snapshot):
+        """The count is taken once, and seats playing the same chart are looked up in one index."""
+        up = 10 if snapshot.up_card is None else snapshot.up_card
+        bucket = cls.bucket(snapshot.deck)
+        decisions = [None] * len(strategies)
+        charts = defaultdict(list)
+        for i, strategy in enumerate(strategies):
+            charts[id(strategy.chart)].append(i)
+        for seats in charts.values():
+            chart = strategies[seats[0]].chart
+            legal, soft, total, pair = zip(*(strategies[i]._state() for i in seats))
+            plays = chart.plays[np.array(soft, dtype=np.intp), total, up, bucket].tolist()
+            splits = chart.splits[pair, up, bucket].tolist()
+            for i, *state in zip(seats, legal, plays, splits):
+                decisions[i] = strategies[i]._choose(*state)
+        return decisions
@@ -0,0 +1,39 @@
+import numpy as np
+
+from .. import cache
+from ..cache import TableCache
+from ..cards import Shoe
+from ..game import Blackjack
+from ..participants import BlackjackPlayer
+from ..strategy import DealerBustHiLoStrategy
+
+
+def test_put_keeps_the_newest_table(tmp_path):
+    cache = TableCache(tmp_path, max_bytes = 1000)
+    cache.put("a", "rules", 6, 0, np.zeros(50))
+    table = cache.put("b", "rules", 6, 0, np.ones(100))   # 800 bytes: evicts "a", not itself
+    assert (table == 1).all()
+    assert [p.name.split("-")[0] for p in cache.files()] == ["b"]
+
+
+def test_put_skips_a_table_bigger_than_the_cache(tmp_path):
+    cache = TableCache(tmp_path, max_bytes = 1000)
+    cache.put("a", "rules", 6, 0, np.zeros(50))
+    table = cache.put("b", "rules", 6, 0, np.ones(200))
+    assert (table == 1).all()
+    assert cache.get("b", "rules", 6, 0) is None
+    assert cache.get("a", "rules", 6, 0) is not None
+
+
+def test_strategies_use_the_disk_only_when_asked(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_default", TableCache(tmp_path / "default"))
+
+    class OnDisk(DealerBustHiLoStrategy):
+        cache = TableCache(tmp_path / "opted-in")
+
+    for strategy in (DealerBustHiLoStrategy, OnDisk):
+        game = Blackjack([BlackjackPlayer("P", chips = 10**6, strategy = strategy)], shoe = Shoe(2, seed = 0), verbose = False)
+        for _ in range(20):
+            game.play_round()
+    assert not (tmp_path / "default").exists()
+    assert OnDisk.cache.files()
@@ -0,0 +1,67 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from ..charts import CHARTS, LO, UP_CARDS, DecisionChart, load_chart, read_deviations
+from ..rules import HIT, STAND, SURRENDER
+
+RAMP = {"-10": 25, "1": 100, "4": 400}
+
+
+def _rows():
+    with open(CHARTS / "basic.csv", newline = "") as f:
+        return {row.pop("hand"): row for row in csv.DictReader(f) if not row["hand"].startswith("#")}
+
+
+def _same(a, b):
+    for name in ("plays", "splits", "insurance", "bets"):
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+
+
+def test_csv_round_trip(tmp_path):
+    shipped = DecisionChart.from_csv(CHARTS / "basic.csv", "illustrious18", bets = RAMP)
+    rows = _rows()
+    path = tmp_path / "mine.csv"
+    with open(path, "w", newline = "") as f:
+        writer = csv.writer(f)
+        writer.writerow(["hand", *UP_CARDS])
+        writer.writerow(["# written back out, last row first"])
+        for hand in reversed(list(rows)):
+            writer.writerow([hand, *(rows[hand][up] for up in UP_CARDS)])
+    deviations = tmp_path / "mine-deviations.csv"
+    with open(deviations, "w", newline = "") as f:
+        writer = csv.DictWriter(f, ["hand", "up", "index", "action", "when"])
+        writer.writeheader()
+        writer.writerows(read_deviations("illustrious18"))
+
+    chart = DecisionChart.from_csv(path, deviations, bets = RAMP)
+    assert chart.name == "mine+mine-deviations"
+    _same(chart, shipped)
+
+
+def test_json_matches_csv(tmp_path):
+    path = tmp_path / "basic.json"
+    spec = {"chart": {hand: [row[up] for up in UP_CARDS] for hand, row in _rows().items()},
+            "deviations": read_deviations("illustrious18"), "bets": RAMP}
+    path.write_text(json.dumps(spec))
+    _same(DecisionChart.from_json(path), DecisionChart.from_csv(CHARTS / "basic.csv", "illustrious18", bets = RAMP))
+    assert load_chart(path) is load_chart(str(path))   # compiled once per path
+
+
+def test_deviations_apply_from_their_index():
+    chart = load_chart("basic", "illustrious18")
+    assert chart.play(False, 16, 10, -1) == (SURRENDER, HIT)
+    assert chart.play(False, 16, 10, 0) == (SURRENDER, STAND)
+    assert not chart.insurance[3 - LO - 1] and chart.insurance[3 - LO:].all()
+    assert chart.bet(0) is None
+
+
+def test_bad_entries_are_rejected():
+    with pytest.raises(ValueError, match = "not a chart entry"):
+        DecisionChart({"H16": ["X"] * 10})
+    with pytest.raises(ValueError, match = "one per up card"):
+        DecisionChart({"H16": ["H"] * 9})
+    with pytest.raises(ValueError, match = "not a pair entry"):
+        DecisionChart({"P8": ["H"] * 10})
@@ -0,0 +1,48 @@
+from functools import partial
+
+from ..analytics import RunningStats
+from ..cards import Shoe
+from ..checkpoint import Checkpointer
+from ..game import Blackjack
+from ..participants import BlackjackPlayer
+from ..shuffles import CASINO, CutCard
+from ..strategy import HiLoStrategy, MonteCarloStrategy
+
+
+def _game():
+    players = [BlackjackPlayer("Anna", chips = 10**9, strategy = HiLoStrategy),
+               BlackjackPlayer("Noe", chips = 10**9, strategy = partial(MonteCarloStrategy, max_samples = 16, seed = 5))]
+    return Blackjack(players, shoe = Shoe(2, seed = 7, shuffle = CASINO, cut_card = CutCard()), verbose = False)
+
+
+def _play(game, stats, rounds, checkpoints = None):
+    while game._game < rounds:
+        chips = game._players[0].chips
+        game.play_round()
+        stats.push(game._players[0].chips - chips)
+        if checkpoints is not None:
+            checkpoints.step(game, stats)
+
+
+def _state(game, stats):
+    return [p.chips for p in game._seats], game._round_results, stats.mean, list(game._deck._undealt)
+
+
+def test_resume_matches_an_uninterrupted_run(tmp_path):
+    game, stats = _game(), RunningStats()
+    _play(game, stats, 300)
+    expected = _state(game, stats)
+
+    with Checkpointer(tmp_path, every = 100) as checkpoints:
+        game, stats = _game(), RunningStats()
+        _play(game, stats, 250, checkpoints)   # "crashes" 50 rounds after the last checkpoint
+
+    with Checkpointer(tmp_path, every = 100) as checkpoints:
+        game, stats = checkpoints.load()
+        assert game._game == stats.n == 200
+        assert game._round_results == [r for r in expected[1] if r["game"] <= 200]
+        _play(game, stats, 300, checkpoints)
+    assert _state(game, stats) == expected
+
+    game, _ = Checkpointer(tmp_path).load()   # the resumed run's journal continues the first one
+    assert game._game == 300 and game._round_results == expected[1]
@@ -0,0 +1,14 @@
+from ..differential import Scenario, check, compare
+
+
+def test_engines_agree_with_reference():
+    check(examples = 20, max_rounds = 60)
+
+
+def test_small_bankrolls():
+    # Seats go broke one after another: partial bets, no chips to double or
+    # split, and players leaving the table mid-list.
+    for seed in range(3):
+        scenario = Scenario(seed, 2, ("hilo", "basic", "i18", "hilo"), (("peek", bool(seed % 2)),), rounds = 300, chips = 250)
+        problems, _ = compare(scenario)
+        assert not problems, problems
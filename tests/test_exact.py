@@ -0,0 +1,42 @@
+import pytest
+
+from ..exact import BUST, ExactCalculator, dealer_distribution
+from ..odds import ONE_DECK
+from ..rules import Rules, SURRENDER, HIT, STAND
+
+SIX_DECKS = Rules(surrender = False)
+
+
+@pytest.fixture(scope = "module")
+def six_decks():
+    return ExactCalculator.fresh(6, SIX_DECKS).house_edge()
+
+
+def test_dealer_bust_rates():
+    published = {2: .3536, 3: .3739, 4: .3941, 5: .4166, 6: .4229, 7: .2624, 8: .2446, 9: .2287}   # six decks, S17
+    for up, bust in published.items():
+        assert dealer_distribution(ONE_DECK * 6, up)[BUST] == pytest.approx(bust, abs = .0005)
+    assert dealer_distribution(ONE_DECK * 6, 6).sum() == pytest.approx(1)
+
+
+def test_six_deck_house_edge(six_decks):
+    assert six_decks == pytest.approx(-.0043, abs = .0005)   # S17, DAS, no resplits
+
+
+@pytest.mark.parametrize("rules, effect", [
+    (Rules(surrender = False, hit_soft_17 = True), -.0020),
+    (Rules(surrender = False, blackjack_pays = (6, 5)), -.0136),
+    (Rules(), .0007),
+])
+def test_rule_effects(six_decks, rules, effect):
+    assert ExactCalculator.fresh(6, rules).house_edge() - six_decks == pytest.approx(effect, abs = .0003)
+
+
+def test_single_deck_favours_the_player():
+    assert ExactCalculator.fresh(1, SIX_DECKS).house_edge() == pytest.approx(.0015, abs = .0005)
+
+
+def test_sixteen_against_a_ten():
+    actions = ExactCalculator.fresh(6).actions((10, 6), up = 10)
+    assert actions[SURRENDER] == pytest.approx(-.5)
+    assert actions[SURRENDER] > actions[HIT] > actions[STAND]
@@ -0,0 +1,30 @@
+import io
+
+from ..main import load_config, sweep
+
+CONFIG = """
+rounds = 2000
+blocks = 2
+workers = 0
+[[seats]]
+name = "big"
+strategy = "TableStrategy"
+params = { chart = "basic", deviations = "illustrious18", bets = { "-10" = 500, "2" = 2000, "4" = 4000 } }
+[[seats]]
+name = "poor"
+chips = 300
+strategy = "TableStrategy"
+params = { chart = "basic", bets = { "-10" = 100 } }
+"""
+
+
+def test_blocks_play_on_when_the_house_is_down(tmp_path):
+    path = tmp_path / "sweep.toml"
+    path.write_text(CONFIG)
+    out = io.StringIO()
+    blocks = sweep(load_config(path), out)
+    big = blocks[blocks["player"] == "big"]
+    assert (big["net"] > 10_000).any()   # more than the dealer's 10,000 chips
+    assert (big["rounds"] == 1000).all()
+    played = int(blocks.groupby("seed")["rounds"].max().sum())
+    assert out.getvalue().splitlines()[-1].split("]")[1].startswith(f" {played:,} rounds")
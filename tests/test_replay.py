@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from ..cards import Shoe
+from ..game import Blackjack, Table, DEALER_SEAT
+from ..participants import BlackjackPlayer
+from ..replay import RoundLog, RoundReader, Replayer, CARD, ACTION
+from ..strategy import HiLoStrategy, TableStrategy
+
+
+@pytest.mark.parametrize("dealer_last", [True, False])
+def test_reexecute_replays_a_table(tmp_path, dealer_last):
+    path = tmp_path / "rounds.log"
+    anna = BlackjackPlayer("Anna", chips = 3000, strategy = HiLoStrategy)
+    noe = BlackjackPlayer("Noe", chips = 400, strategy = TableStrategy)
+    with RoundLog(path) as log:
+        table = Table([anna, None, noe, anna], shoe = Shoe(4, seed = 3), verbose = False, log = log, dealer_last = dealer_last)
+        while table._active_players and table._game < 200:   # Anna's spots run out of chips one at a time
+            table.play_round()
+
+    reader = RoundReader(path)
+    replayer = Replayer(reader)
+    assert len(reader) > 10
+    for rnd in reader:
+        assert rnd.dealer_last == dealer_last
+        assert rnd.owners.tolist() == [0, -1, 1, 0]
+        assert np.allclose(replayer.reexecute(rnd), rnd.net)
+
+
+def test_round_log_round_trip(tmp_path):
+    path = tmp_path / "rounds.log"
+    players = [BlackjackPlayer(name, chips = 10**6, strategy = HiLoStrategy) for name in ("Anna", "Noe")]
+    chips = []
+    with RoundLog(path) as log:
+        game = Blackjack(players, shoe = Shoe(2, seed = 5), verbose = False, log = log)
+        for _ in range(100):
+            before = [p.chips for p in players]
+            game.play_round()
+            chips.append([p.chips - b for p, b in zip(players, before)])
+
+    reader = RoundReader(path)
+    assert len(reader) == 100 and [rnd.game for rnd in reader] == list(range(1, 101))
+    rnd = reader.find(42)
+    assert rnd.game == 42 and rnd.net.tolist() == chips[41]
+    assert rnd.owners is None and not rnd.dealer_last
+    kinds = rnd.events["kind"].tolist()
+    assert kinds[:6] == [CARD] * 6 and set(kinds) <= {CARD, ACTION}
+    assert rnd.events["seat"].tolist()[:3] == [DEALER_SEAT, 0, 1]   # dealer first, then the seats
+    with pytest.raises(KeyError):
+        reader.find(101)
+
+    replayer = Replayer(reader)
+    assert replayer.mismatches() == []
+    for rnd in reader:
+        assert np.allclose(replayer.reexecute(rnd), rnd.net)
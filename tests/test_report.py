@@ -0,0 +1,25 @@
+from ..cards import Shoe
+from ..game import Blackjack
+from ..participants import BlackjackPlayer
+from ..report import RunReport, render
+from ..strategy import HiLoStrategy
+
+
+def _game(timed):
+    game = Blackjack([BlackjackPlayer("Anna", strategy = HiLoStrategy)], shoe = Shoe(2, seed = 0), verbose = False, timed = timed)
+    for _ in range(20):
+        game.play_round()
+    return game
+
+
+def test_report_leaves_the_game_untimed():
+    game = _game(timed = False)
+    report = RunReport.from_game(game)
+    assert not game.timed and report.timings is None
+    assert "Not available" in render(report)
+
+
+def test_report_reads_the_timings_of_a_timed_game():
+    report = RunReport.from_game(_game(timed = True))
+    assert set(report.timings) == {"Placing Bets", "Deal Opening", "Play Rounds", "Payout"}
+    assert "Not available" not in render(report)
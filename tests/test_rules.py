@@ -0,0 +1,92 @@
+from fractions import Fraction
+
+import numpy as np
+
+from .._utils import CardInfo
+from ..cards import Hand
+from ..playingcards import PlayingCard, BlackjackCardComparer
+from ..rules import (Rules, OUTCOMES, BLACKJACK, WIN, PUSH, LOSE, LOSER, HIT, STAND, DOUBLE, SPLIT, SURRENDER,
+                     BUST)
+
+
+def hand(*codes):
+    return Hand([PlayingCard(*CardInfo.INFO[CardInfo.IDS[code]], comparer = BlackjackCardComparer).reveal() for code in codes])
+
+
+def test_opening_hand_actions():
+    rules = Rules()
+    assert rules.legal_actions(hand("8S", "8D")) == {HIT, STAND, DOUBLE, SPLIT, SURRENDER}
+    assert rules.legal_actions(hand("8S", "9D")) == {HIT, STAND, DOUBLE, SURRENDER}
+    assert rules.legal_actions(hand("8S", "3D", "2C")) == {HIT, STAND}
+    assert rules.legal_actions(hand("KS", "QD")) == {HIT, STAND, DOUBLE, SPLIT, SURRENDER}   # tens pair by value
+
+
+def test_split_hands():
+    rules = Rules(double_after_split = False, max_hands = 2)
+    assert rules.legal_actions(hand("8S", "8D"), split_hand = True, hands = 2) == {HIT, STAND}
+    assert SURRENDER not in Rules().legal_actions(hand("8S", "9D"), split_hand = True, hands = 2)
+    assert DOUBLE in Rules().legal_actions(hand("8S", "3D"), split_hand = True, hands = 2)
+
+
+def test_split_aces():
+    aces = hand("AS", "AD")
+    assert Rules().legal_actions(aces, split_hand = True, hands = 2, split_aces = True) == {STAND}
+    assert Rules(resplit_aces = True).legal_actions(aces, split_hand = True, hands = 2, split_aces = True) == {STAND, SPLIT}
+    assert Rules(resplit_aces = True, max_hands = 2).legal_actions(aces, split_hand = True, hands = 2, split_aces = True) == {STAND}
+    assert HIT in Rules(hit_split_aces = True).legal_actions(hand("AS", "7D"), split_hand = True, hands = 2, split_aces = True)
+
+
+def test_double_on_and_chips():
+    rules = Rules(double_on = (10, 11), surrender = False)
+    assert rules.legal_actions(hand("6S", "4D")) == {HIT, STAND, DOUBLE}
+    assert rules.legal_actions(hand("6S", "3D")) == {HIT, STAND}
+    assert Rules().legal_actions(hand("8S", "8D"), chips = 99, bet = 100) == {HIT, STAND, SURRENDER}
+    assert Rules().legal_actions(hand("8S", "8D"), chips = 100, bet = 100) >= {DOUBLE, SPLIT}
+
+
+def test_resolve_falls_back_to_a_legal_action():
+    rules = Rules()
+    assert rules.resolve(DOUBLE, frozenset({HIT, STAND})) == HIT
+    assert rules.resolve(SPLIT, frozenset({STAND})) == STAND
+    assert rules.resolve(SURRENDER, frozenset({HIT, STAND, SURRENDER})) == SURRENDER
+
+
+def test_settlement():
+    rules = Rules()
+    cases = [   # player, natural, dealer, dealer natural -> outcome
+        (22, False, 22, False, LOSE),       # a busted player loses even if the dealer busts
+        (21, True, 21, True, PUSH),
+        (21, True, 21, False, BLACKJACK),   # a natural beats a drawn 21
+        (21, False, 21, True, LOSER),
+        (12, False, 25, False, WIN),
+        (21, False, 21, False, PUSH),
+        (20, False, 21, False, LOSER),      # a loss to a dealer 21
+        (18, False, 17, False, WIN),
+        (17, False, 18, False, LOSE),
+        (17, False, 17, False, PUSH),
+    ]
+    player, natural, dealer, dealer_natural, expected = map(np.array, zip(*cases))
+    assert rules.settle(player, natural, dealer, dealer_natural).tolist() == expected.tolist()
+    assert rules.settle(30, False, 20, False) == rules.settle(BUST, False, 20, False) == LOSE
+
+
+def test_payouts():
+    assert Rules().payout("blackjack", 10) == 25
+    assert Rules(blackjack_pays = (6, 5)).payout("blackjack", 10) == 22
+    assert Rules().payout("blackjack", 5) == 12.5
+    assert Rules().payout("surrender", 10) == 5
+    assert [Rules().payout(o, 10) for o in ("win", "push", "lose", "loser")] == [20, 10, 0, 0]
+    assert Rules().payouts["blackjack"] == Fraction(5, 2)
+    assert Rules().multipliers.tolist() == [float(Rules().payouts[o]) for o in OUTCOMES]
+
+
+def test_dealer_hits_soft_17_only_under_h17():
+    soft_17, hard_17 = hand("AS", "6D"), hand("KS", "7D")
+    assert not Rules().dealer_hits(soft_17) and Rules(hit_soft_17 = True).dealer_hits(soft_17)
+    assert not Rules(hit_soft_17 = True).dealer_hits(hard_17)
+    assert Rules().dealer_hits(hand("KS", "6D"))
+
+
+def test_rules_compare_by_value():
+    assert Rules(peek = False) == Rules(peek = False) != Rules()
+    assert len({Rules(), Rules()}) == 1
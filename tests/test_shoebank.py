@@ -0,0 +1,43 @@
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from ..shoebank import CHUNK, BankedShoe, ShoeBank
+from ..shuffles import CASINO
+
+
+def test_same_seed_same_shoes(tmp_path):
+    small = ShoeBank.build(tmp_path / "small.bank", shoes = CHUNK + 2, decks = 2, seed = 3)
+    big = ShoeBank.build(tmp_path / "big.bank", shoes = CHUNK + 5, decks = 2, seed = 3)
+    other = ShoeBank.build(tmp_path / "other.bank", shoes = 4, decks = 2, seed = 4)
+    assert np.array_equal(big[:len(small)], small[:])   # a bigger bank starts with the same shoes
+    assert not np.array_equal(other[:4], small[:4])
+    assert np.array_equal(ShoeBank(small.path)[:], small[:])
+    for i in (0, CHUNK + 1):
+        assert np.array_equal(np.sort(small[i]), np.repeat(np.arange(52), 2))
+
+    shuffled = [ShoeBank.build(tmp_path / f"casino{n}.bank", shoes = n, decks = 2, seed = 3, shuffle = CASINO) for n in (3, 5)]
+    assert np.array_equal(shuffled[1][:3], shuffled[0][:])
+
+
+def test_bank_is_readable_by_others(tmp_path):
+    bank = ShoeBank.build(tmp_path / "shoes.bank", shoes = 2, decks = 1)
+    assert stat.S_IMODE(os.stat(bank.path).st_mode) == 0o644
+    assert [p.name for p in tmp_path.iterdir()] == ["shoes.bank"]
+
+
+def test_banked_shoe_never_redeals_a_card(tmp_path):
+    bank = ShoeBank.build(tmp_path / "shoes.bank", shoes = 3, decks = 1, seed = 1)
+    shoe = BankedShoe(bank, cut_card = None)
+    for index in range(3):
+        cards = [shoe.draw() for _ in range(52)]
+        assert shoe.bank_index == index
+        assert [card.id for card in cards] == bank[index].tolist()
+        assert len({id(card) for card in cards}) == 52   # every physical card dealt once
+        with pytest.raises(RuntimeError, match = "middle of a round"):
+            shoe.draw()
+        shoe.end_round()
+    with pytest.raises(RuntimeError, match = "exhausted"):
+        shoe.draw()
@@ -0,0 +1,58 @@
+import numpy as np
+
+from functools import partial
+
+from ..cards import CARD_VALUES, Shoe
+from ..events import CardDealt, EventBus
+from ..game import Blackjack
+from ..odds import ONE_DECK
+from ..participants import BlackjackPlayer
+from ..rules import Rules
+from ..shuffles import CutCard
+from ..strategy import CachedDecisions, HiLoStrategy, TableStrategy
+
+
+def test_table_strategy_counts_only_cards_seen():
+    shoe = Shoe(2, seed = 0, cut_card = CutCard())
+    dealt, checks = {}, []
+
+    class Spy(TableStrategy):
+        @classmethod
+        def decide_batch(cls, strategies, snapshot):
+            deck, hole = snapshot.deck, strategies[0]._dealer.hand[1]
+            assert not hole.faceup
+            seen = np.bincount([CARD_VALUES[i] - 1 for i in dealt.get(deck.shoes, [])], minlength = 10)
+            seen[hole.values[0] - 1] -= 1
+            checks.append(bool((deck.value_counts == deck.num_decks * ONE_DECK - seen).all()))
+            return super().decide_batch(strategies, snapshot)
+
+    events = EventBus()
+    events.subscribe(CardDealt, lambda event: dealt.setdefault(shoe.shoes, []).append(event.card.id))
+    game = Blackjack([BlackjackPlayer("Spy", chips = 10**9, strategy = Spy)], shoe = shoe, verbose = False, events = events)
+    for _ in range(200):
+        game.play_round()
+    assert checks and all(checks)
+
+
+def test_cached_bets_are_capped_per_player():
+    class CachedHiLo(CachedDecisions, HiLoStrategy): pass
+    shoe = Shoe(6, seed = 0)
+    short = BlackjackPlayer("Short", chips = 7, strategy = CachedHiLo)
+    deep = BlackjackPlayer("Deep", chips = 10**6, strategy = CachedHiLo)
+    assert short.strategy.autobet(shoe) == 7
+    assert deep.strategy.autobet(shoe) == HiLoStrategy(deep).bid(shoe) == 500
+    assert CachedHiLo.bets().stats()["hits"] == 1
+
+
+def test_cached_decisions_are_kept_apart_by_configuration():
+    class CachedTable(CachedDecisions, TableStrategy): pass
+    players = [BlackjackPlayer("Flat", strategy = CachedTable),
+               BlackjackPlayer("Ramp", strategy = partial(CachedTable, bets = {-10: 10, 2: 50}))]
+    games = [Blackjack([players[0]], verbose = False, shoe = Shoe(2, seed = 1)),
+             Blackjack([players[1]], Rules(hit_soft_17 = True), verbose = False, shoe = Shoe(2, seed = 1))]
+    for _ in range(50):
+        for game in games:
+            game.play_round()
+    setups = {key[:3] for key in CachedTable.bets()._table}
+    assert len(setups) == 2
+    assert {amount for key, amount in CachedTable.bets()._table.items() if key[2] == players[0].strategy._settings} == {100}
@@ -0,0 +1,26 @@
+from ..analytics import RunningStats
+from ..cards import Shoe
+from ..game import Blackjack
+from ..participants import BlackjackPlayer
+from ..strategy import HiLoStrategy
+from ..visualization import Progress, WinRateVisualizer
+
+
+def test_progress_is_a_plain_line_outside_a_notebook(capsys):
+    stats = {"Anna": RunningStats()}
+    stats["Anna"].push(1.0)
+    bar = Progress(100, interval = 0)
+    bar.update(10, stats)
+    bar.update(100, stats, force = True)
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert err.startswith("\r10 / 100 rounds") and err.endswith("EV/round Anna: +1.000\n")
+
+
+def test_play_until_ignores_the_dealers_chips():
+    players = [BlackjackPlayer(name, chips = 10**6, strategy = HiLoStrategy) for name in ("Anna", "Noe")]
+    game = Blackjack(players, shoe = Shoe(2, seed = 0), verbose = False)
+    game._dealer.chips = 0
+    result = WinRateVisualizer(game).play_until(width = 0, min_rounds = 20, max_rounds = 50, plot = False, progress = False)
+    assert result["rounds"].tolist() == [50, 50]
+    assert result["stopped"].tolist() == ["max_rounds", "max_rounds"]
@@ -0,0 +1,131 @@
+import math
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+from .game import Blackjack
+from .participants import BlackjackPlayer
+from .rules import Rules, DEFAULT_RULES
+from .shared import SharedTables, worker_init, worker_tables
+from .shoebank import ShoeBank, BankedShoe
+from .shuffles import CutCard
+
+# Cards a round takes on average, generously (one seat takes under 6), for
+# sizing the shoe bank a tournament builds.
+CARDS_PER_ROUND = 8
+
+
+def play_block(strategy:Callable, bank:ShoeBank, block:int, blocks:int, rounds:int, rules:Rules = DEFAULT_RULES) -> np.ndarray:
+  """
+  Play `rounds` rounds of one seat against the dealer on shoes `block`,
+  `block + blocks`, ... of `bank`, so every entrant of a block is dealt the
+  same shoes whatever it does with them. Returns (sum of net results, sum
+  of squares, sum of bets).
+  """
+  player = BlackjackPlayer("Entrant", chips = 10**12, strategy = strategy)
+  game = Blackjack([player], rules, shoe = BankedShoe(bank, first = block, step = blocks), verbose = False)
+  totals = np.zeros(3)
+  for _ in range(rounds):
+      before = player.chips
+      game.play_round()
+      net = player.chips - before
+      totals += (net, net * net, game._round_bets[player])
+  return totals
+
+
+def _play(args):
+  """`play_block` in a pool worker: the totals go into the shared `totals` buffer, not back through a pipe."""
+  entrant, block, *rest = args
+  worker_tables()["totals"][entrant, block] = play_block(*rest)
+
+
+class Tournament:
+  """
+  Plays many strategies on the same shoes (common random numbers).
+
+  Every entrant plays `blocks` blocks of `rounds` rounds; block k deals the
+  same shoes to every entrant, from a `shoebank.ShoeBank`, so luck of the
+  deal largely cancels when two entrants are compared block by block. The
+  bank is `bank`, or one of `num_decks` decks built from `seed` for the run.
+  Blocks run in parallel across `workers` processes (None = one per CPU,
+  0 = in this process).
+
+  Entrants map a name to a strategy class, or a `functools.partial` of one.
+
+  Example usage:
+  -------------------
+  t = Tournament({"hilo": HiLoStrategy, "mc": partial(MonteCarloStrategy, max_samples = 1024)})
+  t.run()
+  t.ranking()     # EV per round with 95% confidence intervals
+  t.pairwise()    # p-values of "these two have the same EV"
+  -------------------
+  """
+  def __init__(self, entrants:Dict[str, Callable], rounds:int = 1000, blocks:int = 32,
+               rules:Rules = DEFAULT_RULES, num_decks:int = 4, seed:int = 0, workers:Optional[int] = None,
+               bank:Optional[ShoeBank] = None):
+      self._entrants = dict(entrants)
+      self._rounds, self._blocks = rounds, blocks
+      self._rules, self._num_decks = rules, num_decks
+      self._seed = seed
+      self._bank = bank
+      self._workers = workers
+      self._totals = None   # (entrants, blocks, 3)
+
+  def run(self) -> "Tournament":
+      if self._bank is not None:
+          return self._run(self._bank)
+      cards = 52 * self._num_decks
+      shoes = math.ceil(self._rounds * CARDS_PER_ROUND / (CutCard().penetration * cards)) + 1
+      with tempfile.TemporaryDirectory() as tmp:
+          return self._run(ShoeBank.build(os.path.join(tmp, "shoes.bank"), shoes * self._blocks, self._num_decks, self._seed))
+
+  def _run(self, bank:ShoeBank) -> "Tournament":
+      tasks = [(entrant, block, strategy, bank, block, self._blocks, self._rounds, self._rules)
+               for entrant, strategy in enumerate(self._entrants.values()) for block in range(self._blocks)]
+      if self._workers == 0:
+          self._totals = np.zeros((len(self._entrants), self._blocks, 3))
+          for entrant, block, *rest in tasks:
+              self._totals[entrant, block] = play_block(*rest)
+          return self
+      with SharedTables() as store:
+          totals = store.buffer("totals", (len(self._entrants), self._blocks, 3))
+          with ProcessPoolExecutor(self._workers, initializer=worker_init, initargs=(store.spec(),)) as pool:
+              list(pool.map(_play, tasks, chunksize=max(1, len(tasks) // (4 * (self._workers or 8)))))
+          self._totals = totals.copy()
+      return self
+
+  def _block_means(self) -> np.ndarray:
+      if self._totals is None:
+          raise ValueError("No results yet. Run run() first.")
+      return self._totals[:, :, 0] / self._rounds
+
+  def ranking(self, z:float = 1.96) -> pd.DataFrame:
+      means = self._block_means()
+      ev = means.mean(axis=1)
+      se = means.std(axis=1, ddof=1) / math.sqrt(self._blocks)
+      avg_bet = self._totals[:, :, 2].sum(axis=1) / (self._rounds * self._blocks)
+      df = pd.DataFrame({
+          "strategy": list(self._entrants),
+          "ev": ev,
+          "ci_low": ev - z * se,
+          "ci_high": ev + z * se,
+          "ev_per_unit": ev / avg_bet,
+          "rounds": self._rounds * self._blocks,
+      })
+      return df.sort_values("ev", ascending=False).reset_index(drop=True)
+
+  def pairwise(self) -> pd.DataFrame:
+      """Two-sided p-values of the paired (same blocks) difference in EV."""
+      means = self._block_means()
+      names = list(self._entrants)
+      p = np.ones((len(names), len(names)))
+      for i in range(len(names)):
+          for j in range(i + 1, len(names)):
+              diff = means[i] - means[j]
+              se = diff.std(ddof=1) / math.sqrt(self._blocks)
+              p[i, j] = p[j, i] = math.erfc(abs(diff.mean()) / (se * math.sqrt(2))) if se > 0 else float(diff.mean() == 0)
+      return pd.DataFrame(p, index=names, columns=names)
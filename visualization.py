@@ -1,28 +1,154 @@
+import html
+import re
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from typing import List, Dict
+from time import perf_counter
+from typing import List, Dict, Optional
+from IPython.display import HTML, DisplayHandle, display
 
+from ._utils import in_notebook
+from .analytics import RunningStats
 from .game import Blackjack
 from .participants import BlackjackPlayer
 
+class Progress:
+    """
+    One live line for a long run: rounds done, rounds per second, ETA and
+    each player's EV per round so far.
+
+    `update()` is cheap enough to call every round: it only redraws once
+    `interval` seconds have passed since the last redraw. Outside a
+    notebook the line is plain text, rewritten in place on stderr.
+    """
+
+    def __init__(self, total: Optional[int] = None, interval: float = 0.25, z: float = 1.96):
+        self.total = total
+        self.interval = interval
+        self.z = z
+        self._handle = display(DisplayHandle(), display_id=True) if in_notebook() else None
+        self._start = self._last = perf_counter()
+
+    def update(self, rounds: int, stats: Dict[str, RunningStats], force: bool = False):
+        now = perf_counter()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        line = self.render(rounds, stats, now - self._start)
+        if self._handle is not None:
+            self._handle.update(HTML(line))
+            return
+        sys.stderr.write("\r" + html.unescape(re.sub("<[^>]+>", "", line)) + ("\n" if force else ""))
+        sys.stderr.flush()
+
+    def render(self, rounds: int, stats: Dict[str, RunningStats], elapsed: float) -> str:
+        rate = rounds / elapsed if elapsed > 0 else 0.0
+        done = f"{rounds:,}" if self.total is None else f"{rounds:,} / {self.total:,}"
+        eta = ""
+        if self.total and rate:
+            eta = f" &middot; ETA {(self.total - rounds) / rate:,.0f} s"
+        evs = " &middot; ".join(
+            f"{name}: {s.mean:+.3f}" + (f" &plusmn; {s.half_width(self.z):.3f}" if s.n > 1 else "")
+            for name, s in stats.items())
+        return f"<code>{done} rounds &middot; {rate:,.0f} rounds/s{eta} &middot; EV/round {evs}</code>"
+
+
 class WinRateVisualizer:
     """Utility class to plot win rates versus the dealer."""
 
     def __init__(self, game: Blackjack):
         self.game = game
+        self.stats: Dict[str, RunningStats] = {}
+        self.stopped: Dict[str, str] = {}
 
-    def play(self, rounds: int = 1):
-        for _ in range(rounds):
-            if not self.game._active_players:
-                self.plot()
-                break
-            if not self.game._dealer.is_eligible():
-                self.plot()
-                break
-            self.game.play_round()
+    def play(self, rounds: int = 1, progress: bool = True, interval: float = 0.25):
+        """
+        Play up to `rounds` rounds, then plot. With `progress`, a single line
+        shows rounds done, throughput, ETA and EV per player as it goes,
+        redrawn at most every `interval` seconds.
+        """
+        game = self.game
+        for p in game._active_players:
+            self.stats.setdefault(p.name, RunningStats())
+        bar = Progress(rounds, interval) if progress else None
+        played = 0
+        while played < rounds and game._active_players:   # the house has no bankroll to run out of
+            seated = list(game._active_players)
+            before = [p.chips for p in seated]
+            game.play_round()
+            played += 1
+            for p, chips in zip(seated, before):
+                self.stats[p.name].push(p.chips - chips)
+            if bar is not None:
+                bar.update(played, self.stats)
+        if bar is not None:
+            bar.update(played, self.stats, force=True)
         self.plot()
 
+    def play_until(self, width: float = 0.05, z: float = 1.96, min_rounds: int = 1000,
+                   max_rounds: int = 100_000, prune: bool = True, plot: bool = True,
+                   progress: bool = True) -> pd.DataFrame:
+        """
+        Play until every player's EV per round is known to within `width`.
+
+        A player leaves the table once the z-confidence interval of its mean
+        net result per round is narrower than `width`. With `prune`, a player
+        also leaves as soon as its interval lies wholly below another
+        player's, i.e. it is clearly the worse strategy. Nobody is stopped
+        before `min_rounds` rounds or kept beyond `max_rounds`.
+
+        Returns one row per player: rounds played, EV, interval and why it
+        stopped ("width", "pruned", "max_rounds" or "broke"). `progress`
+        shows a live `Progress` line while it runs.
+        """
+        game = self.game
+        players = list(game._active_players)
+        self.stats = {p.name: RunningStats() for p in players}
+        self.stopped = {}
+        bar = Progress(max_rounds, z=z) if progress else None
+        played = 0
+        while game._active_players:
+            seated = list(game._active_players)
+            before = {p: p.chips for p in seated}
+            game.play_round()
+            played += 1
+            for p in seated:
+                self.stats[p.name].push(p.chips - before[p])
+                if p not in game._active_players:
+                    self.stopped[p.name] = "broke"
+
+            seated = [p for p in game._active_players if self.stats[p.name].n >= min_rounds]
+            best_low = max((s.interval(z)[0] for s in self.stats.values() if s.n >= min_rounds), default=-float("inf"))
+            for p in seated:
+                stats = self.stats[p.name]
+                low, high = stats.interval(z)
+                if 2 * stats.half_width(z) <= width:
+                    reason = "width"
+                elif prune and high < best_low:
+                    reason = "pruned"
+                elif stats.n >= max_rounds:
+                    reason = "max_rounds"
+                else:
+                    continue
+                self.stopped[p.name] = reason
+                game.leave(p)
+            if bar is not None:
+                bar.update(played, self.stats)
+
+        if bar is not None:
+            bar.update(played, self.stats, force=True)
+
+        if plot and game._round_results:
+            self.plot()
+        rows = []
+        for p in players:
+            stats = self.stats[p.name]
+            low, high = stats.interval(z)
+            rows.append({"player": p.name, "rounds": stats.n, "ev": stats.mean, "ci_low": low, "ci_high": high,
+                         "stopped": self.stopped.get(p.name)})
+        return pd.DataFrame(rows)
+
     def plot(self):
         if not self.game._round_results:
             raise ValueError("No results to plot. Run play() first.")